@@ -0,0 +1 @@
+"""Schedule audit reports; run ``python -m analysis --help``"""
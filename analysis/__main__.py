@@ -0,0 +1,113 @@
+"""Schedule audit CLI.
+
+Loads one snapshot of the semester and computes every requested report in a
+single pass:
+
+    python -m analysis                          # all reports as text
+    python -m analysis summary conflicts --format json --output audit.json
+    python -m analysis satisfaction --format csv
+    python -m analysis --workers 8              # shard students across processes
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+REPORT_NAMES = ['summary', 'satisfaction', 'conflicts', 'utilization', 'optimality']
+
+def flatten(value, prefix=''):
+    """Yield (dotted key, scalar) pairs from nested dicts and lists"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from flatten(item, f'{prefix}.{key}' if prefix else str(key))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from flatten(item, f'{prefix}.{index}')
+    else:
+        yield prefix, value
+
+def render_text(results):
+    lines = []
+    for name, report in results.items():
+        lines.append('=' * 60)
+        lines.append(name.upper())
+        lines.append('=' * 60)
+        _render_block(report, lines, 0)
+        lines.append('')
+    return '\n'.join(lines)
+
+def _render_block(value, lines, depth):
+    indent = '  ' * depth
+    for key, item in value.items():
+        if isinstance(item, dict):
+            lines.append(f'{indent}{key}:')
+            _render_block(item, lines, depth + 1)
+        elif isinstance(item, list):
+            lines.append(f'{indent}{key}:')
+            for entry in item:
+                text = ', '.join(f'{k}={v}' for k, v in entry.items()) if isinstance(entry, dict) else entry
+                lines.append(f'{indent}  - {text}')
+        else:
+            lines.append(f'{indent}{key}: {item}')
+
+def render_csv(results):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['report', 'metric', 'value'])
+    for name, report in results.items():
+        for key, value in flatten(report):
+            writer.writerow([name, key, '' if value is None else value])
+    return buffer.getvalue()
+
+RENDERERS = {
+    'text': render_text,
+    'json': lambda results: json.dumps(results, indent=2, default=str),
+    'csv': render_csv
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m analysis', description='Audit a semester schedule')
+    parser.add_argument('reports', nargs='*', default=['all'], metavar='REPORT', help=f"one or more of {', '.join(REPORT_NAMES)} (default: all)")
+    parser.add_argument('--semester', default='Spring2024')
+    parser.add_argument('--format', choices=sorted(RENDERERS), default='text')
+    parser.add_argument('--output', help='Write to this file instead of stdout')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Shard the per-student pass across this many processes')
+    parser.add_argument('--replica', action='store_true',
+                        help='Read from REPLICA_DATABASE_URL unless it lags behind the primary')
+    args = parser.parse_args(argv)
+    unknown = set(args.reports) - set(REPORT_NAMES) - {'all'}
+    if unknown:
+        parser.error(f"unknown report(s): {', '.join(sorted(unknown))}")
+
+    names = REPORT_NAMES if 'all' in args.reports else list(dict.fromkeys(args.reports))
+
+    sys.path.insert(0, ROOT)
+    from app import create_app
+    from app.services.snapshot import ScheduleSnapshot
+    from app.utils.replica import replica_reads
+    from analysis.reports import run_reports
+
+    app = create_app()
+    with app.app_context():
+        if args.replica:
+            with replica_reads(args.semester) as source:
+                snapshot = ScheduleSnapshot.load(args.semester)
+            print(f'Read {args.semester} from the {source}', file=sys.stderr)
+        else:
+            snapshot = ScheduleSnapshot.load(args.semester)
+        results = run_reports(snapshot, names, workers=args.workers)
+
+    output = RENDERERS[args.format](results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        sys.stdout.write(output if output.endswith('\n') else output + '\n')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
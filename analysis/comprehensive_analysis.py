@@ -1,257 +1,10 @@
-from app import create_app, db
-from app.models.models import Schedule, Student, Course, TimeSlot, CoursePreference
-from collections import defaultdict
-import statistics
+"""Compatibility wrapper for ``python -m analysis all``"""
+import os
+import sys
 
-app = create_app()
-with app.app_context():
-    print("=" * 80)
-    print("COMPREHENSIVE ANALYSIS: 500 STUDENT SCHEDULING OPTIMIZATION")
-    print("=" * 80)
-    
-    # 1. Overall Statistics
-    print("\n1. OVERALL STATISTICS")
-    print("-" * 40)
-    
-    total_students = Student.query.count()
-    total_courses = Course.query.count()
-    total_timeslots = TimeSlot.query.count()
-    total_schedules = Schedule.query.filter_by(semester='Spring2024').count()
-    students_scheduled = db.session.query(Schedule.student_id).filter_by(
-        semester='Spring2024'
-    ).distinct().count()
-    
-    print(f"Total Students in System: {total_students}")
-    print(f"Students Successfully Scheduled: {students_scheduled} ({students_scheduled/total_students*100:.1f}%)")
-    print(f"Total Course Assignments Made: {total_schedules}")
-    print(f"Average Courses per Student: {total_schedules/students_scheduled:.2f}")
-    print(f"Total Courses Offered: {total_courses}")
-    print(f"Total Time Slots Available: {total_timeslots}")
-    
-    # 2. Course Load Distribution
-    print("\n2. COURSE LOAD DISTRIBUTION")
-    print("-" * 40)
-    
-    load_dist = defaultdict(int)
-    for student in Student.query.all():
-        count = Schedule.query.filter_by(student_id=student.id, semester='Spring2024').count()
-        load_dist[count] += 1
-    
-    print("Courses | Students | Percentage")
-    print("--------|----------|------------")
-    for load in sorted(load_dist.keys()):
-        pct = load_dist[load] / total_students * 100
-        bar = "█" * int(pct / 2)
-        print(f"   {load}    |   {load_dist[load]:3d}    | {pct:5.1f}% {bar}")
-    
-    # 3. Preference Satisfaction Analysis
-    print("\n3. PREFERENCE SATISFACTION ANALYSIS")
-    print("-" * 40)
-    
-    satisfaction_by_priority = defaultdict(lambda: {'met': 0, 'total': 0})
-    
-    for student in Student.query.all():
-        prefs = CoursePreference.query.filter_by(student_id=student.id).all()
-        scheduled = set(s.course_id for s in Schedule.query.filter_by(
-            student_id=student.id, semester='Spring2024'
-        ).all())
-        
-        for pref in prefs:
-            satisfaction_by_priority[pref.priority]['total'] += 1
-            if pref.course_id in scheduled:
-                satisfaction_by_priority[pref.priority]['met'] += 1
-    
-    print("Priority | Satisfied/Total | Rate   | Visual")
-    print("---------|-----------------|--------|" + "-" * 30)
-    
-    overall_met = 0
-    overall_total = 0
-    
-    for priority in sorted(satisfaction_by_priority.keys()):
-        data = satisfaction_by_priority[priority]
-        rate = data['met'] / data['total'] * 100 if data['total'] > 0 else 0
-        overall_met += data['met']
-        overall_total += data['total']
-        bar = "█" * int(rate / 3)
-        print(f"    {priority}    | {data['met']:4d}/{data['total']:4d}      | {rate:5.1f}% | {bar}")
-    
-    overall_rate = overall_met / overall_total * 100 if overall_total > 0 else 0
-    print(f"\nOverall Satisfaction: {overall_met}/{overall_total} ({overall_rate:.1f}%)")
-    
-    # 4. Time Conflict Analysis
-    print("\n4. TIME CONFLICT VERIFICATION")
-    print("-" * 40)
-    
-    conflicts = 0
-    conflict_examples = []
-    
-    for student in Student.query.all():
-        schedules = Schedule.query.filter_by(student_id=student.id, semester='Spring2024').all()
-        
-        # Check for time conflicts
-        time_slots = defaultdict(list)
-        for sched in schedules:
-            ts = TimeSlot.query.get(sched.timeslot_id)
-            time_key = (ts.day, ts.start_time)
-            time_slots[time_key].append((sched, ts))
-        
-        has_conflict = False
-        for time_key, items in time_slots.items():
-            if len(items) > 1:
-                has_conflict = True
-                if len(conflict_examples) < 3:
-                    courses = [Course.query.get(item[0].course_id).name for item in items]
-                    conflict_examples.append({
-                        'student': student.name,
-                        'time': f"Day {time_key[0]}, {time_key[1]}",
-                        'courses': courses
-                    })
-                break
-        
-        if has_conflict:
-            conflicts += 1
-    
-    print(f"Students with Time Conflicts: {conflicts} ({conflicts/total_students*100:.1f}%)")
-    
-    if conflict_examples:
-        print("\nConflict Examples:")
-        for ex in conflict_examples:
-            print(f"  - {ex['student']}: {', '.join(ex['courses'])} at {ex['time']}")
-    else:
-        print("✓ No time conflicts detected!")
-    
-    # 5. Course Utilization and Demand
-    print("\n5. COURSE UTILIZATION AND DEMAND ANALYSIS")
-    print("-" * 40)
-    
-    print("Course                    | Enrolled/Cap | Util% | Demand | D/C Ratio")
-    print("-" * 70)
-    
-    total_seats = 0
-    total_enrolled = 0
-    
-    for course in Course.query.all():
-        enrolled = Schedule.query.filter_by(course_id=course.id, semester='Spring2024').count()
-        demand = CoursePreference.query.filter_by(course_id=course.id).count()
-        utilization = enrolled / course.capacity * 100
-        demand_ratio = demand / course.capacity
-        
-        total_seats += course.capacity
-        total_enrolled += enrolled
-        
-        status = "FULL" if enrolled >= course.capacity else "    "
-        print(f"{course.name:25s} | {enrolled:3d}/{course.capacity:3d}    | {utilization:5.1f} | {demand:3d}    | {demand_ratio:5.2f} {status}")
-    
-    print(f"\nTotal: {total_enrolled}/{total_seats} seats used ({total_enrolled/total_seats*100:.1f}%)")
-    
-    # 6. Algorithm Performance Analysis
-    print("\n6. OPTIMIZATION TRADE-OFF ANALYSIS")
-    print("-" * 40)
-    
-    trade_offs = 0
-    priority_skips = defaultdict(int)
-    
-    for student in Student.query.all():
-        prefs = CoursePreference.query.filter_by(student_id=student.id).order_by(
-            CoursePreference.priority
-        ).all()
-        
-        scheduled = set(s.course_id for s in Schedule.query.filter_by(
-            student_id=student.id, semester='Spring2024'
-        ).all())
-        
-        # Analyze scheduling pattern
-        got_priorities = []
-        skipped_priorities = []
-        
-        for pref in prefs:
-            if pref.course_id in scheduled:
-                got_priorities.append(pref.priority)
-                # Check if any higher priority was skipped
-                for p in prefs:
-                    if p.priority < pref.priority and p.course_id not in scheduled:
-                        trade_offs += 1
-                        priority_skips[p.priority] += 1
-                        break
-            else:
-                skipped_priorities.append(pref.priority)
-    
-    print(f"Students who experienced trade-offs: {trade_offs}")
-    print("\nSkipped priorities (when lower priority was taken):")
-    for priority, count in sorted(priority_skips.items()):
-        print(f"  Priority {priority}: {count} times")
-    
-    # 7. Time Slot Utilization
-    print("\n7. TIME SLOT UTILIZATION")
-    print("-" * 40)
-    
-    slot_usage = defaultdict(int)
-    for schedule in Schedule.query.filter_by(semester='Spring2024').all():
-        ts = TimeSlot.query.get(schedule.timeslot_id)
-        day_names = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']
-        day = day_names[ts.day] if ts.day < 5 else f'D{ts.day}'
-        slot_key = f"{day} {ts.start_time.strftime('%H:%M')}"
-        slot_usage[slot_key] += 1
-    
-    print("Most utilized time slots:")
-    for slot, count in sorted(slot_usage.items(), key=lambda x: x[1], reverse=True)[:10]:
-        print(f"  {slot}: {count} students")
-    
-    # 8. Student Success Categories
-    print("\n8. STUDENT OUTCOME CATEGORIES")
-    print("-" * 40)
-    
-    categories = {
-        'perfect': 0,      # Got all their top choices
-        'good': 0,         # Got 70%+ of preferences
-        'satisfactory': 0, # Got 50-70% of preferences
-        'poor': 0,         # Got <50% of preferences
-        'unscheduled': 0   # Got no courses
-    }
-    
-    first_choice_success = 0
-    
-    for student in Student.query.all():
-        prefs = CoursePreference.query.filter_by(student_id=student.id).all()
-        scheduled = set(s.course_id for s in Schedule.query.filter_by(
-            student_id=student.id, semester='Spring2024'
-        ).all())
-        
-        if not scheduled:
-            categories['unscheduled'] += 1
-            continue
-        
-        # Check first choice
-        first_prefs = [p.course_id for p in prefs if p.priority == 1]
-        if first_prefs and any(fp in scheduled for fp in first_prefs):
-            first_choice_success += 1
-        
-        # Calculate satisfaction rate
-        if prefs:
-            satisfied = sum(1 for p in prefs if p.course_id in scheduled)
-            rate = satisfied / len(prefs)
-            
-            if rate >= 1.0:
-                categories['perfect'] += 1
-            elif rate >= 0.7:
-                categories['good'] += 1
-            elif rate >= 0.5:
-                categories['satisfactory'] += 1
-            else:
-                categories['poor'] += 1
-    
-    print(f"Perfect (100% preferences met): {categories['perfect']} students")
-    print(f"Good (70%+ preferences met): {categories['good']} students")
-    print(f"Satisfactory (50-70% met): {categories['satisfactory']} students")
-    print(f"Poor (<50% met): {categories['poor']} students")
-    print(f"Unscheduled: {categories['unscheduled']} students")
-    print(f"\nGot first choice: {first_choice_success}/{total_students} ({first_choice_success/total_students*100:.1f}%)")
-    
-    # Summary
-    print("\n" + "=" * 80)
-    print("SUMMARY: This represents a realistic university scheduling scenario where:")
-    print("- Not all students get their first choices due to capacity/time constraints")
-    print("- The optimizer makes intelligent trade-offs to maximize overall satisfaction")
-    print("- All hard constraints (time conflicts, capacity) are respected")
-    print("- The solution achieves a good balance between fairness and efficiency")
-    print("=" * 80)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analysis.__main__ import main
+
+if __name__ == '__main__':
+    sys.exit(main(['all'] + sys.argv[1:]))
@@ -1,114 +1,10 @@
-from app import create_app, db
-from app.models.models import Schedule, Student, Course, CoursePreference
-from collections import defaultdict
+"""Compatibility wrapper for ``python -m analysis optimality conflicts``"""
+import os
+import sys
 
-app = create_app()
-with app.app_context():
-    print("=== FINAL OR-TOOLS VERIFICATION ===\n")
-    
-    # 1. Prove it's not greedy assignment
-    print("1. EVIDENCE OF OPTIMIZATION (NOT GREEDY):")
-    
-    # Count various patterns
-    patterns = {
-        'perfect_sequence': 0,  # Got 1,2,3 in order
-        'with_gaps': 0,         # Got 1,3,5 (skipped some)
-        'out_of_order': 0,      # Got 2,4 without 1
-        'trade_offs': 0         # Got lower priority when higher was available
-    }
-    
-    students = Student.query.limit(100).all()
-    
-    for student in students:
-        prefs = CoursePreference.query.filter_by(student_id=student.id).order_by(
-            CoursePreference.priority
-        ).all()
-        
-        scheduled = set(
-            s.course_id for s in Schedule.query.filter_by(
-                student_id=student.id, semester='Spring2024'
-            ).all()
-        )
-        
-        if not scheduled:
-            continue
-            
-        # Analyze pattern
-        got_priorities = sorted([p.priority for p in prefs if p.course_id in scheduled])
-        
-        if got_priorities == list(range(1, len(got_priorities) + 1)):
-            patterns['perfect_sequence'] += 1
-        elif got_priorities[0] != 1:
-            patterns['out_of_order'] += 1
-        elif len(got_priorities) < len(scheduled):
-            patterns['with_gaps'] += 1
-        
-        # Check for trade-offs
-        for i, pref in enumerate(prefs):
-            if pref.course_id in scheduled:
-                if any(prefs[j].course_id not in scheduled for j in range(i)):
-                    patterns['trade_offs'] += 1
-                    break
-    
-    print(f"  Perfect sequence (1,2,3...): {patterns['perfect_sequence']} students")
-    print(f"  With gaps (1,3,5...): {patterns['with_gaps']} students")
-    print(f"  Out of order (no 1st choice): {patterns['out_of_order']} students")
-    print(f"  Made trade-offs: {patterns['trade_offs']} students")
-    
-    if patterns['trade_offs'] > patterns['perfect_sequence']:
-        print("\n  ✓ CONFIRMED: Optimization is making intelligent trade-offs!")
-    
-    # 2. Check constraint satisfaction
-    print("\n2. CONSTRAINT SATISFACTION:")
-    
-    # Time conflicts
-    conflicts = 0
-    capacity_violations = 0
-    
-    # Check all students
-    for student in Student.query.all():
-        schedules = Schedule.query.filter_by(student_id=student.id, semester='Spring2024').all()
-        
-        # Check time conflicts
-        times = defaultdict(list)
-        for s in schedules:
-            from app.models.models import TimeSlot
-            ts = TimeSlot.query.get(s.timeslot_id)
-            times[(ts.day, ts.start_time)].append(s)
-        
-        for time_key, scheds in times.items():
-            if len(scheds) > 1:
-                conflicts += 1
-                break
-    
-    # Check capacity
-    for course in Course.query.all():
-        enrolled = Schedule.query.filter_by(course_id=course.id, semester='Spring2024').count()
-        if enrolled > course.capacity:
-            capacity_violations += 1
-    
-    print(f"  Time conflicts: {conflicts}")
-    print(f"  Capacity violations: {capacity_violations}")
-    print(f"  Course load compliance: All students have 3-5 courses")
-    
-    if conflicts == 0 and capacity_violations == 0:
-        print("\n  ✓ CONFIRMED: All constraints satisfied!")
-    
-    # 3. Solution quality
-    print("\n3. SOLUTION QUALITY METRICS:")
-    
-    total_prefs = sum(CoursePreference.query.filter_by(student_id=s.id).count() 
-                     for s in Student.query.limit(200).all())
-    
-    total_scheduled = Schedule.query.filter_by(semester='Spring2024').count()
-    
-    print(f"  Total preferences: {total_prefs}")
-    print(f"  Total scheduled: {total_scheduled}")
-    print(f"  Optimization efficiency: {total_scheduled/total_prefs*100:.1f}%")
-    
-    print("\n=== CONCLUSION ===")
-    print("✓ Real OR-Tools optimization confirmed!")
-    print("✓ Constraints satisfied")
-    print("✓ Intelligent trade-offs made")
-    print("✓ Realistic satisfaction distribution")
-    print("\nYou can confidently discuss this in interviews!")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analysis.__main__ import main
+
+if __name__ == '__main__':
+    sys.exit(main(['optimality', 'conflicts'] + sys.argv[1:]))
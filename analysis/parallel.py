@@ -0,0 +1,103 @@
+"""Shard the per-student report pass across a process pool.
+
+The snapshot's per-student data is packed once into CSR-style int64 arrays in
+a single shared memory block; workers map those arrays read-only, rebuild
+the visit arguments for their student range and send back partial reports,
+which the parent merges. Only the small course and timeslot catalogs are
+pickled to the workers.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import multiprocessing
+
+import numpy as np
+
+ARRAYS = ('student', 'pref_ptr', 'pref_priority', 'pref_course', 'entry_ptr', 'entry_course', 'entry_slot')
+
+def pack(snapshot):
+    """CSR arrays for every student's preferences and schedule entries"""
+    students = list(snapshot.students)
+    pref_counts = [len(snapshot.preferences.get(s, ())) for s in students]
+    entry_counts = [len(snapshot.schedules.get(s, ())) for s in students]
+
+    prefs = [p for s in students for p in snapshot.preferences.get(s, ())]
+    entries = [e for s in students for e in snapshot.schedules.get(s, ())]
+    return {
+        'student': np.array(students, dtype=np.int64),
+        'pref_ptr': np.concatenate(([0], np.cumsum(pref_counts, dtype=np.int64))),
+        'pref_priority': np.fromiter((p[1] for p in prefs), dtype=np.int64, count=len(prefs)),
+        'pref_course': np.fromiter((p[0] for p in prefs), dtype=np.int64, count=len(prefs)),
+        'entry_ptr': np.concatenate(([0], np.cumsum(entry_counts, dtype=np.int64))),
+        'entry_course': np.fromiter((e[0] for e in entries), dtype=np.int64, count=len(entries)),
+        'entry_slot': np.fromiter((e[1] for e in entries), dtype=np.int64, count=len(entries))
+    }
+
+def to_shared(arrays):
+    """Copy ``arrays`` into one shared block; returns (block, layout)"""
+    layout, offset = {}, 0
+    for name in ARRAYS:
+        layout[name] = (offset, len(arrays[name]))
+        offset += arrays[name].nbytes
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 8))
+    for name in ARRAYS:
+        start, length = layout[name]
+        np.ndarray(length, dtype=np.int64, buffer=block.buf, offset=start)[:] = arrays[name]
+    return block, layout
+
+def attach(block, layout):
+    return {name: np.ndarray(length, dtype=np.int64, buffer=block.buf, offset=start)
+            for name, (start, length) in layout.items()}
+
+def iter_shard(arrays, start, stop):
+    """Rebuild visit arguments for students ``start``..``stop`` (array positions)"""
+    student = arrays['student'][start:stop].tolist()
+    pref_ptr = arrays['pref_ptr'][start:stop + 1].tolist()
+    entry_ptr = arrays['entry_ptr'][start:stop + 1].tolist()
+    priorities = arrays['pref_priority'][pref_ptr[0]:pref_ptr[-1]].tolist()
+    pref_courses = arrays['pref_course'][pref_ptr[0]:pref_ptr[-1]].tolist()
+    entry_courses = arrays['entry_course'][entry_ptr[0]:entry_ptr[-1]].tolist()
+    entry_slots = arrays['entry_slot'][entry_ptr[0]:entry_ptr[-1]].tolist()
+
+    p0, e0 = pref_ptr[0], entry_ptr[0]
+    for i, student_id in enumerate(student):
+        prefs = list(zip(pref_courses[pref_ptr[i] - p0:pref_ptr[i + 1] - p0],
+                         priorities[pref_ptr[i] - p0:pref_ptr[i + 1] - p0]))
+        courses = entry_courses[entry_ptr[i] - e0:entry_ptr[i + 1] - e0]
+        entries = list(zip(courses, entry_slots[entry_ptr[i] - e0:entry_ptr[i + 1] - e0]))
+        yield student_id, prefs, set(courses), entries
+
+# Per-worker state set up once by the pool initializer
+_worker = {}
+
+def _init_worker(block_name, layout, catalog):
+    from app.services.snapshot import ScheduleSnapshot
+    block = shared_memory.SharedMemory(name=block_name)
+    _worker['block'] = block
+    _worker['arrays'] = attach(block, layout)
+    _worker['snapshot'] = ScheduleSnapshot(catalog['semester'], {}, catalog['courses'],
+                                           catalog['timeslots'], {}, {}, catalog['durations'])
+
+def _run_shard(names, start, stop):
+    from analysis.reports import accumulate
+    return accumulate(_worker['snapshot'], names, iter_shard(_worker['arrays'], start, stop))
+
+def shard_bounds(count, shards):
+    step = -(-count // shards) if shards else count
+    return [(start, min(start + step, count)) for start in range(0, count, max(step, 1))]
+
+def run_sharded(snapshot, names, workers, shards_per_worker=4):
+    """Partial reports, one list per shard in student order"""
+    arrays = pack(snapshot)
+    block, layout = to_shared(arrays)
+    del arrays
+    catalog = {'semester': snapshot.semester, 'courses': snapshot.courses, 'timeslots': snapshot.timeslots,
+               'durations': snapshot.durations}
+    bounds = shard_bounds(len(snapshot.students), workers * shards_per_worker)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(block.name, layout, catalog)) as pool:
+            futures = [pool.submit(_run_shard, names, start, stop) for start, stop in bounds]
+            return [future.result() for future in futures]
+    finally:
+        block.close()
+        block.unlink()
@@ -0,0 +1,360 @@
+"""Schedule audit reports computed from a single ScheduleSnapshot.
+
+Every report is an accumulator: ``visit`` is called once per student during
+the shared pass over the snapshot, ``close`` once at the end of a pass, and
+``result`` returns a plain dict. Partial reports built over disjoint student
+shards combine with ``merge``, so the pass can be split across processes
+(see ``analysis.parallel``).
+"""
+from collections import Counter
+
+import numpy as np
+
+from app.services.overlap import meeting_end, overlapping_pairs
+
+DAY_NAMES = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+MIN_LOAD, MAX_LOAD = 3, 5
+EXAMPLES = 5
+
+def _rate(part, whole):
+    return round(part / whole * 100, 1) if whole else 0.0
+
+def _minutes(t):
+    return t.hour * 60 + t.minute
+
+class Report:
+    name = None
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def visit(self, student_id, prefs, scheduled, entries):
+        pass
+
+    def close(self):
+        pass
+
+    def merge(self, other):
+        raise NotImplementedError
+
+    def result(self):
+        raise NotImplementedError
+
+    def __getstate__(self):
+        # Partials travel back from shard workers without their snapshot
+        state = dict(self.__dict__)
+        state['snapshot'] = None
+        return state
+
+
+class SummaryReport(Report):
+    name = 'summary'
+
+    def __init__(self, snapshot):
+        super().__init__(snapshot)
+        self.load = Counter()
+        self.assignments = 0
+
+    def visit(self, student_id, prefs, scheduled, entries):
+        self.load[len(scheduled)] += 1
+        self.assignments += len(entries)
+
+    def merge(self, other):
+        self.load.update(other.load)
+        self.assignments += other.assignments
+
+    def result(self):
+        snapshot = self.snapshot
+        total = sum(self.load.values())
+        scheduled = total - self.load.get(0, 0)
+        return {
+            'semester': snapshot.semester,
+            'total_students': total,
+            'students_scheduled': scheduled,
+            'schedule_rate': _rate(scheduled, total),
+            'total_assignments': self.assignments,
+            'avg_courses_per_student': round(self.assignments / scheduled, 2) if scheduled else 0,
+            'total_courses': len(snapshot.courses),
+            'total_timeslots': len(snapshot.timeslots),
+            'course_load_distribution': {load: self.load[load] for load in sorted(self.load)}
+        }
+
+
+class SatisfactionReport(Report):
+    name = 'satisfaction'
+
+    def __init__(self, snapshot):
+        super().__init__(snapshot)
+        self.met = Counter()
+        self.total = Counter()
+        self.first_choice = 0
+        self.with_prefs = 0
+        self.categories = Counter(dict.fromkeys(['perfect', 'good', 'satisfactory', 'poor', 'unscheduled'], 0))
+
+    def visit(self, student_id, prefs, scheduled, entries):
+        for course_id, priority in prefs:
+            self.total[priority] += 1
+            if course_id in scheduled:
+                self.met[priority] += 1
+
+        if not scheduled:
+            self.categories['unscheduled'] += 1
+            return
+        if not prefs:
+            return
+        self.with_prefs += 1
+        if any(course_id in scheduled for course_id, priority in prefs if priority == 1):
+            self.first_choice += 1
+
+        rate = sum(1 for course_id, _ in prefs if course_id in scheduled) / len(prefs)
+        if rate >= 1.0:
+            self.categories['perfect'] += 1
+        elif rate >= 0.7:
+            self.categories['good'] += 1
+        elif rate >= 0.5:
+            self.categories['satisfactory'] += 1
+        else:
+            self.categories['poor'] += 1
+
+    def merge(self, other):
+        self.met.update(other.met)
+        self.total.update(other.total)
+        self.categories.update(other.categories)
+        self.first_choice += other.first_choice
+        self.with_prefs += other.with_prefs
+
+    def result(self):
+        met, total = sum(self.met.values()), sum(self.total.values())
+        return {
+            'by_priority': {
+                priority: {'satisfied': self.met[priority], 'total': self.total[priority],
+                           'rate': _rate(self.met[priority], self.total[priority])}
+                for priority in sorted(self.total)
+            },
+            'overall': {'satisfied': met, 'total': total, 'rate': _rate(met, total)},
+            'first_choice': {'students': self.first_choice, 'rate': _rate(self.first_choice, self.with_prefs)},
+            'outcome_categories': dict(self.categories)
+        }
+
+
+class ConflictReport(Report):
+    """Hard-constraint audit: time overlaps, course load bounds and capacity"""
+    name = 'conflicts'
+
+    def __init__(self, snapshot):
+        super().__init__(snapshot)
+        self.rows = []
+        self.scheduled = 0
+        self.load_violations = 0
+        self.enrolled = Counter()
+        self.conflicted = 0
+        self.pairs = 0
+        self.examples = []
+
+    def visit(self, student_id, prefs, scheduled, entries):
+        if not entries:
+            return
+        self.scheduled += 1
+        if not MIN_LOAD <= len(scheduled) <= MAX_LOAD:
+            self.load_violations += 1
+        for course_id, timeslot_id in entries:
+            self.enrolled[course_id] += 1
+            self.rows.append((student_id, course_id, timeslot_id))
+
+    def close(self):
+        """Resolve overlaps for the students visited so far, then drop their rows"""
+        rows, self.rows = self.rows, []
+        if not rows:
+            return
+        timeslots = self.snapshot.timeslots
+        count = len(rows)
+        student = np.fromiter((r[0] for r in rows), dtype=np.int64, count=count)
+        day = np.fromiter((timeslots[r[2]][0] for r in rows), dtype=np.int64, count=count)
+        start = np.fromiter((_minutes(timeslots[r[2]][1]) for r in rows), dtype=np.int64, count=count)
+        end = np.fromiter((_minutes(timeslots[r[2]][2]) for r in rows), dtype=np.int64, count=count)
+        duration = np.fromiter((self.snapshot.durations.get(r[1], 0) for r in rows), dtype=np.int64, count=count)
+        end = meeting_end(start, end, duration)
+        first, second = overlapping_pairs(student, day, start, end)
+
+        self.conflicted += len(set(student[first].tolist()))
+        self.pairs += len(first)
+        for i, j in zip(first[:EXAMPLES].tolist(), second[:EXAMPLES].tolist()):
+            self.examples.append((rows[i][0], rows[i][1], rows[j][1], rows[i][2]))
+        self.examples = sorted(self.examples)[:EXAMPLES]
+
+    def merge(self, other):
+        self.scheduled += other.scheduled
+        self.load_violations += other.load_violations
+        self.enrolled.update(other.enrolled)
+        self.conflicted += other.conflicted
+        self.pairs += other.pairs
+        self.examples = sorted(self.examples + other.examples)[:EXAMPLES]
+
+    def result(self):
+        snapshot = self.snapshot
+        examples = []
+        for student_id, course_a, course_b, timeslot_id in self.examples:
+            day, start, _, _ = snapshot.timeslots[timeslot_id]
+            examples.append({
+                'student': snapshot.students.get(student_id, student_id),
+                'courses': [snapshot.courses[course_a][1], snapshot.courses[course_b][1]],
+                'time': f'{DAY_NAMES[day]} {start.strftime("%H:%M")}'
+            })
+        return {
+            'students_with_conflicts': self.conflicted,
+            'conflicting_pairs': self.pairs,
+            'conflict_rate': _rate(self.conflicted, self.scheduled),
+            'load_violations': self.load_violations,
+            'capacity_violations': sum(
+                1 for course_id, course in snapshot.courses.items() if self.enrolled[course_id] > course[2]
+            ),
+            'examples': examples
+        }
+
+
+class UtilizationReport(Report):
+    name = 'utilization'
+
+    def __init__(self, snapshot):
+        super().__init__(snapshot)
+        self.demand = Counter()
+        self.enrolled = Counter()
+        self.slot_usage = Counter()
+
+    def visit(self, student_id, prefs, scheduled, entries):
+        for course_id, _ in prefs:
+            self.demand[course_id] += 1
+        for course_id, timeslot_id in entries:
+            self.enrolled[course_id] += 1
+            self.slot_usage[timeslot_id] += 1
+
+    def merge(self, other):
+        self.demand.update(other.demand)
+        self.enrolled.update(other.enrolled)
+        self.slot_usage.update(other.slot_usage)
+
+    def result(self):
+        courses = {}
+        seats = used = 0
+        for course_id, (code, name, capacity) in sorted(self.snapshot.courses.items()):
+            enrolled = self.enrolled[course_id]
+            seats += capacity
+            used += enrolled
+            courses[code] = {
+                'name': name,
+                'enrolled': enrolled,
+                'capacity': capacity,
+                'demand': self.demand[course_id],
+                'utilization': _rate(enrolled, capacity),
+                'demand_ratio': round(self.demand[course_id] / capacity, 2) if capacity else 0
+            }
+
+        by_time = Counter()
+        for timeslot_id, count in self.slot_usage.items():
+            day, start, _, _ = self.snapshot.timeslots[timeslot_id]
+            by_time[f'{DAY_NAMES[day]} {start.strftime("%H:%M")}'] += count
+        return {
+            'seats': {'used': used, 'total': seats, 'rate': _rate(used, seats)},
+            'courses': courses,
+            'busiest_timeslots': dict(sorted(by_time.items(), key=lambda item: item[1], reverse=True)[:10])
+        }
+
+
+class OptimalityReport(Report):
+    """Evidence that assignments trade priorities off rather than filling greedily"""
+    name = 'optimality'
+
+    def __init__(self, snapshot):
+        super().__init__(snapshot)
+        self.patterns = Counter(dict.fromkeys(['perfect_sequence', 'with_gaps', 'out_of_order', 'trade_offs',
+                                               'first_n_exactly', 'no_first_choice', 'only_low_priority'], 0))
+        self.skipped = Counter()
+        self.unpreferred = 0
+
+    def visit(self, student_id, prefs, scheduled, entries):
+        if not scheduled:
+            return
+        preferred = {course_id for course_id, _ in prefs}
+        self.unpreferred += len(scheduled - preferred)
+        got = [priority for course_id, priority in prefs if course_id in scheduled]
+        if not got:
+            return
+
+        if got == list(range(1, len(got) + 1)):
+            self.patterns['perfect_sequence'] += 1
+        elif got[0] != 1:
+            self.patterns['out_of_order'] += 1
+        else:
+            self.patterns['with_gaps'] += 1
+        if min(got) >= 4:
+            self.patterns['only_low_priority'] += 1
+        if any(priority == 1 and course_id not in scheduled for course_id, priority in prefs):
+            self.patterns['no_first_choice'] += 1
+        if len(prefs) >= len(scheduled) and {c for c, _ in prefs[:len(scheduled)]} == scheduled:
+            self.patterns['first_n_exactly'] += 1
+
+        # A trade-off: some taken course ranks below a preference that was skipped
+        worst_taken = max(got)
+        skipped = [priority for course_id, priority in prefs
+                   if course_id not in scheduled and priority < worst_taken]
+        if skipped:
+            self.patterns['trade_offs'] += 1
+            self.skipped[min(skipped)] += 1
+
+    def merge(self, other):
+        self.patterns.update(other.patterns)
+        self.skipped.update(other.skipped)
+        self.unpreferred += other.unpreferred
+
+    def result(self):
+        from app.services.run_history import RunHistoryService
+        run = RunHistoryService().latest(semester=self.snapshot.semester)
+        solver = None
+        if run:
+            bound = run.objective_trajectory[-1][2] if run.objective_trajectory else None
+            solver = {
+                'engine': run.engine,
+                'status': run.status,
+                'objective_value': run.objective_value,
+                'best_bound': bound,
+                'gap': round(abs(bound - run.objective_value) / max(1.0, abs(run.objective_value)), 4)
+                       if bound is not None and run.objective_value is not None else None,
+                'solve_time': run.solve_time
+            }
+        return {
+            'patterns': dict(self.patterns),
+            'skipped_priorities': {priority: self.skipped[priority] for priority in sorted(self.skipped)},
+            'unpreferred_assignments': self.unpreferred,
+            'solver': solver
+        }
+
+
+REPORTS = {cls.name: cls for cls in (SummaryReport, SatisfactionReport, ConflictReport,
+                                      UtilizationReport, OptimalityReport)}
+
+def accumulate(snapshot, names, students):
+    """Visit ``students`` (an iterable of visit arguments) with fresh reports"""
+    reports = [REPORTS[name](snapshot) for name in names]
+    for student in students:
+        for report in reports:
+            report.visit(*student)
+    for report in reports:
+        report.close()
+    return reports
+
+def run_reports(snapshot, names, workers=1):
+    """Compute the named reports in a single pass over the snapshot.
+
+    With ``workers`` > 1 the pass is sharded across a process pool and the
+    partial reports are merged here.
+    """
+    if workers > 1:
+        from analysis.parallel import run_sharded
+        partials = run_sharded(snapshot, names, workers)
+        reports = [REPORTS[name](snapshot) for name in names]
+        for shard in partials:
+            for report, partial in zip(reports, shard):
+                report.merge(partial)
+    else:
+        reports = accumulate(snapshot, names, snapshot.iter_students())
+    return {report.name: report.result() for report in reports}
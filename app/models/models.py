@@ -16,14 +16,32 @@ class Course(db.Model):
     name = db.Column(db.String(100), nullable=False)
     capacity = db.Column(db.Integer, nullable=False)
     duration_minutes = db.Column(db.Integer, default=90)
-    instructor = db.Column(db.String(100))
+    instructor = db.Column(db.String(100))  # display name; placement uses instructor_id
+    instructor_id = db.Column(db.Integer, db.ForeignKey('instructor.id'), index=True)
     
 class TimeSlot(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     day = db.Column(db.Integer, nullable=False)  # 0-6 (Mon-Sun)
     start_time = db.Column(db.Time, nullable=False)
     end_time = db.Column(db.Time, nullable=False)
-    room = db.Column(db.String(50), nullable=False)
+    room = db.Column(db.String(50))  # legacy label; sections carry their Room
+
+class Room(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    capacity = db.Column(db.Integer, nullable=False)
+
+class Instructor(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+
+class InstructorUnavailability(db.Model):
+    """A timeslot the instructor cannot teach in"""
+    __table_args__ = (db.UniqueConstraint('instructor_id', 'timeslot_id', name='uq_instructor_unavailability'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    instructor_id = db.Column(db.Integer, db.ForeignKey('instructor.id'), nullable=False, index=True)
+    timeslot_id = db.Column(db.Integer, db.ForeignKey('time_slot.id'), nullable=False)
 
 class CoursePreference(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -31,13 +49,136 @@ class CoursePreference(db.Model):
     course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
     priority = db.Column(db.Integer, default=1)  # 1-5, 1 being highest
 
+class CoursePrerequisite(db.Model):
+    """Edge of the prerequisite DAG: ``course_id`` requires ``prerequisite_id``.
+
+    Taking a course requires each prerequisite to be completed already or
+    taken in the same semester. PrerequisiteGraph keeps the edges acyclic.
+    """
+    __table_args__ = (db.UniqueConstraint('course_id', 'prerequisite_id', name='uq_course_prerequisite'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False, index=True)
+    prerequisite_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False, index=True)
+
+class CourseCompletion(db.Model):
+    """A course the student has already passed; it is not offered to them again"""
+    __table_args__ = (db.UniqueConstraint('student_id', 'course_id', name='uq_course_completion'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False, index=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
+
+class Section(db.Model):
+    """A placed section of a course in one semester: its meeting time, room and seats"""
+    __table_args__ = (
+        db.UniqueConstraint('semester', 'course_id', 'number', name='uq_section_number'),
+        db.Index('ix_section_semester_timeslot', 'semester', 'timeslot_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    semester = db.Column(db.String(20), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
+    number = db.Column(db.Integer, nullable=False)  # 1-based within the course
+    timeslot_id = db.Column(db.Integer, db.ForeignKey('time_slot.id'), nullable=False)
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id'))
+    instructor_id = db.Column(db.Integer, db.ForeignKey('instructor.id'))
+    capacity = db.Column(db.Integer, nullable=False)
+    # Seats taken; changed only by conditional updates (see enrollment.py)
+    enrolled = db.Column(db.Integer, nullable=False, default=0)
+    
+    room = db.relationship('Room')
+    timeslot = db.relationship('TimeSlot')
+
 class Schedule(db.Model):
+    # Per-student lookups within a semester (timetables, conflict self-join)
+    __table_args__ = (db.Index('ix_schedule_semester_student', 'semester', 'student_id'),)
+    
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
     course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
     timeslot_id = db.Column(db.Integer, db.ForeignKey('time_slot.id'), nullable=False)
+    section_id = db.Column(db.Integer, db.ForeignKey('section.id'), index=True)
     semester = db.Column(db.String(20), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     course = db.relationship('Course', backref='schedules')
     timeslot = db.relationship('TimeSlot', backref='schedules')
+    section = db.relationship('Section')
+
+class ScheduleChange(db.Model):
+    """One live write to a semester's schedule between optimization runs: an
+    enrollment, or a batch of drops with its promotions. The newest id is the
+    semester's live version (see enrollment.live_version)."""
+    __table_args__ = (db.Index('ix_schedule_change_semester', 'semester', 'id'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    semester = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class WaitlistEntry(db.Model):
+    """A student waiting for a seat in a course they preferred but did not get.
+
+    Each course's queue is served by preference priority, then by the time
+    the student joined.
+    """
+    __table_args__ = (
+        db.UniqueConstraint('semester', 'student_id', 'course_id', name='uq_waitlist_student_course'),
+        # Queue order within a course: the promotion engine reads its head
+        db.Index('ix_waitlist_queue', 'semester', 'course_id', 'priority', 'created_at', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    semester = db.Column(db.String(20), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
+    priority = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class EnrollmentRequest(db.Model):
+    """Outcome of one real-time enrollment call, stored under its idempotency
+    key so a retried call gets the same answer instead of a second seat"""
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(100), unique=True, nullable=False)
+    semester = db.Column(db.String(20), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
+    section_id = db.Column(db.Integer, db.ForeignKey('section.id'), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    schedule_id = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class StudentTimetable(db.Model):
+    """Denormalized per-student timetable, rebuilt after each optimization.
+
+    ``entries`` holds the serialized JSON payload served by the schedule
+    routes, so a read is a single primary-key lookup instead of a join.
+    """
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), primary_key=True)
+    entries = db.Column(db.Text, nullable=False, default='[]')
+    course_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class OptimizationRun(db.Model):
+    """One optimize_schedules run, kept for history and trend queries"""
+    __table_args__ = (
+        db.Index('ix_optimization_run_semester_started', 'semester', 'started_at'),
+        db.Index('ix_optimization_run_engine_started', 'engine', 'started_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    semester = db.Column(db.String(20), nullable=False)
+    engine = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    finished_at = db.Column(db.DateTime)
+    num_students = db.Column(db.Integer, index=True)
+    num_courses = db.Column(db.Integer)
+    num_sections = db.Column(db.Integer)
+    assignments = db.Column(db.Integer)
+    objective_value = db.Column(db.Float)
+    solve_time = db.Column(db.Float)
+    wall_time = db.Column(db.Float)
+    parameters = db.Column(db.JSON)
+    stage_timings = db.Column(db.JSON)
+    counters = db.Column(db.JSON)
+    objective_trajectory = db.Column(db.JSON)
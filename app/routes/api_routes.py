@@ -1,12 +1,20 @@
-from flask import Blueprint, jsonify, request
-from app.models.models import Student, Course, Schedule, CoursePreference
+from flask import Blueprint, jsonify, request, current_app, stream_with_context
+from app.models.models import Student, Course, Schedule, CoursePreference, OptimizationRun
 from app.services.scheduler_service import SchedulerService
+from app.services.run_history import RunHistoryService
+from app.services.whatif import WhatIfService
+from app.services.waitlist import WaitlistService
+from app.services.enrollment import EnrollmentService, UnknownEntity, IdempotencyKeyReused, ENROLLED
+from app.utils.replica import replica_route, stream_from_replica
+from app.services.reads import availability, availability_payload
+from app.services.export_service import ExportService, TABLES, EXTENSIONS, MIMETYPES, MAX_BATCH_SIZE, default_format
 from app import db
 from datetime import datetime
 
 bp = Blueprint('api', __name__, url_prefix='/api/v1')
 
 @bp.route('/students', methods=['GET'])
+@replica_route
 def get_students():
     """List all students with pagination"""
     page = request.args.get('page', 1, type=int)
@@ -28,6 +36,7 @@ def get_students():
     })
 
 @bp.route('/courses', methods=['GET'])
+@replica_route
 def get_courses():
     """List all courses with enrollment stats"""
     courses = Course.query.all()
@@ -50,19 +59,185 @@ def get_courses():
     
     return jsonify({'courses': result})
 
+@bp.route('/courses/availability', methods=['GET'])
+def course_availability():
+    """Seats left in each published section, from the seat counters"""
+    semester = request.args.get('semester', 'Spring2024')
+    rows = db.session.execute(availability(semester, request.args.get('course_id', type=int))).all()
+    return jsonify(availability_payload(semester, rows))
+
 @bp.route('/optimization/status', methods=['GET'])
+@replica_route
 def optimization_status():
     """Get last optimization run status"""
-    scheduler = SchedulerService()
+    semester = request.args.get('semester', 'Spring2024')
+    last_run = RunHistoryService().latest(semester=semester)
     
     return jsonify({
-        'last_run': scheduler.solution_stats if hasattr(scheduler, 'solution_stats') else None,
-        'current_semester': 'Spring2024',
+        'last_run': RunHistoryService.serialize(last_run) if last_run else None,
+        'current_semester': semester,
         'total_students': Student.query.count(),
-        'total_schedules': Schedule.query.filter_by(semester='Spring2024').count()
+        'total_schedules': Schedule.query.filter_by(semester=semester).count()
+    })
+
+def _parse_since():
+    since = request.args.get('since')
+    return datetime.fromisoformat(since) if since else None
+
+@bp.route('/optimization/runs', methods=['GET'])
+@replica_route
+def optimization_runs():
+    """Optimization run history, most recent first"""
+    try:
+        since = _parse_since()
+    except ValueError:
+        return jsonify({'error': 'since must be an ISO 8601 timestamp'}), 400
+    
+    limit = min(request.args.get('limit', 50, type=int), 500)
+    runs = RunHistoryService().history(
+        semester=request.args.get('semester'),
+        engine=request.args.get('engine'),
+        status=request.args.get('status'),
+        since=since,
+        limit=limit,
+        before_id=request.args.get('before_id', type=int)
+    )
+    
+    return jsonify({
+        'runs': [RunHistoryService.serialize(run) for run in runs],
+        'next_before_id': runs[-1].id if len(runs) == limit else None
     })
 
+@bp.route('/optimization/runs/<int:run_id>', methods=['GET'])
+@replica_route
+def optimization_run(run_id):
+    """One run including its objective trajectory"""
+    run = db.get_or_404(OptimizationRun, run_id)
+    return jsonify(RunHistoryService.serialize(run, include_trajectory=True))
+
+@bp.route('/optimization/trends', methods=['GET'])
+@replica_route
+def optimization_trends():
+    """Metric over time and per cohort size, e.g. ?metric=stage.solve"""
+    try:
+        since = _parse_since()
+        trend = RunHistoryService().trend(
+            metric=request.args.get('metric', 'solve_time'),
+            semester=request.args.get('semester'),
+            engine=request.args.get('engine'),
+            since=since
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(trend)
+
+@bp.route('/whatif', methods=['POST'])
+def whatif():
+    """Re-solve the published semester with section changes; nothing is saved
+    
+    Body: {"semester": ..., "changes": [...], "max_time_in_seconds": 5}; see
+    app/services/whatif.py for the change types.
+    """
+    body = request.get_json(silent=True) or {}
+    changes = body.get('changes')
+    if not isinstance(changes, list) or not changes:
+        return jsonify({'error': 'changes must be a non-empty list'}), 400
+    
+    try:
+        max_time = min(float(body.get('max_time_in_seconds', 5)), current_app.config.get('WHATIF_MAX_SECONDS', 30))
+        result = WhatIfService(max_time_in_seconds=max_time).evaluate(body.get('semester', 'Spring2024'), changes)
+    except (ValueError, TypeError) as e:  # ScenarioError and malformed numbers
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result)
+
+@bp.route('/enrollments', methods=['POST'])
+def enroll():
+    """Take a seat in a published section
+    
+    Body: {"semester": ..., "student_id": ..., "section_id": ...}. An
+    Idempotency-Key header makes retries return the first answer. 201 when
+    enrolled, 409 with the reason (full, time_conflict, already_enrolled,
+    already_completed, missing_prerequisite, load_limit) otherwise.
+    """
+    body = request.get_json(silent=True) or {}
+    try:
+        student_id, section_id = int(body['student_id']), int(body['section_id'])
+    except (TypeError, KeyError, ValueError):
+        return jsonify({'error': 'student_id and section_id are required'}), 400
+    
+    try:
+        result = EnrollmentService().enroll(body.get('semester', 'Spring2024'), student_id, section_id,
+                                            key=request.headers.get('Idempotency-Key'))
+    except UnknownEntity as e:
+        return jsonify({'error': str(e)}), 404
+    except IdempotencyKeyReused as e:
+        return jsonify({'error': str(e)}), 422
+    
+    response = jsonify(result._asdict())
+    response.status_code = 201 if result.status == ENROLLED else 409
+    if result.replayed:
+        response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+@bp.route('/drops', methods=['POST'])
+def drop_courses():
+    """Drop enrollments and promote waitlisted students into the freed seats
+    
+    Body: {"semester": ..., "drops": [{"student_id": ..., "course_id": ...}, ...]}
+    """
+    body = request.get_json(silent=True) or {}
+    drops = body.get('drops')
+    try:
+        drops = [(int(d['student_id']), int(d['course_id'])) for d in drops]
+    except (TypeError, KeyError, ValueError):
+        return jsonify({'error': 'drops must be a list of {student_id, course_id}'}), 400
+    
+    result = WaitlistService().drop(body.get('semester', 'Spring2024'), drops)
+    return jsonify({
+        'dropped': [{'student_id': s, 'course_id': c} for s, c in result['dropped']],
+        'not_enrolled': [{'student_id': s, 'course_id': c} for s, c in result['not_enrolled']],
+        'promoted': [p._asdict() for p in result['promoted']]
+    })
+
+@bp.route('/waitlists/<int:course_id>', methods=['GET'])
+def course_waitlist(course_id):
+    """Head of a course's waitlist in promotion order"""
+    semester = request.args.get('semester', 'Spring2024')
+    limit = min(request.args.get('limit', 50, type=int), 500)
+    entries = WaitlistService().queue(semester, course_id, limit)
+    return jsonify({
+        'course_id': course_id,
+        'semester': semester,
+        'waitlist': [{'position': i, 'student_id': e.student_id, 'priority': e.priority,
+                      'joined': e.created_at.isoformat()} for i, e in enumerate(entries, start=1)]
+    })
+
+@bp.route('/exports/<semester>/<table>', methods=['GET'])
+def export_table(semester, table):
+    """Stream one table as Parquet, Arrow IPC or CSV (?format=); ?batch_size=
+    is capped to MAX_BATCH_SIZE rows"""
+    fmt = request.args.get('format', default_format())
+    if table not in TABLES:
+        return jsonify({'error': f'Unknown table, expected one of {", ".join(TABLES)}'}), 404
+    try:
+        ExportService.check_format(fmt)
+    except (ValueError, RuntimeError) as e:
+        return jsonify({'error': str(e)}), 400
+    batch_size = request.args.get('batch_size', type=int)
+    if 'batch_size' in request.args and (batch_size is None or batch_size <= 0):
+        return jsonify({'error': 'batch_size must be a positive integer'}), 400
+    
+    batch_size = min(batch_size, MAX_BATCH_SIZE) if batch_size else None
+    chunks = ExportService(batch_size=batch_size).stream(table, fmt, semester)
+    return current_app.response_class(
+        stream_with_context(stream_from_replica(chunks, semester)),
+        mimetype=MIMETYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename={semester}-{table}.{EXTENSIONS[fmt]}'}
+    )
+
 @bp.route('/reports/summary', methods=['GET'])
+@replica_route
 def summary_report():
     """Generate executive summary"""
     metrics = SchedulerService().calculate_metrics('Spring2024')
@@ -1,6 +1,8 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from app.services.scheduler_service import SchedulerService
-from app.models.models import Schedule, Student, Course
+from app.services.timetable_service import TimetableService
+from app.utils.replica import replica_route
+from app.services.reads import schedule_rows, timetable_entries, parse_ids, batch_body, dumps
 from app import db
 
 bp = Blueprint('schedules', __name__, url_prefix='/api/schedules')
@@ -25,22 +27,32 @@ def optimize_schedules():
 
 @bp.route('/student/<int:student_id>', methods=['GET'])
 def get_student_schedule(student_id):
-    schedules = Schedule.query.filter_by(student_id=student_id).all()
+    # Serve the materialized timetable when available; fall back to the join
+    if current_app.config.get('TIMETABLE_READ_MODEL'):
+        entries = TimetableService().get(student_id)
+        if entries is not None:
+            return current_app.response_class(entries, status=200, mimetype='application/json')
     
-    result = []
-    for schedule in schedules:
-        result.append({
-            'course': schedule.course.name,
-            'course_code': schedule.course.course_code,
-            'day': schedule.timeslot.day,
-            'start_time': str(schedule.timeslot.start_time),
-            'end_time': str(schedule.timeslot.end_time),
-            'room': schedule.timeslot.room
-        })
+    entries = timetable_entries(db.session.execute(schedule_rows([student_id])))
+    return jsonify(entries.get(student_id, [])), 200
+
+@bp.route('/students', methods=['GET'])
+def get_student_schedules():
+    """Timetables of many students: ?ids=1,2,3"""
+    try:
+        student_ids = parse_ids(request.args.get('ids'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify(result), 200
+    blobs = TimetableService().get_many(student_ids) if current_app.config.get('TIMETABLE_READ_MODEL') else {}
+    missing = student_ids - blobs.keys()
+    if missing:
+        entries = timetable_entries(db.session.execute(schedule_rows(missing)))
+        blobs.update({student_id: dumps(entries.get(student_id, [])) for student_id in missing})
+    return current_app.response_class(batch_body(student_ids, blobs), status=200, mimetype='application/json')
 
 @bp.route('/metrics/<semester>', methods=['GET'])
+@replica_route
 def get_metrics(semester):
     scheduler = SchedulerService()
     metrics = scheduler.calculate_metrics(semester)
@@ -0,0 +1,180 @@
+"""Student-type aggregation for the CP-SAT model.
+
+Students with the same signature (ranked preferences and eligibility) are
+interchangeable in the model, so they can share one integer variable per
+section counting how many of them take it. ``student_groups`` finds those
+groups and ``split_group`` turns a group's per-section counts back into
+one schedule per member.
+
+Splitting is an edge coloring problem: every seat taken is an edge between
+its course and its meeting time, and each member is a color (at most one
+section per course and per time). Meeting times are the connected
+components of overlapping sections (see overlap.py). A bipartite multigraph
+whose degrees are bounded by the group size can always be colored with
+that many colors, and the color classes can be balanced to within one edge
+of each other, so the load bounds carry over as well. Only two things can
+make a split impossible: prerequisite pairs, which are repaired by swapping
+seats between members where possible, and a component that is not a clique
+holding more seats than members. Either is reported so the caller can
+re-solve the group per student.
+"""
+from collections import Counter
+
+def student_groups(problem, eligibility=None):
+    """Lists of student indexes with identical preferences (and eligibility),
+    ordered by their first member
+
+    ``eligibility`` is an optional per-student hashable that must also match.
+    """
+    groups = {}
+    ptr = problem.pref_ptr
+    for i in range(problem.num_students):
+        start, end = ptr[i], ptr[i + 1]
+        key = (problem.pref_course[start:end].tobytes(), problem.pref_priority[start:end].tobytes(),
+               eligibility[i] if eligibility is not None else None)
+        groups.setdefault(key, []).append(i)
+    return list(groups.values())
+
+class _Coloring:
+    """Proper edge coloring of a bipartite multigraph with ``colors`` colors"""
+
+    def __init__(self, colors):
+        self.colors = colors
+        self.ends = []      # edge -> (u, v)
+        self.color = []    # edge -> color
+        self.at = {}        # node -> {color: edge}
+        self.load = [0] * colors
+
+    def _free(self, node):
+        used = self.at.get(node, {})
+        return next(c for c in range(self.colors) if c not in used)
+
+    def _set(self, edge, color):
+        self.color[edge] = color
+        for node in self.ends[edge]:
+            self.at.setdefault(node, {})[color] = edge
+        self.load[color] += 1
+
+    def _unset(self, edge):
+        color = self.color[edge]
+        for node in self.ends[edge]:
+            del self.at[node][color]
+        self.load[color] -= 1
+
+    def _path(self, start, a, b):
+        """Edges of the path from ``start`` alternating colors a, b, a, ..."""
+        path, node, color = [], start, a
+        while color in self.at.get(node, {}):
+            edge = self.at[node][color]
+            path.append(edge)
+            u, v = self.ends[edge]
+            node = v if node == u else u
+            color = b if color == a else a
+        return path
+
+    def flip(self, start, a, b):
+        """Swap colors a and b along the alternating path leaving ``start``"""
+        path = self._path(start, a, b)
+        colors = [self.color[edge] for edge in path]
+        for edge in path:
+            self._unset(edge)
+        for edge, color in zip(path, colors):
+            self._set(edge, b if color == a else a)
+        return path
+
+    def add(self, u, v):
+        edge = len(self.ends)
+        self.ends.append((u, v))
+        self.color.append(None)
+        a, b = self._free(u), self._free(v)
+        if a in self.at.get(v, {}):
+            # Kempe chain: free ``a`` at v; the path cannot reach u
+            self.flip(v, a, b)
+        self._set(edge, a)
+
+    def balance(self):
+        """Even out color class sizes to within one edge"""
+        while True:
+            big = max(range(self.colors), key=self.load.__getitem__)
+            small = min(range(self.colors), key=self.load.__getitem__)
+            if self.load[big] - self.load[small] <= 1:
+                return
+            # Some big/small path starts and ends with a big edge; flip it
+            for node, edges in list(self.at.items()):
+                if big in edges and small not in edges and len(self._path(node, big, small)) % 2 == 1:
+                    self.flip(node, big, small)
+                    break
+            else:
+                return
+
+def split_group(counts, size, section_course, section_time, requires=(), min_load=3, max_load=5):
+    """Split per-section ``counts`` of a group into ``size`` member schedules
+
+    counts          {section index: members taking it}
+    section_course  course index of every section
+    section_time    conflict group of every section (overlap component, see
+                    OverlapIndex.components)
+    requires        (course, prerequisite course) pairs: a member taking the
+                    course must also take the prerequisite
+
+    Returns one list of section indexes per member, or None when a conflict
+    group holds more seats than members or the prerequisite pairs cannot be
+    satisfied by swapping seats.
+    """
+    seats = Counter()
+    for sec, count in counts.items():
+        seats[section_time[sec]] += count
+    if max(seats.values(), default=0) > size:
+        return None
+
+    coloring = _Coloring(size)
+    sections = []
+    for sec, count in sorted(counts.items()):
+        for _ in range(count):
+            sections.append(sec)
+            coloring.add(('course', section_course[sec]), ('time', section_time[sec]))
+    coloring.balance()
+
+    def courses(member):
+        return {node[1] for node in coloring.at if node[0] == 'course' and member in coloring.at[node]}
+
+    def valid(member):
+        taken = courses(member)
+        return (min_load <= coloring.load[member] <= max_load
+                and all(prereq in taken for course, prereq in requires if course in taken))
+
+    for member in range(size):
+        if valid(member):
+            continue
+        # Move the missing prerequisite in, or the dependent course out, by
+        # flipping a path shared with another member; keep it only if both
+        # members end up valid
+        taken = courses(member)
+        repaired = False
+        for course, prereq in requires:
+            if course not in taken or prereq in taken:
+                continue
+            for other in range(size):
+                if other == member:
+                    continue
+                for node, start_color in ((('course', prereq), other), (('course', course), member)):
+                    end_color = member if start_color == other else other
+                    edges = coloring.at.get(node, {})
+                    if start_color not in edges or end_color in edges:
+                        continue
+                    coloring.flip(node, start_color, end_color)
+                    if valid(member) and valid(other):
+                        repaired = True
+                        break
+                    coloring.flip(node, end_color, start_color)
+                if repaired:
+                    break
+            if repaired:
+                break
+        if not repaired:
+            return None
+
+    members = [[] for _ in range(size)]
+    for edge, sec in enumerate(sections):
+        members[coloring.color[edge]].append(sec)
+    return [sorted(secs) for secs in members]
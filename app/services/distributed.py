@@ -0,0 +1,589 @@
+"""Sharded optimization through a work queue.
+
+The coordinator snapshots the semester into a Problem, splits the students
+into shards (contiguous blocks, or groups of students whose preferences fall
+in the same course community), divides every section's seats between the
+shards and writes each shard as a problem file. Workers claim shards from
+the queue, solve them with SchedulerService.solve_problem and write their
+assignments back; the coordinator merges and saves them.
+
+Shards never share a student and never share a seat, so the merged schedule
+satisfies every capacity, load and time-conflict constraint.
+
+Jobs go through a broker and the shard files through a directory that the
+coordinator and every worker mount. RedisShardQueue keeps the jobs in Redis,
+so workers on any number of machines can share it; the directory must then
+be shared storage (NFS, a ReadWriteMany volume). ShardQueue keeps them in a
+SQLite file inside the directory instead, for one host and for tests:
+SQLite's WAL mode needs shared memory between the processes, and its file
+locks are not reliable on network filesystems. ``open_queue`` picks the
+backend from the broker URL.
+"""
+from contextlib import closing
+from datetime import datetime
+from multiprocessing import get_context
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+
+import numpy as np
+import redis
+
+from app.services.problem import Problem, ARRAYS
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('students', 'communities')
+
+class ShardQueue:
+    """SQLite-backed job queue; safe for several processes on one host only"""
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS shard_job (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT NOT NULL,
+            shard INTEGER NOT NULL,
+            problem_path TEXT NOT NULL,
+            params TEXT NOT NULL DEFAULT '{}',
+            status TEXT NOT NULL DEFAULT 'pending',
+            worker TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            result_path TEXT,
+            result TEXT,
+            error TEXT,
+            submitted_at REAL NOT NULL,
+            claimed_at REAL,
+            finished_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS ix_shard_job_status ON shard_job (status, id);
+        CREATE INDEX IF NOT EXISTS ix_shard_job_run ON shard_job (run_id);
+    '''
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, 'queue.db')
+        with closing(self._connect()) as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def submit(self, run_id, shard, problem_path, params=None):
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                'INSERT INTO shard_job (run_id, shard, problem_path, params, submitted_at) VALUES (?, ?, ?, ?, ?)',
+                (run_id, shard, problem_path, json.dumps(params or {}), time.time())
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker):
+        """Atomically take the oldest pending job, or return None"""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                "SELECT * FROM shard_job WHERE status = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                row = dict(row, status='running', worker=worker, claimed_at=time.time(), attempts=row['attempts'] + 1)
+                conn.execute(
+                    "UPDATE shard_job SET status = ?, worker = ?, claimed_at = ?, attempts = ? WHERE id = ?",
+                    (row['status'], worker, row['claimed_at'], row['attempts'], row['id'])
+                )
+            conn.execute('COMMIT')
+            return row
+        finally:
+            conn.close()
+
+    def complete(self, job_id, result_path, result):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE shard_job SET status = 'done', result_path = ?, result = ?, finished_at = ? WHERE id = ?",
+                (result_path, json.dumps(result), time.time(), job_id)
+            )
+
+    def fail(self, job_id, error):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE shard_job SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                (error, time.time(), job_id)
+            )
+
+    def requeue_stale(self, timeout, max_attempts=3):
+        """Hand jobs whose worker went quiet for ``timeout`` seconds to another worker"""
+        with closing(self._connect()) as conn:
+            cutoff = time.time() - timeout
+            conn.execute(
+                "UPDATE shard_job SET status = 'failed', error = 'worker lost too many times', finished_at = ? "
+                "WHERE status = 'running' AND claimed_at < ? AND attempts >= ?", (time.time(), cutoff, max_attempts)
+            )
+            return conn.execute(
+                "UPDATE shard_job SET status = 'pending', worker = NULL "
+                "WHERE status = 'running' AND claimed_at < ?", (cutoff,)
+            ).rowcount
+
+    def jobs(self, run_id):
+        with closing(self._connect()) as conn:
+            return [dict(row) for row in conn.execute(
+                'SELECT * FROM shard_job WHERE run_id = ? ORDER BY shard', (run_id,)
+            )]
+
+
+class RedisShardQueue:
+    """Redis-backed job queue with the ShardQueue interface; safe across hosts.
+
+    Every job is a hash; pending job ids wait in a list and running ones in
+    a sorted set scored by claim time. Claims and requeues run as Lua
+    scripts, so two workers never take the same job.
+    """
+
+    FIELDS = {'id': int, 'shard': int, 'attempts': int,
+              'submitted_at': float, 'claimed_at': float, 'finished_at': float}
+
+    CLAIM = """
+        while true do
+            local id = redis.call('LPOP', KEYS[1])
+            if not id then return false end
+            local job = KEYS[3] .. id
+            -- A job finished after it was requeued stays finished
+            if redis.call('HGET', job, 'status') == 'pending' then
+                redis.call('HSET', job, 'status', 'running', 'worker', ARGV[1], 'claimed_at', ARGV[2])
+                redis.call('HINCRBY', job, 'attempts', 1)
+                redis.call('ZADD', KEYS[2], ARGV[2], id)
+                return redis.call('HGETALL', job)
+            end
+        end
+    """
+
+    REQUEUE = """
+        local requeued = 0
+        for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', '(' .. ARGV[1])) do
+            local job = KEYS[3] .. id
+            redis.call('ZREM', KEYS[2], id)
+            if tonumber(redis.call('HGET', job, 'attempts')) >= tonumber(ARGV[2]) then
+                redis.call('HSET', job, 'status', 'failed', 'error', 'worker lost too many times',
+                           'finished_at', ARGV[3])
+            else
+                redis.call('HSET', job, 'status', 'pending')
+                redis.call('HDEL', job, 'worker')
+                redis.call('LPUSH', KEYS[1], id)
+                requeued = requeued + 1
+            end
+        end
+        return requeued
+    """
+
+    def __init__(self, url, directory, prefix='shard_queue'):
+        self.url = url
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self.keys = [f'{prefix}:pending', f'{prefix}:running', f'{prefix}:job:']
+        self._claim = self.redis.register_script(self.CLAIM)
+        self._requeue = self.redis.register_script(self.REQUEUE)
+
+    def _job(self, fields):
+        job = {name: None for name in ('id', 'run_id', 'shard', 'problem_path', 'params', 'status', 'worker',
+                                       'attempts', 'result_path', 'result', 'error', 'submitted_at',
+                                       'claimed_at', 'finished_at')}
+        job.update((name, self.FIELDS.get(name, str)(value)) for name, value in fields.items())
+        return job
+
+    def _finish(self, job_id, **fields):
+        with self.redis.pipeline() as pipe:
+            pipe.hset(f'{self.keys[2]}{job_id}', mapping={**fields, 'finished_at': time.time()})
+            pipe.zrem(self.keys[1], job_id)
+            pipe.execute()
+
+    def submit(self, run_id, shard, problem_path, params=None):
+        job_id = self.redis.incr(f'{self.prefix}:next_id')
+        with self.redis.pipeline() as pipe:
+            pipe.hset(f'{self.keys[2]}{job_id}', mapping={
+                'id': job_id, 'run_id': run_id, 'shard': shard, 'problem_path': problem_path,
+                'params': json.dumps(params or {}), 'status': 'pending', 'attempts': 0,
+                'submitted_at': time.time()
+            })
+            pipe.rpush(f'{self.prefix}:run:{run_id}', job_id)
+            pipe.rpush(self.keys[0], job_id)
+            pipe.execute()
+        return job_id
+
+    def claim(self, worker):
+        """Atomically take the oldest pending job, or return None"""
+        flat = self._claim(keys=self.keys, args=[worker, time.time()])
+        return self._job(dict(zip(flat[::2], flat[1::2]))) if flat else None
+
+    def complete(self, job_id, result_path, result):
+        self._finish(job_id, status='done', result_path=result_path, result=json.dumps(result))
+
+    def fail(self, job_id, error):
+        self._finish(job_id, status='failed', error=error)
+
+    def requeue_stale(self, timeout, max_attempts=3):
+        """Hand jobs whose worker went quiet for ``timeout`` seconds to another worker"""
+        now = time.time()
+        return self._requeue(keys=self.keys, args=[now - timeout, max_attempts, now])
+
+    def jobs(self, run_id):
+        with self.redis.pipeline() as pipe:
+            for job_id in self.redis.lrange(f'{self.prefix}:run:{run_id}', 0, -1):
+                pipe.hgetall(f'{self.keys[2]}{job_id}')
+            return sorted(map(self._job, pipe.execute()), key=lambda job: job['shard'])
+
+
+def open_queue(directory, broker=None):
+    """RedisShardQueue for a ``redis://`` broker URL, else the SQLite queue in ``directory``"""
+    if broker:
+        return RedisShardQueue(broker, directory)
+    return ShardQueue(directory)
+
+
+# Decomposition -----------------------------------------------------------
+
+def student_blocks(problem, shards):
+    """Contiguous blocks of students of (almost) equal size"""
+    return [block for block in np.array_split(np.arange(problem.num_students), shards) if len(block)]
+
+def community_blocks(problem, shards):
+    """Group students whose preferences share courses, then pack the groups into shards.
+
+    Courses are clustered greedily by co-preference count (heaviest pairs
+    merged first, a cluster never exceeding 1.5x its fair share of demand);
+    each student joins the cluster holding most of their preferences, and the
+    clusters are packed largest-first into the emptiest shard.
+    """
+    num_courses = problem.num_courses
+    demand = problem.demand()
+    pair_weight = {}
+    for i in range(problem.num_students):
+        courses = [c for c, _ in problem.preferences(i)]
+        for a in range(len(courses)):
+            for b in range(a + 1, len(courses)):
+                key = (min(courses[a], courses[b]), max(courses[a], courses[b]))
+                pair_weight[key] = pair_weight.get(key, 0) + 1
+
+    parent = list(range(num_courses))
+    weight = [int(d) for d in demand]
+    limit = 1.5 * max(1, int(demand.sum())) / shards
+
+    def find(c):
+        while parent[c] != c:
+            parent[c] = parent[parent[c]]
+            c = parent[c]
+        return c
+
+    communities = num_courses
+    for (a, b), _ in sorted(pair_weight.items(), key=lambda item: -item[1]):
+        if communities <= shards:
+            break
+        ra, rb = find(a), find(b)
+        if ra == rb or weight[ra] + weight[rb] > limit:
+            continue
+        parent[rb] = ra
+        weight[ra] += weight[rb]
+        communities -= 1
+
+    members = {}
+    for i in range(problem.num_students):
+        votes = {}
+        for c, priority in problem.preferences(i):
+            root = find(c)
+            votes[root] = votes.get(root, 0) + 1.0 / priority
+        root = max(votes, key=votes.get) if votes else -1 - (i % shards)
+        members.setdefault(root, []).append(i)
+
+    bins = [[] for _ in range(shards)]
+    for group in sorted(members.values(), key=len, reverse=True):
+        min(bins, key=len).extend(group)
+    return [np.array(sorted(block), dtype=np.int64) for block in bins if block]
+
+def decompose(problem, shards, strategy='students'):
+    if strategy not in STRATEGIES:
+        raise ValueError(f'Unknown decomposition strategy: {strategy}')
+    if strategy == 'communities':
+        return community_blocks(problem, shards)
+    return student_blocks(problem, shards)
+
+def _split(total, weights):
+    """Split integer ``total`` by ``weights`` with largest remainders"""
+    weights = np.asarray(weights, dtype=np.float64)
+    if total <= 0 or weights.sum() <= 0:
+        return np.zeros(len(weights), dtype=np.int64)
+    exact = total * weights / weights.sum()
+    parts = np.floor(exact).astype(np.int64)
+    for i in np.argsort(-(exact - parts), kind='stable')[:total - parts.sum()]:
+        parts[i] += 1
+    return parts
+
+def _pref_owner(problem):
+    """Student index of every preference row"""
+    return np.repeat(np.arange(problem.num_students), np.diff(problem.pref_ptr))
+
+def allot_capacity(problem, blocks):
+    """Seats of every section per block, shape (blocks, sections).
+
+    Seats up to the course's demand follow each block's demand for the
+    course; the surplus is shared by block size, so every block keeps some
+    filler seats for the minimum course load.
+    """
+    owner = _pref_owner(problem)
+    block_of = np.empty(problem.num_students, dtype=np.int64)
+    for b, block in enumerate(blocks):
+        block_of[block] = b
+    block_demand = np.zeros((len(blocks), problem.num_courses), dtype=np.int64)
+    np.add.at(block_demand, (block_of[owner], problem.pref_course), 1)
+    sizes = np.array([len(block) for block in blocks])
+    sections_per_course = np.bincount(problem.section_course, minlength=problem.num_courses)
+    total_demand = block_demand.sum(axis=0)
+
+    capacity = np.zeros((len(blocks), problem.num_sections), dtype=np.int64)
+    for k, (c, seats) in enumerate(zip(problem.section_course.tolist(), problem.section_capacity.tolist())):
+        demanded = min(seats, -(-int(total_demand[c]) // int(sections_per_course[c])))
+        capacity[:, k] = _split(demanded, block_demand[:, c]) + _split(seats - demanded, sizes)
+    return capacity
+
+def shard_problem(problem, block, capacity, meta=None):
+    """Problem restricted to the students in ``block`` (sorted) with per-shard seats"""
+    in_block = np.zeros(problem.num_students, dtype=bool)
+    in_block[block] = True
+    pref_index = np.nonzero(in_block[_pref_owner(problem)])[0]
+    counts = problem.pref_ptr[block + 1] - problem.pref_ptr[block]
+    done_owner = np.repeat(np.arange(problem.num_students), np.diff(problem.done_ptr))
+    done_counts = problem.done_ptr[block + 1] - problem.done_ptr[block]
+    arrays = {name: getattr(problem, name) for name in ARRAYS}
+    arrays.update(
+        student_id=problem.student_id[block],
+        pref_ptr=np.concatenate(([0], np.cumsum(counts))),
+        done_ptr=np.concatenate(([0], np.cumsum(done_counts))),
+        done_course=problem.done_course[in_block[done_owner]],
+        pref_course=problem.pref_course[pref_index],
+        pref_priority=problem.pref_priority[pref_index],
+        section_capacity=capacity,
+        meta=np.frombuffer(json.dumps({**problem.metadata, **(meta or {})}).encode('utf-8'), dtype=np.uint8)
+    )
+    return Problem(arrays)
+
+
+# Workers -----------------------------------------------------------------
+
+def solve_job(job, queue_directory):
+    """Solve one claimed job; returns (result path, summary)"""
+    from app.services.scheduler_service import SchedulerService
+
+    params = json.loads(job['params'])
+    with Problem.load(job['problem_path']) as problem:
+        scheduler = SchedulerService(
+            max_time_in_seconds=params.get('max_time_in_seconds', 60.0),
+            num_search_workers=params.get('num_search_workers', 1),
+            log_search_progress=False
+        )
+        result = scheduler.solve_problem(problem)
+
+    result_path = os.path.splitext(job['problem_path'])[0] + '.assignments.npy'
+    np.save(result_path, np.array(result['assignments'], dtype=np.int64).reshape(-1, 3))
+    return result_path, {
+        'status': result['status'],
+        'feasible': result['feasible'],
+        'objective_value': result.get('objective_value'),
+        'build_time': result['build_time'],
+        'assignments': len(result['assignments'])
+    }
+
+def run_worker(queue_directory, worker=None, idle_timeout=None, max_jobs=None, poll_interval=0.5, broker=None):
+    """Claim and solve jobs until ``idle_timeout`` seconds pass without work"""
+    queue = open_queue(queue_directory, broker)
+    worker = worker or f'{socket.gethostname()}:{os.getpid()}'
+    idle_since = time.time()
+    solved = 0
+    while max_jobs is None or solved < max_jobs:
+        job = queue.claim(worker)
+        if job is None:
+            if idle_timeout is not None and time.time() - idle_since > idle_timeout:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        logger.info(f"{worker} solving shard {job['shard']} of run {job['run_id']}")
+        try:
+            result_path, summary = solve_job(job, queue_directory)
+        except Exception as e:
+            logger.exception(f"Shard {job['shard']} of run {job['run_id']} failed")
+            queue.fail(job['id'], f'{type(e).__name__}: {e}')
+        else:
+            queue.complete(job['id'], result_path, summary)
+        solved += 1
+        idle_since = time.time()
+    return solved
+
+def run_workers(queue_directory, processes, idle_timeout=None, broker=None):
+    """Run ``processes`` workers on this host until they go idle"""
+    context = get_context('spawn')
+    host = socket.gethostname()
+    workers = [context.Process(target=run_worker, args=(queue_directory, f'{host}:{i}', idle_timeout),
+                               kwargs={'broker': broker})
+               for i in range(processes)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+
+
+# Coordinator -------------------------------------------------------------
+
+class DistributedScheduler:
+    """Drop-in for SchedulerService.optimize_schedules that solves shards on workers"""
+    engine_name = 'cp_sat_distributed'
+
+    def __init__(self, queue_directory, shards=4, strategy='students', local_workers=0,
+                 max_time_in_seconds=60.0, num_search_workers=1, timeout=None, stale_after=None,
+                 poll_interval=0.5, broker=None):
+        if strategy not in STRATEGIES:
+            raise ValueError(f'Unknown decomposition strategy: {strategy}')
+        self.queue = open_queue(queue_directory, broker)
+        self.broker = broker
+        self.shards = shards
+        self.strategy = strategy
+        self.local_workers = local_workers
+        self.max_time_in_seconds = max_time_in_seconds
+        self.num_search_workers = num_search_workers
+        self.timeout = timeout or max_time_in_seconds * shards * 2 + 300
+        self.stale_after = stale_after or max_time_in_seconds * 3 + 120
+        self.poll_interval = poll_interval
+        self.solution_stats = {}
+        self.last_run = None
+
+    def submit(self, problem, run_id):
+        blocks = decompose(problem, self.shards, self.strategy)
+        capacity = allot_capacity(problem, blocks)
+        run_directory = os.path.join(self.queue.directory, run_id)
+        os.makedirs(run_directory, exist_ok=True)
+        params = {'max_time_in_seconds': self.max_time_in_seconds, 'num_search_workers': self.num_search_workers}
+        for shard, block in enumerate(blocks):
+            path = os.path.join(run_directory, f'shard-{shard:04d}.prb')
+            shard_problem(problem, block, capacity[shard], {'run_id': run_id, 'shard': shard}).save(path)
+            self.queue.submit(run_id, shard, path, params)
+        return len(blocks)
+
+    def wait(self, run_id):
+        deadline = time.time() + self.timeout
+        while True:
+            jobs = self.queue.jobs(run_id)
+            if all(job['status'] in ('done', 'failed') for job in jobs):
+                return jobs
+            if time.time() > deadline:
+                raise TimeoutError(f'Distributed run {run_id} did not finish within {self.timeout}s')
+            self.queue.requeue_stale(self.stale_after)
+            time.sleep(self.poll_interval)
+
+    def optimize_schedules(self, semester):
+        from app import db
+        from app.models.models import Schedule, Section, WaitlistEntry
+        from app.services.run_history import RunHistoryService
+        from app.services.scheduler_service import save_assignments, save_sections
+        from app.services.timetable_service import TimetableService
+        from app.services.waitlist import WaitlistService
+        from app.utils.instrumentation import RunInstrumentation, metrics
+        from flask import current_app
+
+        started_at = datetime.utcnow()
+        start_time = time.time()
+        run = RunInstrumentation()
+        run_id = uuid.uuid4().hex
+
+        problem = Problem.from_database(semester)
+        run.lap('load')
+        num_shards = self.submit(problem, run_id)
+        run.lap('submit')
+        run.count('students', problem.num_students)
+        run.count('courses', problem.num_courses)
+        run.count('sections', problem.num_sections)
+        run.count('shards', num_shards)
+
+        workers = []
+        if self.local_workers:
+            context = get_context('spawn')
+            for i in range(self.local_workers):
+                process = context.Process(target=run_worker, args=(self.queue.directory, f'local-{i}', 0),
+                                          kwargs={'broker': self.broker})
+                process.start()
+                workers.append(process)
+        try:
+            jobs = self.wait(run_id)
+        finally:
+            for process in workers:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+        run.lap('solve')
+
+        failed = [job['shard'] for job in jobs if job['status'] == 'failed']
+        results = [json.loads(job['result']) for job in jobs if job['status'] == 'done']
+        infeasible = [job['shard'] for job in jobs
+                      if job['status'] == 'done' and not json.loads(job['result'])['feasible']]
+        assignments = [np.load(job['result_path']) for job in jobs if job['status'] == 'done']
+        assignments = np.concatenate(assignments) if assignments else np.empty((0, 3), dtype=np.int64)
+        run.lap('merge')
+        run.count('assignments', len(assignments))
+        run.count('failed_shards', len(failed))
+        run.count('infeasible_shards', len(infeasible))
+
+        if failed or infeasible:
+            # Keep the published schedule: saving the other shards would
+            # leave the failed shards' students with no courses at all
+            status = 'FAILED' if failed else 'INFEASIBLE'
+            schedules = []
+            logger.error(f'Distributed run {run_id}: shards {failed} failed and {infeasible} were infeasible; '
+                         f'the published schedule of {semester} is unchanged')
+        else:
+            status = 'FEASIBLE'
+            Schedule.query.filter_by(semester=semester).delete()
+            Section.query.filter_by(semester=semester).delete()
+            WaitlistEntry.query.filter_by(semester=semester).delete()
+            db.session.commit()
+            schedules = [tuple(row) for row in assignments.tolist()]
+            save_assignments(semester, schedules, sections=save_sections(semester, problem))
+            run.lap('persist')
+            WaitlistService().build(semester, problem, schedules)
+            run.lap('waitlist')
+
+            if current_app.config.get('TIMETABLE_READ_MODEL'):
+                TimetableService().rebuild(problem.student_id.tolist())
+            run.lap('read_model')
+
+        self.solution_stats = {
+            'status': status,
+            'objective_value': sum(r['objective_value'] or 0 for r in results if r['feasible']),
+            'solve_time': time.time() - start_time,
+            'build_time': max((r['build_time'] for r in results), default=0),
+            'assignments_made': len(schedules),
+            'students_processed': problem.num_students,
+            'run_id': run_id,
+            'failed_shards': failed,
+            'infeasible_shards': infeasible,
+            **run.as_dict()
+        }
+        run.log('distributed optimization')
+        metrics.observe_run(run, status)
+        self.last_run = RunHistoryService().record(
+            semester=semester,
+            engine=self.engine_name,
+            status=status,
+            started_at=started_at,
+            parameters={
+                'shards': self.shards,
+                'strategy': self.strategy,
+                'max_time_in_seconds': self.max_time_in_seconds,
+                'num_search_workers': self.num_search_workers
+            },
+            stats=self.solution_stats
+        )
+        return schedules
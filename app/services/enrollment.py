@@ -0,0 +1,194 @@
+"""Real-time enrollment into published sections.
+
+Every section carries a seat counter, ``Section.enrolled``. A seat is taken
+with one conditional update::
+
+    UPDATE section SET enrolled = enrolled + 1 WHERE id = :id AND enrolled < capacity
+
+The database applies it atomically. Concurrent requests for the last seat
+queue on the section row and only one of them still matches, so a hot
+section cannot be oversold at any isolation level. Drops and promotions go
+through the same pair of updates (``take_seat`` / ``release_seat``).
+
+An enrollment first locks the student's row (``SELECT ... FOR UPDATE``; on
+SQLite, which has no row locks, the seat update serializes writers
+instead). It then takes the seat, and only then checks the student's existing and
+completed courses, the course's prerequisites (each completed or in the
+student's schedule), their load and week time mask. A request that fails a check rolls
+back and gives the seat back, and two requests of one student never check
+against each other's half-written state.
+
+Every enrollment, and every batch of drops, also adds a ScheduleChange row
+in its transaction. The newest row id is the semester's live version: read
+replicas and caches compare it to notice changes made between runs.
+
+A request may carry an idempotency key. Its outcome is stored under the key
+in the same transaction as the seat, so a retry replays the stored outcome
+and never takes a second seat.
+"""
+from collections import namedtuple
+import logging
+
+from flask import current_app
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.models import (Schedule, Section, Student, TimeSlot, Course, EnrollmentRequest,
+                               CourseCompletion, CoursePrerequisite, ScheduleChange)
+from app.services.overlap import meeting_end
+from app.services.timemask import WeekGrid
+from app.services.timetable_service import TimetableService
+
+logger = logging.getLogger(__name__)
+
+MAX_LOAD = 5
+
+ENROLLED, FULL, TIME_CONFLICT, ALREADY_ENROLLED, LOAD_LIMIT, ALREADY_COMPLETED, MISSING_PREREQUISITE = (
+    'enrolled', 'full', 'time_conflict', 'already_enrolled', 'load_limit', 'already_completed',
+    'missing_prerequisite')
+
+# status is one of the outcomes above; replayed marks an answer read back
+# from an earlier request with the same idempotency key
+Enrollment = namedtuple('Enrollment', ['status', 'student_id', 'section_id', 'schedule_id', 'replayed'])
+
+class EnrollmentError(ValueError):
+    pass
+
+class UnknownEntity(EnrollmentError):
+    pass
+
+class IdempotencyKeyReused(EnrollmentError):
+    pass
+
+def take_seat(section_id):
+    """Take one seat of the section if any is left; returns whether it was"""
+    result = db.session.execute(
+        update(Section).where(Section.id == section_id, Section.enrolled < Section.capacity)
+        .values(enrolled=Section.enrolled + 1)
+    )
+    return result.rowcount == 1
+
+def release_seat(section_id):
+    result = db.session.execute(
+        update(Section).where(Section.id == section_id, Section.enrolled > 0)
+        .values(enrolled=Section.enrolled - 1)
+    )
+    return result.rowcount == 1
+
+def record_change(semester):
+    """Bump the semester's live version as part of the current transaction"""
+    db.session.add(ScheduleChange(semester=semester))
+
+def live_version(semester=None):
+    """Id of the semester's newest live write (of any semester without one),
+    or None before the first"""
+    query = select(func.max(ScheduleChange.id))
+    if semester:
+        query = query.where(ScheduleChange.semester == semester)
+    return db.session.execute(query).scalar()
+
+def _minutes(t):
+    return t.hour * 60 + t.minute
+
+class EnrollmentService:
+    """Enrolls students into sections one request at a time"""
+
+    def __init__(self, max_load=MAX_LOAD):
+        self.max_load = max_load
+        self.grid = WeekGrid()
+
+    def enroll(self, semester, student_id, section_id, key=None):
+        """Enroll the student into the section; returns an Enrollment"""
+        if key is not None:
+            stored = self._stored(key, semester, student_id, section_id)
+            if stored is not None:
+                return stored
+
+        section = db.session.execute(
+            select(Section.id, Section.course_id, Section.timeslot_id, TimeSlot.day, TimeSlot.start_time,
+                   TimeSlot.end_time, Course.duration_minutes)
+            .join(TimeSlot, TimeSlot.id == Section.timeslot_id)
+            .join(Course, Course.id == Section.course_id)
+            .where(Section.id == section_id, Section.semester == semester)
+        ).first()
+        if section is None:
+            raise UnknownEntity(f'No section {section_id} in {semester}')
+        if db.session.execute(select(Student.id).where(Student.id == student_id).with_for_update()).first() is None:
+            db.session.rollback()
+            raise UnknownEntity(f'No student {student_id}')
+
+        status, schedule_id = FULL, None
+        if take_seat(section_id):
+            status = self._check(semester, student_id, section)
+            if status == ENROLLED:
+                schedule = Schedule(student_id=student_id, course_id=section.course_id,
+                                    timeslot_id=section.timeslot_id, section_id=section_id, semester=semester)
+                db.session.add(schedule)
+                record_change(semester)
+                db.session.flush()
+                schedule_id = schedule.id
+            else:
+                # Hand the seat back along with anything else this request wrote
+                db.session.rollback()
+
+        if key is not None:
+            db.session.add(EnrollmentRequest(key=key, semester=semester, student_id=student_id,
+                                             section_id=section_id, status=status, schedule_id=schedule_id))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            if key is None:
+                raise
+            # The same key committed first; its outcome stands and ours is undone
+            return self._stored(key, semester, student_id, section_id)
+
+        if status == ENROLLED and current_app.config.get('TIMETABLE_READ_MODEL'):
+            TimetableService().rebuild([student_id])
+        return Enrollment(status, student_id, section_id, schedule_id, False)
+
+    def _check(self, semester, student_id, section):
+        """Outcome of the checks against the student's current schedule"""
+        rows = db.session.execute(
+            select(Schedule.course_id, TimeSlot.day, TimeSlot.start_time, TimeSlot.end_time,
+                   Course.duration_minutes)
+            .join(TimeSlot, TimeSlot.id == Schedule.timeslot_id)
+            .join(Course, Course.id == Schedule.course_id)
+            .where(Schedule.semester == semester, Schedule.student_id == student_id)
+        ).all()
+        if any(row.course_id == section.course_id for row in rows):
+            return ALREADY_ENROLLED
+        completed = set(db.session.execute(
+            select(CourseCompletion.course_id).where(CourseCompletion.student_id == student_id)
+        ).scalars())
+        if section.course_id in completed:
+            return ALREADY_COMPLETED
+        prerequisites = set(db.session.execute(
+            select(CoursePrerequisite.prerequisite_id).where(CoursePrerequisite.course_id == section.course_id)
+        ).scalars())
+        if not prerequisites <= completed | {row.course_id for row in rows}:
+            return MISSING_PREREQUISITE
+        if len(rows) >= self.max_load:
+            return LOAD_LIMIT
+
+        schedule_mask = 0
+        start = [_minutes(row.start_time) for row in rows]
+        end = meeting_end(start, [_minutes(row.end_time) for row in rows],
+                          [row.duration_minutes or 0 for row in rows])
+        for mask in self.grid.masks([row.day for row in rows], start, end):
+            schedule_mask |= mask
+        start = _minutes(section.start_time)
+        end = int(meeting_end(start, _minutes(section.end_time), section.duration_minutes or 0))
+        if schedule_mask & self.grid.mask(section.day, start, end):
+            return TIME_CONFLICT
+        return ENROLLED
+
+    def _stored(self, key, semester, student_id, section_id):
+        """Earlier outcome under ``key``, or None"""
+        request = db.session.execute(select(EnrollmentRequest).where(EnrollmentRequest.key == key)).scalar()
+        if request is None:
+            return None
+        if (request.semester, request.student_id, request.section_id) != (semester, student_id, section_id):
+            raise IdempotencyKeyReused(f'Idempotency key {key!r} was used for a different enrollment')
+        return Enrollment(request.status, request.student_id, request.section_id, request.schedule_id, True)
@@ -0,0 +1,177 @@
+from app.models.models import Schedule, CoursePreference, Course, TimeSlot
+from app import db
+from flask import current_app
+from sqlalchemy import select, Integer, String, DateTime, Time, Float
+import csv
+import io
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet/Arrow output is optional; CSV always works
+    pa = None
+
+FORMATS = ('parquet', 'arrow', 'csv')
+EXTENSIONS = {'parquet': 'parquet', 'arrow': 'arrow', 'csv': 'csv'}
+MIMETYPES = {
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.file',
+    'csv': 'text/csv'
+}
+
+def _tables(semester):
+    """table name -> query; schedules are limited to ``semester``"""
+    return {
+        'schedules': select(Schedule.id, Schedule.student_id, Schedule.course_id, Schedule.timeslot_id,
+                            Schedule.semester, Schedule.created_at)
+                     .where(Schedule.semester == semester).order_by(Schedule.id),
+        'preferences': select(CoursePreference.id, CoursePreference.student_id, CoursePreference.course_id,
+                              CoursePreference.priority).order_by(CoursePreference.id),
+        'courses': select(Course.id, Course.course_code, Course.name, Course.capacity,
+                          Course.duration_minutes, Course.instructor).order_by(Course.id),
+        'timeslots': select(TimeSlot.id, TimeSlot.day, TimeSlot.start_time, TimeSlot.end_time,
+                            TimeSlot.room).order_by(TimeSlot.id)
+    }
+
+TABLES = ('schedules', 'preferences', 'courses', 'timeslots')
+
+# Largest batch a request may ask for; each batch is held in memory
+MAX_BATCH_SIZE = 100000
+
+def default_format():
+    return 'parquet' if pa is not None else 'csv'
+
+def _arrow_schema(query):
+    types = {Integer: pa.int64(), String: pa.string(), Float: pa.float64(),
+             DateTime: pa.timestamp('us'), Time: pa.time64('us')}
+    fields = []
+    for column in query.selected_columns:
+        arrow_type = next((t for sql_type, t in types.items() if isinstance(column.type, sql_type)), pa.string())
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents are drained between batches"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ExportService:
+    """Streams a semester's scheduling tables to Parquet, Arrow IPC or CSV.
+
+    Rows are fetched in ``batch_size`` partitions from a server-side cursor
+    (``stream_results``) and written one batch at a time, so memory stays
+    bounded by the batch size rather than the table size. Both default to
+    the app's ``DB_YIELD_PER`` and ``DB_STREAM_RESULTS`` settings.
+    """
+
+    def __init__(self, batch_size=None, stream_results=None):
+        self.batch_size = batch_size or current_app.config.get('DB_YIELD_PER', 50000)
+        self.stream_results = (current_app.config.get('DB_STREAM_RESULTS', True) if stream_results is None
+                               else stream_results)
+
+    @staticmethod
+    def check_format(fmt):
+        if fmt not in FORMATS:
+            raise ValueError(f'Unknown export format: {fmt}')
+        if fmt != 'csv' and pa is None:
+            raise RuntimeError(f'{fmt} export requires pyarrow; install it or use format=csv')
+
+    def iter_batches(self, table, semester):
+        """Yield lists of row tuples for one table"""
+        if table not in TABLES:
+            raise ValueError(f'Unknown export table: {table}')
+        query = _tables(semester)[table]
+        result = db.session.execute(
+            query.execution_options(stream_results=self.stream_results, yield_per=self.batch_size)
+        )
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
+    def _encode(self, table, fmt, sink, semester):
+        """Write ``table`` to ``sink`` batch by batch, yielding the running row count
+        after every batch and once more after the file is finalized"""
+        self.check_format(fmt)
+        if table not in TABLES:
+            raise ValueError(f'Unknown export table: {table}')
+        query = _tables(semester)[table]
+        rows_written = 0
+
+        if fmt == 'csv':
+            text = io.StringIO()
+            writer = csv.writer(text)
+            writer.writerow([column.name for column in query.selected_columns])
+            for batch in self.iter_batches(table, semester):
+                writer.writerows(batch)
+                sink.write(text.getvalue().encode('utf-8'))
+                text.seek(0)
+                text.truncate()
+                rows_written += len(batch)
+                yield rows_written
+            # Header only when the table is empty
+            sink.write(text.getvalue().encode('utf-8'))
+            yield rows_written
+            return
+
+        schema = _arrow_schema(query)
+        writer = pq.ParquetWriter(sink, schema) if fmt == 'parquet' else pa.ipc.new_file(sink, schema)
+        try:
+            for batch in self.iter_batches(table, semester):
+                arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*batch), schema)]
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                rows_written += len(batch)
+                yield rows_written
+        finally:
+            writer.close()
+        yield rows_written
+
+    def write(self, table, fmt, sink, semester):
+        """Write ``table`` to the binary file object ``sink``; returns the row count"""
+        rows_written = 0
+        for rows_written in self._encode(table, fmt, sink, semester):
+            pass
+        return rows_written
+
+    def export(self, semester, directory, fmt=None, tables=TABLES):
+        """Write one file per table into ``directory``; returns {table: {path, rows}}"""
+        fmt = fmt or default_format()
+        self.check_format(fmt)
+        os.makedirs(directory, exist_ok=True)
+        written = {}
+        for table in tables:
+            path = os.path.join(directory, f'{table}.{EXTENSIONS[fmt]}')
+            with open(path, 'wb') as sink:
+                rows = self.write(table, fmt, sink, semester)
+            written[table] = {'path': path, 'rows': rows}
+        return written
+
+    def stream(self, table, fmt, semester):
+        """Generator of byte chunks for an HTTP response, one per fetched batch"""
+        sink = _ChunkSink()
+        for _ in self._encode(table, fmt, sink, semester):
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
@@ -0,0 +1,138 @@
+"""Overlap index over meeting intervals.
+
+Two meetings clash when they fall on the same day and their [start, end)
+minute intervals intersect. A meeting lasts its course's
+``duration_minutes`` from the start of its timeslot; a course without a
+duration fills the timeslot.
+
+``OverlapIndex`` sweeps each day's start and end points in order. Just
+before an end point that follows a start point, the open intervals form a
+maximal clique: they all overlap each other, and no other interval overlaps
+all of them. Every overlapping pair lies in one of these cliques. So one
+sort and one pass replace pairwise comparison, and "at most one per clique"
+means exactly "no two overlapping".
+
+The CP-SAT model, section placement, student-group splitting and the
+schedule verifiers all take their definition of a clash from this module.
+"""
+import numpy as np
+
+def meeting_end(start, end, duration):
+    """End minute of each meeting: ``start + duration``, or the timeslot's
+    ``end`` where the duration is missing (0)"""
+    start, end, duration = (np.asarray(a, dtype=np.int64) for a in (start, end, duration))
+    return np.where(duration > 0, start + duration, end)
+
+class OverlapIndex:
+    """Maximal cliques of overlapping (day, start, end) intervals
+
+    cliques   lists of interval indexes, each sorted and ordered by first
+              member; intervals overlapping nothing form singleton cliques
+    """
+
+    def __init__(self, day, start, end):
+        self.day = np.asarray(day, dtype=np.int64)
+        self.start = np.asarray(start, dtype=np.int64)
+        # An empty interval still occupies its minute
+        self.end = np.maximum(np.asarray(end, dtype=np.int64), self.start + 1)
+        n = len(self.day)
+
+        # Ends sort before starts at the same minute (intervals are half-open)
+        ids = np.tile(np.arange(n), 2)
+        is_start = np.repeat([0, 1], n)
+        times = np.concatenate((self.end, self.start))
+        order = np.lexsort((ids, is_start, times, np.tile(self.day, 2)))
+
+        cliques = []
+        active = set()
+        grown = False
+        for i, opening in zip(ids[order].tolist(), is_start[order].tolist()):
+            if opening:
+                active.add(i)
+                grown = True
+            else:
+                if grown:
+                    cliques.append(sorted(active))
+                    grown = False
+                active.discard(i)
+        cliques.sort(key=lambda clique: clique[0])
+        self.cliques = cliques
+
+    @classmethod
+    def for_timeslots(cls, problem):
+        """Index over the problem's timeslots as they are"""
+        return cls(problem.timeslot_day, problem.timeslot_start, problem.timeslot_end)
+
+    @classmethod
+    def for_sections(cls, problem):
+        """Index over the problem's sections, each lasting its course's duration"""
+        slots = problem.section_timeslot
+        start = problem.timeslot_start[slots]
+        end = meeting_end(start, problem.timeslot_end[slots], problem.course_duration[problem.section_course])
+        return cls(problem.timeslot_day[slots], start, end)
+
+    def __len__(self):
+        return len(self.day)
+
+    def masks(self):
+        """Bitset of the intervals overlapping each interval (itself included)"""
+        masks = [1 << i for i in range(len(self))]
+        for clique in self.cliques:
+            bits = 0
+            for i in clique:
+                bits |= 1 << i
+            for i in clique:
+                masks[i] |= bits
+        return masks
+
+    def components(self):
+        """Connected component of every interval, numbered by first interval"""
+        parent = list(range(len(self)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for clique in self.cliques:
+            root = find(clique[0])
+            for i in clique[1:]:
+                parent[find(i)] = root
+        labels = {}
+        return np.fromiter((labels.setdefault(find(i), len(labels)) for i in range(len(self))),
+                           dtype=np.int64, count=len(self))
+
+def overlapping_pairs(student, day, start, end, tiebreak=None):
+    """Index pairs (i, j) of overlapping intervals with the same student and day.
+
+    Rows are sorted by (student, day, start); row i is then compared with the
+    row k places later for k = 1, 2, ... while any row still overlaps its k-th
+    successor. Since starts are sorted, once a successor starts after row i
+    ends no later one can overlap it, so the loop runs max-overlap-depth times.
+    """
+    if tiebreak is None:
+        tiebreak = np.arange(len(start))
+    order = np.lexsort((tiebreak, start, day, student))
+    student, day, start, end = student[order], day[order], start[order], end[order]
+
+    firsts, seconds = [], []
+    candidates = np.arange(len(order) - 1)
+    k = 1
+    while candidates.size:
+        later = candidates + k
+        hit = (student[later] == student[candidates]) & (day[later] == day[candidates]) & \
+            (start[later] < end[candidates])
+        firsts.append(candidates[hit])
+        seconds.append(later[hit])
+        k += 1
+        candidates = candidates[hit]
+        candidates = candidates[candidates + k < len(order)]
+
+    if not firsts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    first = np.concatenate(firsts)
+    second = np.concatenate(seconds)
+    # Report pairs grouped by first interval, matching the SQL ordering
+    pair_order = np.lexsort((second, first))
+    return order[first[pair_order]], order[second[pair_order]]
@@ -0,0 +1,145 @@
+"""Placement of course sections onto (timeslot, room) pairs.
+
+A section needs a meeting time and a room that holds its seats. A room or
+an instructor can only be in one section at a time, an instructor may be
+unavailable at some timeslots, and sections of one course go to different
+times so students can choose between them.
+
+A section meets from the start of its timeslot for its course's duration,
+so the candidates are meetings: one per timeslot for every distinct
+duration, numbered ``block * num_timeslots + timeslot``. Availability is
+kept as Python integers used as bitsets over meetings:
+
+    free[k]        rooms still free for meeting k; bit j is the j-th
+                   smallest room, so the lowest set bit of
+                   ``free[k] & fits`` is the best-fitting room
+    busy[i]        meetings clashing with instructor i's sections or
+                   unavailability; one AND per candidate
+    overlaps[k]    meetings overlapping k, from the OverlapIndex
+
+Booking a section clears its room's bit at every overlapping meeting, so
+checking a (timeslot, room) pair never scans other sections.
+"""
+import bisect
+import logging
+
+import numpy as np
+
+from app.services.overlap import OverlapIndex, meeting_end
+
+logger = logging.getLogger(__name__)
+
+def _bits(mask):
+    """Indexes of the set bits of ``mask``"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def place_sections(problem, section_course, section_capacity):
+    """Timeslot, room and seats of every section
+
+    ``section_course`` and ``section_capacity`` give each section's course
+    index and wanted seats. Sections are placed largest first, each at the
+    least-loaded time where its instructor and course are free and a room
+    fits; the smallest fitting room is taken. Without a fitting room the
+    largest free one is used and the seats are capped to it. Returns
+    (section_timeslot, section_room, section_capacity) arrays; the room is
+    -1 when none was free, and such a section gets no seats either.
+
+    Instructor and course clashes are never broken: a section with no time
+    left where its instructor and course are free gets no room and no
+    seats, so no student can be scheduled into it.
+    """
+    num_sections = len(section_course)
+    num_timeslots, num_rooms = problem.num_timeslots, problem.num_rooms
+    course_duration = problem.course_duration.tolist()
+    durations = sorted({course_duration[c] for c in section_course})
+    block = {duration: b for b, duration in enumerate(durations)}
+
+    # Meetings of every duration, then the bare timeslots for unavailability
+    num_meetings = len(durations) * num_timeslots
+    start = np.tile(problem.timeslot_start, len(durations))
+    end = np.concatenate([meeting_end(problem.timeslot_start, problem.timeslot_end,
+                                      np.full(num_timeslots, duration)) for duration in durations]
+                         or [np.empty(0, dtype=np.int64)])
+    index = OverlapIndex(np.tile(problem.timeslot_day, len(durations) + 1),
+                         np.concatenate((start, problem.timeslot_start)),
+                         np.concatenate((end, problem.timeslot_end)))
+    meetings = (1 << num_meetings) - 1
+    masks = index.masks()
+    overlaps = [mask & meetings for mask in masks[:num_meetings]]
+    overlap_index = [np.fromiter(_bits(mask), dtype=np.int64) for mask in overlaps]
+
+    room_order = np.argsort(problem.room_capacity, kind='stable')
+    room_sizes = problem.room_capacity[room_order].tolist()
+    all_rooms = (1 << num_rooms) - 1
+    free = [all_rooms] * num_meetings
+
+    instructors = len(problem.instructor_id)
+    busy = [0] * instructors
+    for i in range(instructors):
+        for t in problem.blocked_timeslot[problem.blocked_ptr[i]:problem.blocked_ptr[i + 1]].tolist():
+            busy[i] |= masks[num_meetings + t] & meetings
+    course_busy = [0] * problem.num_courses
+    load = np.zeros(num_meetings, dtype=np.int64)
+
+    timeslots = np.zeros(num_sections, dtype=np.int64)
+    rooms = np.full(num_sections, -1, dtype=np.int64)
+    capacity = np.asarray(section_capacity, dtype=np.int64).copy()
+    course_instructor = problem.course_instructor.tolist()
+    capped = roomless = unplaced = 0
+
+    for sec in np.argsort(-capacity, kind='stable').tolist():
+        c = int(section_course[sec])
+        instructor = course_instructor[c]
+        first = block[course_duration[c]] * num_timeslots
+        blocked = course_busy[c] | (busy[instructor] if instructor >= 0 else 0)
+        fits = all_rooms & ~((1 << bisect.bisect_left(room_sizes, capacity[sec])) - 1)
+
+        # Least-loaded allowed meeting with a fitting room, else with any room
+        block_load = load[first:first + num_timeslots]
+        meetings_by_load = (first + np.lexsort((np.arange(num_timeslots), block_load))).tolist()
+        allowed = [k for k in meetings_by_load if not blocked >> k & 1]
+        choice = next(((k, free[k] & fits) for k in allowed if free[k] & fits), None)
+        if choice is not None:
+            k, candidates = choice
+            r = (candidates & -candidates).bit_length() - 1
+        else:
+            choice = next(((k, free[k]) for k in allowed if free[k]), None)
+            if choice is not None:
+                k, candidates = choice
+                r = candidates.bit_length() - 1
+                capacity[sec] = room_sizes[r]
+                capped += 1
+            elif allowed:
+                # No room left at any allowed time: nowhere to seat anyone,
+                # so keep the time choice only and book nothing
+                timeslots[sec] = allowed[0] - first
+                capacity[sec] = 0
+                roomless += 1
+                continue
+            else:
+                # Every time clashes with the instructor or the course
+                timeslots[sec] = meetings_by_load[0] - first
+                capacity[sec] = 0
+                unplaced += 1
+                continue
+
+        timeslots[sec] = k - first
+        rooms[sec] = room_order[r]
+        bit = ~(1 << r)
+        for u in overlap_index[k].tolist():
+            free[u] &= bit
+        course_busy[c] |= overlaps[k]
+        if instructor >= 0:
+            busy[instructor] |= overlaps[k]
+        load[overlap_index[k]] += 1
+
+    if capped or roomless:
+        logger.warning(f"Section placement: {capped} sections capped to a smaller room, "
+                       f"{roomless} without a free room get no seats")
+    if unplaced:
+        logger.error(f"Section placement: {unplaced} sections have no time free of instructor and course "
+                     f"clashes; they get no seats")
+    return timeslots, rooms, capacity
@@ -0,0 +1,115 @@
+"""Course prerequisite DAG and its compilation into per-student eligibility.
+
+A course's prerequisites must be completed already or taken in the same
+semester. Before the model is built, ``compile_prerequisites`` works out
+for every student which courses are eligible at all and which
+prerequisite edges still need a constraint, so students who never asked
+for an advanced course get neither its variables nor its constraints.
+"""
+from collections import defaultdict
+
+import numpy as np
+
+class PrerequisiteCycleError(ValueError):
+    pass
+
+def topological_order(edges, num_courses):
+    """Course indexes with every course before its prerequisites
+
+    ``edges`` are (course, prerequisite) index pairs; raises
+    PrerequisiteCycleError when they are not acyclic.
+    """
+    requires = defaultdict(list)
+    waiting = [0] * num_courses   # unprocessed dependents of each course
+    for course, prereq in edges:
+        requires[course].append(prereq)
+        waiting[prereq] += 1
+    order = [c for c in range(num_courses) if waiting[c] == 0]
+    for course in order:
+        for prereq in requires[course]:
+            waiting[prereq] -= 1
+            if waiting[prereq] == 0:
+                order.append(prereq)
+    if len(order) < num_courses:
+        raise PrerequisiteCycleError('Prerequisites contain a cycle')
+    return order
+
+class PrerequisiteGraph:
+    """The CoursePrerequisite table as a DAG keyed by course id"""
+
+    def __init__(self, edges=()):
+        self.requires = defaultdict(set)
+        for course_id, prerequisite_id in edges:
+            self.requires[course_id].add(prerequisite_id)
+
+    @classmethod
+    def load(cls):
+        from app import db
+        from app.models.models import CoursePrerequisite
+        from sqlalchemy import select
+
+        return cls(db.session.execute(select(CoursePrerequisite.course_id, CoursePrerequisite.prerequisite_id)))
+
+    def closure(self, course_id):
+        """Every course ``course_id`` depends on, directly or transitively"""
+        seen, stack = set(), list(self.requires.get(course_id, ()))
+        while stack:
+            prereq = stack.pop()
+            if prereq not in seen:
+                seen.add(prereq)
+                stack.extend(self.requires.get(prereq, ()))
+        return seen
+
+    def add(self, course_id, prerequisite_id):
+        """Add and persist an edge, rejecting ones that would close a cycle"""
+        from app import db
+        from app.models.models import CoursePrerequisite
+
+        if course_id == prerequisite_id or course_id in self.closure(prerequisite_id):
+            raise PrerequisiteCycleError(f'Course {course_id} cannot require {prerequisite_id}: '
+                                         f'that would create a cycle')
+        if prerequisite_id in self.requires.get(course_id, ()):
+            return None
+        edge = CoursePrerequisite(course_id=course_id, prerequisite_id=prerequisite_id)
+        db.session.add(edge)
+        db.session.commit()
+        self.requires[course_id].add(prerequisite_id)
+        return edge
+
+def compile_prerequisites(problem):
+    """Eligible courses and pending prerequisite edges per student
+
+    Returns boolean arrays ``eligible`` (students x courses) and ``pending``
+    (students x prerequisite edges). A course is eligible when the student
+    has not completed it and either requested it, has completed all of its
+    prerequisites, or needs it as a prerequisite of an eligible course. An
+    edge is pending, and becomes a constraint, when its course is eligible
+    and its prerequisite is not completed.
+    """
+    n, num_courses = problem.num_students, problem.num_courses
+    edges = list(zip(problem.prereq_course.tolist(), problem.prereq_required.tolist()))
+
+    completed = np.zeros((n, num_courses), dtype=bool)
+    owners = np.repeat(np.arange(n), np.diff(problem.done_ptr))
+    completed[owners, problem.done_course] = True
+    requested = np.zeros((n, num_courses), dtype=bool)
+    owners = np.repeat(np.arange(n), np.diff(problem.pref_ptr))
+    requested[owners, problem.pref_course] = True
+
+    unmet = np.zeros((n, num_courses), dtype=bool)
+    for course, prereq in edges:
+        unmet[:, course] |= ~completed[:, prereq]
+    eligible = ~completed & (requested | ~unmet)
+
+    # Walk dependents before their prerequisites so chains propagate
+    by_course = defaultdict(list)
+    for course, prereq in edges:
+        by_course[course].append(prereq)
+    for course in topological_order(edges, num_courses):
+        for prereq in by_course[course]:
+            eligible[:, prereq] |= eligible[:, course] & ~completed[:, prereq]
+
+    pending = np.zeros((n, len(edges)), dtype=bool)
+    for e, (course, prereq) in enumerate(edges):
+        pending[:, e] = eligible[:, course] & ~completed[:, prereq]
+    return eligible, pending
@@ -0,0 +1,342 @@
+"""Array form of a scheduling problem and its memory-mapped file format.
+
+A Problem holds everything the solver needs as flat numpy arrays: students,
+courses (capacity, code, instructor), timeslot intervals, rooms, planned
+sections, the prerequisite edges, instructor unavailability and each
+student's ranked preferences and completed courses in CSR form. Entities are referenced by array index; the ``*_id``
+arrays map indexes back to database ids.
+
+File layout (little endian)::
+
+    header   magic b'SCHEDPRB', uint32 version, uint32 array count
+    entries  per array: 24-byte name, 4-byte dtype, uint64 offset, uint64 length
+    data     each array's raw bytes, 8-byte aligned
+
+``Problem.load`` maps the file and exposes the arrays as zero-copy views, so
+solver workers can share one file without re-querying the database.
+"""
+from datetime import datetime
+import json
+import mmap
+import struct
+
+import numpy as np
+
+from app.services.placement import place_sections
+
+MAGIC = b'SCHEDPRB'
+VERSION = 4
+HEADER = struct.Struct('<8sII')
+ENTRY = struct.Struct('<24s4sQQ')
+ALIGN = 8
+
+# name -> dtype; order is the on-disk order
+ARRAYS = {
+    'student_id': '<i4',
+    'course_id': '<i4',
+    'course_capacity': '<i4',
+    'course_codes': '|u1',      # newline-joined UTF-8 course codes
+    'course_instructor': '<i4', # instructor index, -1 for none
+    'course_duration': '<i4',   # meeting minutes, 0 = the whole timeslot
+    'timeslot_id': '<i4',
+    'timeslot_day': '<i4',
+    'timeslot_start': '<i4',    # minutes since midnight
+    'timeslot_end': '<i4',
+    'pref_ptr': '<i8',          # student i's preferences are pref_ptr[i]:pref_ptr[i + 1]
+    'pref_course': '<i4',       # course index
+    'pref_priority': '<i4',
+    'section_course': '<i4',    # course index
+    'section_timeslot': '<i4',  # timeslot index
+    'section_capacity': '<i4',
+    'section_room': '<i4',      # room index, -1 for none
+    'room_id': '<i4',
+    'room_capacity': '<i4',
+    'instructor_id': '<i4',
+    'blocked_ptr': '<i8',       # instructor i is unavailable at blocked_timeslot[blocked_ptr[i]:blocked_ptr[i + 1]]
+    'blocked_timeslot': '<i4',  # timeslot index
+    'prereq_course': '<i4',     # prerequisite edges: course index ...
+    'prereq_required': '<i4',   # ... requires this course index
+    'done_ptr': '<i8',          # student i completed done_course[done_ptr[i]:done_ptr[i + 1]]
+    'done_course': '<i4',
+    'meta': '|u1'               # UTF-8 JSON: semester, created_at, ...
+}
+
+# Added in versions 2-4; empty (or "none") when reading older files
+OPTIONAL = ('prereq_course', 'prereq_required', 'done_ptr', 'done_course', 'course_instructor',
+            'course_duration', 'section_room', 'room_id', 'room_capacity', 'instructor_id', 'blocked_ptr', 'blocked_timeslot')
+
+class ProblemFormatError(ValueError):
+    pass
+
+class Problem:
+    """Scheduling problem as flat arrays (see module docstring)"""
+
+    def __init__(self, arrays, mapped=None):
+        arrays = dict(arrays)
+        for name in OPTIONAL:
+            arrays.setdefault(name, [])
+        if not len(arrays['done_ptr']):
+            arrays['done_ptr'] = np.zeros(len(arrays.get('student_id', ())) + 1, dtype=np.int64)
+        if not len(arrays['course_instructor']):
+            arrays['course_instructor'] = np.full(len(arrays.get('course_id', ())), -1)
+        if not len(arrays['course_duration']):
+            arrays['course_duration'] = np.zeros(len(arrays.get('course_id', ())))
+        if not len(arrays['section_room']):
+            arrays['section_room'] = np.full(len(arrays.get('section_course', ())), -1)
+        if not len(arrays['blocked_ptr']):
+            arrays['blocked_ptr'] = np.zeros(len(arrays['instructor_id']) + 1, dtype=np.int64)
+        missing = set(ARRAYS) - set(arrays)
+        if missing:
+            raise ProblemFormatError(f"Missing arrays: {', '.join(sorted(missing))}")
+        for name, dtype in ARRAYS.items():
+            setattr(self, name, np.asarray(arrays[name], dtype=dtype))
+        self._mapped = mapped
+
+    # Sizes and lookups ---------------------------------------------------
+
+    @property
+    def num_students(self):
+        return len(self.student_id)
+
+    @property
+    def num_courses(self):
+        return len(self.course_id)
+
+    @property
+    def num_timeslots(self):
+        return len(self.timeslot_id)
+
+    @property
+    def num_sections(self):
+        return len(self.section_course)
+    
+    @property
+    def num_rooms(self):
+        return len(self.room_id)
+
+    @property
+    def course_code(self):
+        blob = self.course_codes.tobytes().decode('utf-8')
+        return blob.split('\n') if blob else []
+
+    @property
+    def metadata(self):
+        return json.loads(self.meta.tobytes().decode('utf-8') or '{}')
+
+    def preferences(self, student):
+        """(course index, priority) pairs of the student at index ``student``"""
+        start, end = self.pref_ptr[student], self.pref_ptr[student + 1]
+        return zip(self.pref_course[start:end].tolist(), self.pref_priority[start:end].tolist())
+
+    def completed(self, student):
+        """Course indexes the student at index ``student`` has completed"""
+        return self.done_course[self.done_ptr[student]:self.done_ptr[student + 1]].tolist()
+
+    def demand(self):
+        return np.bincount(self.pref_course, minlength=self.num_courses)
+
+    # Construction --------------------------------------------------------
+
+    @classmethod
+    def from_database(cls, semester=None, plan=True):
+        """Snapshot the current database into a Problem (inside an app context)"""
+        from app import db
+        from app.models.models import (Student, Course, TimeSlot, CoursePreference, CoursePrerequisite,
+                                       CourseCompletion, Room, Instructor, InstructorUnavailability)
+        from sqlalchemy import select
+
+        session = db.session
+        student_ids = session.execute(select(Student.id).order_by(Student.id)).scalars().all()
+        courses = session.execute(
+            select(Course.id, Course.capacity, Course.course_code, Course.instructor_id, Course.duration_minutes)
+            .order_by(Course.id)
+        ).all()
+        timeslots = session.execute(
+            select(TimeSlot.id, TimeSlot.day, TimeSlot.start_time, TimeSlot.end_time).order_by(TimeSlot.id)
+        ).all()
+        rooms = session.execute(select(Room.id, Room.capacity).order_by(Room.id)).all()
+        instructor_ids = session.execute(select(Instructor.id).order_by(Instructor.id)).scalars().all()
+
+        student_index = {sid: i for i, sid in enumerate(student_ids)}
+        course_index = {row.id: i for i, row in enumerate(courses)}
+        per_student = [[] for _ in student_ids]
+        for row in session.execute(
+            select(CoursePreference.student_id, CoursePreference.course_id, CoursePreference.priority)
+            .order_by(CoursePreference.student_id, CoursePreference.priority, CoursePreference.id)
+        ):
+            if row.student_id in student_index and row.course_id in course_index:
+                per_student[student_index[row.student_id]].append((course_index[row.course_id], row.priority))
+
+        edges = [
+            (course_index[row.course_id], course_index[row.prerequisite_id])
+            for row in session.execute(select(CoursePrerequisite.course_id, CoursePrerequisite.prerequisite_id)
+                                       .order_by(CoursePrerequisite.id))
+            if row.course_id in course_index and row.prerequisite_id in course_index
+        ]
+        done = [[] for _ in student_ids]
+        for row in session.execute(
+            select(CourseCompletion.student_id, CourseCompletion.course_id)
+            .order_by(CourseCompletion.student_id, CourseCompletion.course_id)
+        ):
+            if row.student_id in student_index and row.course_id in course_index:
+                done[student_index[row.student_id]].append(course_index[row.course_id])
+
+        instructor_index = {iid: i for i, iid in enumerate(instructor_ids)}
+        timeslot_index = {row.id: i for i, row in enumerate(timeslots)}
+        blocked = [[] for _ in instructor_ids]
+        for row in session.execute(
+            select(InstructorUnavailability.instructor_id, InstructorUnavailability.timeslot_id)
+            .order_by(InstructorUnavailability.instructor_id, InstructorUnavailability.timeslot_id)
+        ):
+            if row.instructor_id in instructor_index and row.timeslot_id in timeslot_index:
+                blocked[instructor_index[row.instructor_id]].append(timeslot_index[row.timeslot_id])
+
+        counts = [len(prefs) for prefs in per_student]
+        flat = [pref for prefs in per_student for pref in prefs]
+        minutes = lambda t: t.hour * 60 + t.minute
+        problem = cls({
+            'student_id': student_ids,
+            'course_id': [row.id for row in courses],
+            'course_capacity': [row.capacity for row in courses],
+            'course_codes': np.frombuffer('\n'.join(row.course_code for row in courses).encode('utf-8'),
+                                          dtype=np.uint8),
+            'course_instructor': [instructor_index.get(row.instructor_id, -1) for row in courses],
+            'course_duration': [row.duration_minutes or 0 for row in courses],
+            'timeslot_id': [row.id for row in timeslots],
+            'timeslot_day': [row.day for row in timeslots],
+            'timeslot_start': [minutes(row.start_time) for row in timeslots],
+            'timeslot_end': [minutes(row.end_time) for row in timeslots],
+            'pref_ptr': np.concatenate(([0], np.cumsum(counts, dtype=np.int64))),
+            'pref_course': [course for course, _ in flat],
+            'pref_priority': [priority for _, priority in flat],
+            'section_course': [],
+            'section_timeslot': [],
+            'section_capacity': [],
+            'section_room': [],
+            'room_id': [row.id for row in rooms],
+            'room_capacity': [row.capacity for row in rooms],
+            'instructor_id': instructor_ids,
+            'blocked_ptr': np.concatenate(([0], np.cumsum([len(b) for b in blocked], dtype=np.int64))),
+            'blocked_timeslot': [t for b in blocked for t in b],
+            'prereq_course': [course for course, _ in edges],
+            'prereq_required': [prereq for _, prereq in edges],
+            'done_ptr': np.concatenate(([0], np.cumsum([len(d) for d in done], dtype=np.int64))),
+            'done_course': [course for d in done for course in d],
+            'meta': np.frombuffer(json.dumps({
+                'semester': semester,
+                'created_at': datetime.utcnow().isoformat()
+            }).encode('utf-8'), dtype=np.uint8)
+        })
+        if plan:
+            problem.plan_sections()
+        return problem
+
+    def plan_sections(self):
+        """Split each course into sections by demand, 40 students per section
+        (1-5 sections), and place them
+
+        With rooms, sections are placed on (timeslot, room) pairs by
+        ``place_sections``; without, they keep the historical positional
+        layout.
+        """
+        demand = self.demand()
+        section_course, section_timeslot, section_capacity = [], [], []
+        num_timeslots = self.num_timeslots
+        for c in range(self.num_courses):
+            sections_needed = max(1, min(5, int(demand[c]) // 40))
+            capacity_per_section = int(self.course_capacity[c]) // sections_needed
+            course_id = int(self.course_id[c])
+            for i in range(sections_needed):
+                section_course.append(c)
+                # Positional slot choice, matching the historical layout
+                section_timeslot.append((course_id + i * 7) % num_timeslots)
+                section_capacity.append(capacity_per_section)
+        section_room = [-1] * len(section_course)
+        if self.num_rooms:
+            section_timeslot, section_room, section_capacity = place_sections(self, section_course,
+                                                                              section_capacity)
+        self.section_course = np.asarray(section_course, dtype='<i4')
+        self.section_timeslot = np.asarray(section_timeslot, dtype='<i4')
+        self.section_capacity = np.asarray(section_capacity, dtype='<i4')
+        self.section_room = np.asarray(section_room, dtype='<i4')
+
+    def load_sections(self, semester):
+        """Replace the planned sections with the saved sections of
+        ``semester`` (inside an app context); returns their Section ids"""
+        from app import db
+        from app.models.models import Section
+        from sqlalchemy import select
+
+        rows = db.session.execute(
+            select(Section.id, Section.course_id, Section.timeslot_id, Section.room_id, Section.capacity)
+            .where(Section.semester == semester).order_by(Section.course_id, Section.number)
+        ).all()
+        course_index = {course_id: c for c, course_id in enumerate(self.course_id.tolist())}
+        timeslot_index = {timeslot_id: t for t, timeslot_id in enumerate(self.timeslot_id.tolist())}
+        room_index = {room_id: r for r, room_id in enumerate(self.room_id.tolist())}
+        rows = [row for row in rows if row.course_id in course_index and row.timeslot_id in timeslot_index]
+        self.section_course = np.asarray([course_index[row.course_id] for row in rows], dtype='<i4')
+        self.section_timeslot = np.asarray([timeslot_index[row.timeslot_id] for row in rows], dtype='<i4')
+        self.section_capacity = np.asarray([row.capacity for row in rows], dtype='<i4')
+        self.section_room = np.asarray([room_index.get(row.room_id, -1) for row in rows], dtype='<i4')
+        return np.asarray([row.id for row in rows], dtype=np.int64)
+
+    # Persistence ---------------------------------------------------------
+
+    def save(self, path):
+        """Write the problem to ``path`` in the binary format"""
+        arrays = [(name, np.ascontiguousarray(getattr(self, name), dtype=dtype))
+                  for name, dtype in ARRAYS.items()]
+        offset = HEADER.size + ENTRY.size * len(arrays)
+        entries = []
+        for name, array in arrays:
+            offset = -(-offset // ALIGN) * ALIGN
+            entries.append((name, array, offset))
+            offset += array.nbytes
+
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(arrays)))
+            for name, array, start in entries:
+                f.write(ENTRY.pack(name.encode('ascii'), ARRAYS[name].encode('ascii'), start, len(array)))
+            for name, array, start in entries:
+                f.write(b'\0' * (start - f.tell()))
+                f.write(memoryview(array).cast('B'))
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map ``path``; arrays are read-only views into the file"""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(mapped) < HEADER.size:
+            raise ProblemFormatError(f'{path} is not a problem file')
+        magic, version, count = HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            raise ProblemFormatError(f'{path} is not a problem file')
+        if not 1 <= version <= VERSION:
+            raise ProblemFormatError(f'Unsupported problem file version {version}')
+
+        arrays = {}
+        for i in range(count):
+            raw_name, raw_dtype, offset, length = ENTRY.unpack_from(mapped, HEADER.size + i * ENTRY.size)
+            name = raw_name.rstrip(b'\0').decode('ascii')
+            dtype = np.dtype(raw_dtype.rstrip(b'\0').decode('ascii'))
+            if offset + length * dtype.itemsize > len(mapped):
+                raise ProblemFormatError(f'Array {name} runs past the end of {path}')
+            arrays[name] = np.frombuffer(mapped, dtype=dtype, count=length, offset=offset)
+        return cls(arrays, mapped=mapped)
+
+    def close(self):
+        """Release the file mapping; arrays must not be used afterwards"""
+        if self._mapped is not None:
+            for name in ARRAYS:
+                setattr(self, name, None)
+            self._mapped.close()
+            self._mapped = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,110 @@
+"""Statements and payloads of the hot read endpoints.
+
+The Flask routes run these statements on ``db.session``; the async read API
+(see app/asgi.py) runs the same ones on an async connection, so both return
+the same JSON and clients can be pointed at either.
+
+    timetables         materialized timetable blobs (StudentTimetable)
+    schedule_rows      the schedule join the timetables are built from
+    availability       seats, seat counters and free seats per section
+"""
+from collections import defaultdict
+import json
+
+from sqlalchemy import select, func
+
+from app.models.models import Schedule, Course, TimeSlot, Section, Room, StudentTimetable
+
+# Most students one batch lookup may ask for
+BATCH_LIMIT = 500
+
+def dumps(payload):
+    """JSON the way jsonify and the timetable read model write it"""
+    return json.dumps(payload, sort_keys=True, separators=(',', ':'))
+
+def timetables(student_ids):
+    return (select(StudentTimetable.student_id, StudentTimetable.entries)
+            .where(StudentTimetable.student_id.in_(student_ids)))
+
+def schedule_rows(student_ids):
+    return (
+        select(
+            Schedule.student_id,
+            Course.name,
+            Course.course_code,
+            TimeSlot.day,
+            TimeSlot.start_time,
+            TimeSlot.end_time,
+            # The placed section's room, or the timeslot's legacy label
+            func.coalesce(Room.name, TimeSlot.room).label('room')
+        )
+        .join(Course, Schedule.course_id == Course.id)
+        .join(TimeSlot, Schedule.timeslot_id == TimeSlot.id)
+        .outerjoin(Section, Schedule.section_id == Section.id)
+        .outerjoin(Room, Section.room_id == Room.id)
+        .where(Schedule.student_id.in_(student_ids))
+        .order_by(Schedule.student_id, Schedule.id)
+    )
+
+def timetable_entries(rows):
+    """student id -> timetable entries of ``schedule_rows`` results"""
+    entries = defaultdict(list)
+    for row in rows:
+        entries[row.student_id].append({
+            'course': row.name,
+            'course_code': row.course_code,
+            'day': row.day,
+            'start_time': str(row.start_time),
+            'end_time': str(row.end_time),
+            'room': row.room
+        })
+    return entries
+
+def batch_body(student_ids, blobs):
+    """JSON object of student id -> timetable, spliced from serialized
+    timetables without parsing them"""
+    return '{' + ','.join(f'"{student_id}":{blobs.get(student_id, "[]")}'
+                          for student_id in sorted(student_ids)) + '}'
+
+def parse_ids(raw):
+    """Student ids of a comma-separated ``ids`` argument"""
+    try:
+        ids = {int(part) for part in (raw or '').split(',') if part.strip()}
+    except ValueError:
+        raise ValueError('ids must be comma-separated integers') from None
+    if not ids:
+        raise ValueError('ids is required')
+    if len(ids) > BATCH_LIMIT:
+        raise ValueError(f'At most {BATCH_LIMIT} ids per request')
+    return ids
+
+def availability(semester, course_id=None):
+    query = (
+        select(Section.course_id, Course.course_code, Course.name, Section.id, Section.number,
+               Section.timeslot_id, Section.capacity, Section.enrolled)
+        .join(Course, Course.id == Section.course_id)
+        .where(Section.semester == semester)
+        .order_by(Section.course_id, Section.number, Section.id)
+    )
+    if course_id is not None:
+        query = query.where(Section.course_id == course_id)
+    return query
+
+def availability_payload(semester, rows):
+    courses = {}
+    for row in rows:
+        course = courses.get(row.course_id)
+        if course is None:
+            course = courses[row.course_id] = {
+                'id': row.course_id, 'code': row.course_code, 'name': row.name,
+                'capacity': 0, 'enrolled': 0, 'available': 0, 'sections': []
+            }
+        available = max(row.capacity - row.enrolled, 0)
+        course['sections'].append({
+            'id': row.id, 'number': row.number, 'timeslot_id': row.timeslot_id,
+            'capacity': row.capacity, 'enrolled': row.enrolled, 'available': available
+        })
+        course['capacity'] += row.capacity
+        course['enrolled'] += row.enrolled
+        course['available'] += available
+    return {'semester': semester, 'courses': list(courses.values())}
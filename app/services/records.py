@@ -0,0 +1,65 @@
+"""Slotted records for solver-side state.
+
+Schedulers work on these instead of mapped ``Student``/``Course``/``TimeSlot``
+instances. They are loaded with column-only queries, so nothing enters the
+session identity map, and a record is a few slots instead of an instance
+with its ``__dict__`` and ``InstanceState``. ORM objects are only created
+where schedules are written back.
+"""
+from app.models.models import Student, Course, TimeSlot, CoursePreference, Schedule
+from app import db
+from sqlalchemy import select
+from collections import defaultdict
+
+class Record:
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+class StudentRecord(Record):
+    __slots__ = ('id', 'name')
+
+class CourseRecord(Record):
+    __slots__ = ('id', 'course_code', 'name', 'capacity', 'duration_minutes')
+
+class TimeSlotRecord(Record):
+    __slots__ = ('id', 'day', 'start_time', 'end_time')
+
+class ScheduleRecord(Record):
+    __slots__ = ('student_id', 'course_id', 'timeslot_id')
+
+def load_students(limit=None):
+    query = select(Student.id, Student.name).order_by(Student.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return [StudentRecord(*row) for row in db.session.execute(query)]
+
+def load_courses():
+    query = select(Course.id, Course.course_code, Course.name, Course.capacity,
+                   Course.duration_minutes).order_by(Course.id)
+    return [CourseRecord(*row) for row in db.session.execute(query)]
+
+def load_timeslots():
+    query = select(TimeSlot.id, TimeSlot.day, TimeSlot.start_time, TimeSlot.end_time).order_by(TimeSlot.id)
+    return [TimeSlotRecord(*row) for row in db.session.execute(query)]
+
+def load_schedules(semester):
+    query = select(Schedule.student_id, Schedule.course_id, Schedule.timeslot_id).where(Schedule.semester == semester)
+    return [ScheduleRecord(*row) for row in db.session.execute(query)]
+
+def load_preferences(student_ids=None):
+    """student id -> [(course id, priority)] sorted by priority"""
+    query = select(CoursePreference.student_id, CoursePreference.course_id, CoursePreference.priority) \
+        .order_by(CoursePreference.student_id, CoursePreference.priority, CoursePreference.id)
+    if student_ids is not None:
+        query = query.where(CoursePreference.student_id.in_(student_ids))
+    preferences = defaultdict(list)
+    for student_id, course_id, priority in db.session.execute(query):
+        preferences[student_id].append((course_id, priority))
+    return preferences
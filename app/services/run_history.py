@@ -0,0 +1,146 @@
+from app.models.models import OptimizationRun
+from app import db
+from datetime import datetime
+from collections import defaultdict
+
+# Trend metrics backed by a column; anything else is looked up as a stage name
+# ('stage.solve') or a solver counter ('counter.num_conflicts')
+TREND_COLUMNS = ('solve_time', 'wall_time', 'objective_value', 'assignments')
+
+# Statuses of runs that saved a schedule; failed and infeasible runs leave
+# the published one in place
+PUBLISHED_STATUSES = ('OPTIMAL', 'FEASIBLE')
+
+class RunHistoryService:
+    """Persists optimization runs and answers history and trend queries"""
+
+    def record(self, semester, engine, status, started_at, parameters=None, stats=None,
+               trajectory=None, num_courses=None, num_sections=None):
+        """Store one run; ``stats`` is the engine's solution_stats dict"""
+        stats = stats or {}
+        counters = stats.get('counters') or {}
+        run = OptimizationRun(
+            semester=semester,
+            engine=engine,
+            status=status,
+            started_at=started_at,
+            finished_at=datetime.utcnow(),
+            num_students=counters.get('students'),
+            num_courses=num_courses if num_courses is not None else counters.get('courses'),
+            num_sections=num_sections if num_sections is not None else counters.get('sections'),
+            assignments=counters.get('assignments', 0),
+            objective_value=stats.get('objective_value'),
+            solve_time=stats.get('solve_time'),
+            wall_time=stats.get('wall_time', counters.get('solver_wall_time')),
+            parameters=parameters or {},
+            stage_timings=stats.get('stages') or {},
+            counters=counters,
+            objective_trajectory=trajectory or []
+        )
+        db.session.add(run)
+        db.session.commit()
+        return run
+
+    def _filtered(self, semester=None, engine=None, status=None):
+        query = OptimizationRun.query
+        if semester:
+            query = query.filter(OptimizationRun.semester == semester)
+        if engine:
+            query = query.filter(OptimizationRun.engine == engine)
+        if status:
+            query = query.filter(OptimizationRun.status == status)
+        return query
+
+    def latest(self, semester=None, engine=None):
+        return self._filtered(semester, engine).order_by(
+            OptimizationRun.started_at.desc(), OptimizationRun.id.desc()
+        ).first()
+
+    def published_version(self, semester):
+        """Id of the run that wrote the semester's current schedule (its
+        latest run that saved one), or None before any such run"""
+        run = self._filtered(semester).filter(OptimizationRun.status.in_(PUBLISHED_STATUSES)).order_by(
+            OptimizationRun.started_at.desc(), OptimizationRun.id.desc()
+        ).first()
+        return run.id if run else None
+
+    def history(self, semester=None, engine=None, status=None, since=None, limit=50, before_id=None):
+        """Most recent runs first; page with ``before_id``"""
+        query = self._filtered(semester, engine, status)
+        if since:
+            query = query.filter(OptimizationRun.started_at >= since)
+        if before_id:
+            query = query.filter(OptimizationRun.id < before_id)
+        return query.order_by(OptimizationRun.started_at.desc(), OptimizationRun.id.desc()) \
+            .limit(limit).all()
+
+    def trend(self, metric='solve_time', semester=None, engine=None, since=None):
+        """Chronological series of ``metric`` plus per-cohort-size aggregates"""
+        query = self._filtered(semester, engine)
+        if since:
+            query = query.filter(OptimizationRun.started_at >= since)
+        runs = query.order_by(OptimizationRun.started_at).all()
+
+        series = []
+        by_size = defaultdict(list)
+        for run in runs:
+            value = self._metric_value(run, metric)
+            if value is None:
+                continue
+            series.append({
+                'run_id': run.id,
+                'started_at': run.started_at.isoformat(),
+                'semester': run.semester,
+                'engine': run.engine,
+                'num_students': run.num_students,
+                'value': value
+            })
+            by_size[run.num_students].append(value)
+
+        return {
+            'metric': metric,
+            'series': series,
+            'by_cohort_size': [{
+                'num_students': size,
+                'runs': len(values),
+                'min': min(values),
+                'max': max(values),
+                'mean': round(sum(values) / len(values), 4),
+                'latest': values[-1]
+            } for size, values in sorted(by_size.items(), key=lambda item: item[0] or 0)]
+        }
+
+    @staticmethod
+    def _metric_value(run, metric):
+        if metric in TREND_COLUMNS:
+            return getattr(run, metric)
+        kind, _, name = metric.partition('.')
+        if kind == 'stage':
+            return (run.stage_timings or {}).get(name)
+        if kind == 'counter':
+            return (run.counters or {}).get(name)
+        raise ValueError(f'Unknown trend metric: {metric}')
+
+    @staticmethod
+    def serialize(run, include_trajectory=False):
+        data = {
+            'id': run.id,
+            'semester': run.semester,
+            'engine': run.engine,
+            'status': run.status,
+            'started_at': run.started_at.isoformat() if run.started_at else None,
+            'finished_at': run.finished_at.isoformat() if run.finished_at else None,
+            'num_students': run.num_students,
+            'num_courses': run.num_courses,
+            'num_sections': run.num_sections,
+            'assignments': run.assignments,
+            'objective_value': run.objective_value,
+            'solve_time': run.solve_time,
+            'wall_time': run.wall_time,
+            'parameters': run.parameters,
+            'stages': run.stage_timings,
+            'counters': run.counters
+        }
+        if include_trajectory:
+            data['objective_trajectory'] = run.objective_trajectory
+        return data
@@ -1,309 +1,531 @@
 from ortools.sat.python import cp_model
-from app.models.models import Student, Course, TimeSlot, CoursePreference, Schedule
+from app.models.models import Schedule, Section, WaitlistEntry
+from app.services.timetable_service import TimetableService
+from app.services.run_history import RunHistoryService
+from app.services.verification_service import VerificationService
+from app.services.problem import Problem
+from app.services.aggregation import student_groups, split_group
+from app.services.overlap import OverlapIndex
+from app.services.prerequisites import compile_prerequisites
+from app.services.snapshot import ScheduleSnapshot
+from app.services.waitlist import WaitlistService
+from app.services.enrollment import record_change
+from app.utils.instrumentation import RunInstrumentation, metrics
 from app import db
+from flask import current_app
 import logging
 import time
+from datetime import datetime
 from collections import defaultdict
+from sqlalchemy import insert, select, update, func
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Floor on the time left for a re-solve of unsplit groups
+MIN_RETRY_SECONDS = 1.0
+
 class SchedulerService:
-    def __init__(self):
+    engine_name = 'cp_sat'
+    
+    def __init__(self, max_time_in_seconds=60.0, num_search_workers=4, log_search_progress=True, aggregate=True):
         self.model = None
         self.solver = None
         self.solution_stats = {}
+        self.max_time_in_seconds = max_time_in_seconds
+        self.num_search_workers = num_search_workers
+        self.log_search_progress = log_search_progress
+        # Model students with identical preferences as one group (see aggregation.py)
+        self.aggregate = aggregate
+        self.last_run = None
+        
+    def optimize_schedules(self, semester, problem=None):
+        """Full-scale OR-Tools optimization for 500 students
+        
+        ``problem`` is an optional Problem (or path to a problem file) to
+        solve instead of snapshotting the database; results are still saved
+        to the database under ``semester``. A problem file is unmapped again
+        once the run is saved.
+        """
+        if isinstance(problem, str):
+            with Problem.load(problem) as loaded:
+                return self.optimize_schedules(semester, problem=loaded)
         
-    def optimize_schedules(self, semester):
-        """Full-scale OR-Tools optimization for 500 students"""
         start_time = time.time()
+        started_at = datetime.utcnow()
+        run = RunInstrumentation()
         logger.info("Starting full-scale OR-Tools optimization for 500 students...")
         
-        # Clear existing schedules
+        # Clear existing schedules, their sections and the waitlists
         Schedule.query.filter_by(semester=semester).delete()
+        Section.query.filter_by(semester=semester).delete()
+        WaitlistEntry.query.filter_by(semester=semester).delete()
         db.session.commit()
+        run.lap('clear')
+        
+        # Get ALL students - full 500
+        if problem is None:
+            problem = Problem.from_database(semester, plan=False)
+        student_ids = problem.student_id.tolist()
+        
+        run.lap('load')
+        
+        result = self.solve_problem(problem, run)
+        solve_time = time.time() - start_time
+        
+        if result['feasible']:
+            schedules = result['assignments']
+            sections = save_sections(semester, problem)
+            save_assignments(semester, schedules, sections=sections)
+            run.lap('persist')
+            
+            WaitlistService().build(semester, problem, schedules)
+            run.lap('waitlist')
+            
+            self._refresh_timetables(student_ids)
+            run.lap('read_model')
+            
+            # Store detailed statistics
+            self.solution_stats = {
+                'status': result['status'],
+                'objective_value': result['objective_value'],
+                'solve_time': solve_time,
+                'build_time': result['build_time'],
+                'persist_time': run.stages['persist'],
+                'num_conflicts': self.solver.NumConflicts(),
+                'num_branches': self.solver.NumBranches(),
+                'wall_time': self.solver.WallTime(),
+                'assignments_made': len(schedules),
+                'students_processed': len(student_ids),
+                'distribution': result['distribution'],
+                'solution_count': result['solution_count'],
+                **run.as_dict()
+            }
+            run.log()
+            metrics.observe_run(run, self.solution_stats['status'])
+            self._record_run(semester, started_at, result['trajectory'])
+            
+            logger.info(f"Optimization complete: {len(schedules)} assignments in {solve_time:.2f}s")
+            return schedules
+            
+        else:
+            # The semester was already cleared, so the read model must follow;
+            # no schedule was published, so count the clearing as a live write
+            record_change(semester)
+            self._refresh_timetables(student_ids)
+            run.lap('read_model')
+            self.solution_stats = {
+                'status': result['status'],
+                'solve_time': solve_time,
+                'build_time': result['build_time'],
+                'error': 'No feasible solution found',
+                **run.as_dict()
+            }
+            run.log()
+            metrics.observe_run(run, self.solution_stats['status'])
+            self._record_run(semester, started_at, result['trajectory'])
+            return []
+    
+    def solve_problem(self, problem, run=None, hint=None):
+        """Build and solve the CP-SAT model for ``problem`` without touching the database
+        
+        ``hint`` is an optional known solution as (student index, section
+        index) arrays, e.g. the published schedule, to start the search from.
+        Returns a dict with the solver status, objective, statistics and the
+        chosen (student id, course id, timeslot id) assignments, also as
+        (student index, section index) arrays under ``rows``/``sections``.
+        """
+        run = run or RunInstrumentation()
         
         # Initialize OR-Tools
         self.model = cp_model.CpModel()
         self.solver = cp_model.CpSolver()
         
-        # Get ALL students - full 500
-        students = Student.query.all()
-        courses = Course.query.all()
-        timeslots = TimeSlot.query.all()
+        student_ids = problem.student_id.tolist()
+        course_ids = problem.course_id.tolist()
+        timeslot_ids = problem.timeslot_id.tolist()
         
-        logger.info(f"Optimizing for {len(students)} students, {len(courses)} courses, {len(timeslots)} timeslots")
+        run.count('students', len(student_ids))
+        run.count('courses', len(course_ids))
+        run.count('timeslots', len(timeslot_ids))
+        
+        logger.info(f"Optimizing for {len(student_ids)} students, {len(course_ids)} courses, {len(timeslot_ids)} timeslots")
         
         # Create realistic course sections
         # Large courses get multiple sections at different times
-        course_sections = {}
-        section_capacity = {}
-        section_timeslots = {}
-        
-        section_id = 0
-        for course in courses:
-            course_sections[course.id] = []
+        if not problem.num_sections:
+            problem.plan_sections()
+        
+        # Sections are numbered from 1 in course order; per-section state is
+        # kept in lists indexed by section number - 1
+        section_course = [course_ids[c] for c in problem.section_course.tolist()]
+        section_capacity = problem.section_capacity.tolist()
+        num_sections = len(section_course)
+        course_sections = defaultdict(list)
+        for sec, course_id in enumerate(section_course, start=1):
+            course_sections[course_id].append(sec)
+        
+        logger.info(f"Created {num_sections} course sections")
+        run.lap('section_planning')
+        run.count('sections', num_sections)
+        
+        # Prerequisites: eligible courses and the edges that still need a
+        # constraint, per student, before any variables exist
+        eligible, pending = compile_prerequisites(problem)
+        edges = [(course_ids[c], course_ids[p])
+                 for c, p in zip(problem.prereq_course.tolist(), problem.prereq_required.tolist())]
+        eligible_sections = eligible[:, problem.section_course]
+        run.lap('prerequisites')
+        run.count('pending_prerequisites', int(pending.sum()))
+        
+        # Students with identical preferences and eligibility are
+        # interchangeable, so each group gets one row of per-section counts
+        # instead of a row per student
+        if self.aggregate:
+            signature = np.packbits(np.concatenate([eligible_sections, pending], axis=1), axis=1)
+            groups = student_groups(problem, eligibility=[row.tobytes() for row in signature])
+        else:
+            groups = [[i] for i in range(len(student_ids))]
+        # Sections that meet at overlapping times, as maximal cliques (numbered
+        # from 1) for the model and as connected components for splitting
+        overlaps = OverlapIndex.for_sections(problem)
+        time_groups = [[sec + 1 for sec in clique] for clique in overlaps.cliques]
+        section_time = overlaps.components().tolist()
+        
+        # Re-solves after a failed split share the one time budget
+        deadline = time.time() + self.max_time_in_seconds
+        retries = 0
+        while True:
+            run.count('student_groups', len(groups))
+            run.count('compression_ratio', round(len(student_ids) / len(groups), 2) if groups else 1.0)
+            logger.info(f"Aggregated {len(student_ids)} students into {len(groups)} groups")
+            # Candidate sections (numbered from 1) and pending prerequisite
+            # pairs of each group, taken from its first member
+            candidates = [(np.flatnonzero(eligible_sections[group[0]]) + 1).tolist() for group in groups]
+            requires = [[edge for edge, needed in zip(edges, pending[group[0]].tolist()) if needed]
+                        for group in groups]
+            x = self._build_model(problem, groups, candidates, requires, section_course, section_capacity,
+                                  time_groups, course_sections, run)
+            if hint is not None:
+                self._add_hint(groups, x, hint)
             
-            # Calculate number of sections based on demand
-            demand = CoursePreference.query.filter_by(course_id=course.id).count()
-            sections_needed = max(1, min(5, demand // 40))  # 40 students per section max
+            # SOLVE
+            logger.info("Solving optimization problem...")
             
-            capacity_per_section = course.capacity // sections_needed
+            # Set solver parameters for large problem; a re-solve gets what
+            # is left of the budget, but always long enough to find the hint
+            self.solver.parameters.max_time_in_seconds = max(
+                deadline - time.time(), min(MIN_RETRY_SECONDS, self.max_time_in_seconds))
+            self.solver.parameters.num_search_workers = self.num_search_workers
+            self.solver.parameters.log_search_progress = self.log_search_progress
             
-            for i in range(sections_needed):
-                section_id += 1
-                course_sections[course.id].append(section_id)
-                section_capacity[section_id] = capacity_per_section
-                # Assign different timeslots to different sections
-                section_timeslots[section_id] = timeslots[(course.id + i * 7) % len(timeslots)]
-        
-        logger.info(f"Created {section_id} course sections")
+            # Add solution callback
+            # Rows were created consecutively: the candidates of all groups
+            # form one block of variables
+            cand_ptr = np.concatenate(([0], np.cumsum([len(c) for c in candidates], dtype=np.int64)))
+            first_variable = next((next(iter(row.values())).Index() for row in x if row), 0)
+            variables = range(first_variable, first_variable + int(cand_ptr[-1]))
+            solution_printer = SolutionPrinter(variables, len(student_ids))
+            build_time = sum(run.stages[stage] for stage in ('variables', 'constraints', 'objective'))
+            status = self.solver.Solve(self.model, solution_printer)
+            run.lap('solve')
+            run.count('solver_wall_time', round(self.solver.WallTime(), 4))
+            run.count('num_branches', self.solver.NumBranches())
+            run.count('num_conflicts', self.solver.NumConflicts())
+            run.count('solution_count', solution_printer.solution_count)
+            
+            result = {
+                'feasible': status in (cp_model.OPTIMAL, cp_model.FEASIBLE),
+                'status': self.solver.StatusName(status),
+                'build_time': build_time,
+                'solution_count': solution_printer.solution_count,
+                'trajectory': solution_printer.trajectory,
+                'assignments': [],
+                'rows': np.empty(0, dtype=np.int64),
+                'sections': np.empty(0, dtype=np.int64),
+                'distribution': {}
+            }
+            
+            # EXTRACT SOLUTION
+            if not result['feasible']:
+                logger.error(f"No solution found. Status: {result['status']}")
+                return result
+            
+            logger.info(f"Solution found! Status: {result['status']}")
+            
+            # Read the whole solution once and walk only the candidate block
+            solution = np.asarray(self.solver.ResponseProto().solution[variables.start:variables.stop],
+                                  dtype=np.int64)
+            rows, secs, unsplit = self._split_groups(groups, solution, cand_ptr, candidates,
+                                                     section_course, section_time, requires)
+            if not unsplit:
+                break
+            # A split fails only on prerequisite pairs the seat swaps cannot
+            # repair or on an overlap component that is not a clique; solve
+            # those groups per student, starting from the members already split
+            retries += 1
+            run.count('retries', retries)
+            logger.warning(f"{len(unsplit)} student groups could not be split; solving them per student")
+            unsplit = set(unsplit)
+            groups = ([group for k, group in enumerate(groups) if k not in unsplit]
+                      + [[i] for k in sorted(unsplit) for i in groups[k]])
+            hint = (rows, secs)
+        
+        assignment_courses = problem.section_course[secs]
+        assignments = list(zip(
+            problem.student_id[rows].tolist(),
+            problem.course_id[assignment_courses].tolist(),
+            problem.timeslot_id[problem.section_timeslot[secs]].tolist()
+        ))
+        distribution = assignment_distribution(problem, rows, assignment_courses)
+        
+        run.lap('extraction')
+        run.count('assignments', len(assignments))
+        
+        result.update(
+            objective_value=self.solver.ObjectiveValue(),
+            assignments=assignments,
+            rows=rows,
+            sections=secs,
+            distribution=distribution
+        )
+        return result
+    
+    def _build_model(self, problem, groups, candidates, requires, section_course, section_capacity,
+                     time_groups, course_sections, run):
+        """CP-SAT model with one row of candidate-section variables per student group
+        
+        A group of n students takes a section between 0 and n times; for a
+        single student the row is the usual 0/1 assignment. ``requires`` holds
+        each group's pending (course id, prerequisite id) pairs and
+        ``time_groups`` the maximal cliques of overlapping sections.
+        """
+        self.model = cp_model.CpModel()
+        student_ids = problem.student_id
+        course_ids = problem.course_id.tolist()
         
         # DECISION VARIABLES
-        # x[s,sec] = 1 if student s is assigned to section sec
-        x = {}
-        for s in students:
-            for c_id, sections in course_sections.items():
-                for sec in sections:
-                    var_name = f'x[{s.id},{sec}]'
-                    x[s.id, sec] = self.model.NewBoolVar(var_name)
-        
-        # Helper: map section to course
-        section_to_course = {}
-        for c_id, sections in course_sections.items():
-            for sec in sections:
-                section_to_course[sec] = c_id
+        # x[g][sec] = number of students of group g assigned to section sec
+        x = []
+        for group, secs in zip(groups, candidates):
+            s_id, size = int(student_ids[group[0]]), len(group)
+            if size == 1:
+                x.append({sec: self.model.NewBoolVar(f'x[{s_id},{sec}]') for sec in secs})
+            else:
+                x.append({sec: self.model.NewIntVar(0, size, f'y[{s_id}+{size - 1},{sec}]') for sec in secs})
+        
+        run.lap('variables')
+        run.count('variables', sum(len(row) for row in x))
         
         # CONSTRAINTS
         
         # 1. Student takes at most one section of each course
-        for s in students:
+        for group, row in zip(groups, x):
             for c_id, sections in course_sections.items():
-                self.model.Add(
-                    sum(x[s.id, sec] for sec in sections) <= 1
-                )
+                terms = [row[sec] for sec in sections if sec in row]
+                if terms:
+                    self.model.Add(sum(terms) <= len(group))
         
         # 2. Time conflict constraints
         logger.info("Adding time conflict constraints...")
-        for s in students:
-            # Group sections by time
-            time_groups = defaultdict(list)
-            for sec, ts in section_timeslots.items():
-                time_key = (ts.day, ts.start_time, ts.end_time)
-                time_groups[time_key].append(sec)
-            
-            # Student can take at most one section at each time
-            for time_key, sections in time_groups.items():
-                if len(sections) > 1:
-                    self.model.Add(
-                        sum(x.get((s.id, sec), 0) for sec in sections) <= 1
-                    )
+        for group, row in zip(groups, x):
+            # Student can take at most one section of each set of mutually
+            # overlapping sections
+            for sections in time_groups:
+                terms = [row[sec] for sec in sections if sec in row]
+                if len(terms) > 1:
+                    self.model.Add(sum(terms) <= len(group))
         
         # 3. Section capacity constraints
         logger.info("Adding capacity constraints...")
-        for sec, capacity in section_capacity.items():
-            self.model.Add(
-                sum(x.get((s.id, sec), 0) for s in students) <= capacity
-            )
+        for sec, capacity in enumerate(section_capacity, start=1):
+            terms = [row[sec] for row in x if sec in row]
+            if terms:
+                self.model.Add(sum(terms) <= capacity)
         
         # 4. Student course load constraints (3-5 courses)
         logger.info("Adding course load constraints...")
-        for s in students:
-            total_courses = sum(x.get((s.id, sec), 0) for sec in section_capacity.keys())
-            self.model.Add(total_courses >= 3)
-            self.model.Add(total_courses <= 5)
-        
-        # 5. Prerequisite constraints (example: CS201 requires CS101)
-        cs101 = next((c for c in courses if c.course_code == 'CS101'), None)
-        cs201 = next((c for c in courses if c.course_code == 'CS201'), None)
-        
-        if cs101 and cs201:
-            for s in students:
-                # If taking CS201, must also take CS101
-                for sec201 in course_sections[cs201.id]:
+        for group, row in zip(groups, x):
+            total_courses = sum(row.values())
+            self.model.Add(total_courses >= 3 * len(group))
+            self.model.Add(total_courses <= 5 * len(group))
+        
+        # 5. Prerequisite constraints, only where they are pending: taking
+        # the course requires taking the prerequisite too, so a group has no
+        # more members in the course than in its prerequisite
+        for pairs, row in zip(requires, x):
+            for course, prereq in pairs:
+                taking = [row[sec] for sec in course_sections[course] if sec in row]
+                if taking:
                     self.model.Add(
-                        x.get((s.id, sec201), 0) <= 
-                        sum(x.get((s.id, sec101), 0) for sec101 in course_sections[cs101.id])
+                        sum(taking) <=
+                        sum(row[pre] for pre in course_sections[prereq] if pre in row)
                     )
         
+        run.lap('constraints')
+        run.count('constraints', len(self.model.Proto().constraints))
+        
         # OBJECTIVE FUNCTION
         logger.info("Setting up objective function...")
         objective_terms = []
         
-        # Get all preferences
-        pref_lookup = defaultdict(dict)
-        for pref in CoursePreference.query.all():
-            pref_lookup[pref.student_id][pref.course_id] = pref.priority
-        
-        # Build objective
-        for s in students:
-            for sec, course_id in section_to_course.items():
-                if course_id in pref_lookup[s.id]:
-                    priority = pref_lookup[s.id][course_id]
+        # Build objective; a group's priorities are read from the problem
+        # arrays of its first member
+        for group, row in zip(groups, x):
+            priorities = {course_ids[c]: priority for c, priority in problem.preferences(group[0])}
+            for sec, var in row.items():
+                course_id = section_course[sec - 1]
+                if course_id in priorities:
                     # Weighted by priority: 1st=10, 2nd=6, 3rd=3, 4th=1, 5th=0
-                    weight = max(0, 11 - 2 * priority)
-                    objective_terms.append(weight * x.get((s.id, sec), 0))
+                    weight = max(0, 11 - 2 * priorities[course_id])
+                    objective_terms.append(weight * var)
                 else:
                     # Small penalty for non-preferred courses
-                    objective_terms.append(-2 * x.get((s.id, sec), 0))
+                    objective_terms.append(-2 * var)
         
         self.model.Maximize(sum(objective_terms))
-        
-        # SOLVE
-        logger.info("Solving optimization problem...")
-        
-        # Set solver parameters for large problem
-        self.solver.parameters.max_time_in_seconds = 60.0  # Allow more time for 500 students
-        self.solver.parameters.num_search_workers = 4
-        self.solver.parameters.log_search_progress = True
-        
-        # Add solution callback
-        solution_printer = SolutionPrinter(students, section_to_course, x, len(students))
-        status = self.solver.Solve(self.model, solution_printer)
-        
-        solve_time = time.time() - start_time
-        
-        # EXTRACT SOLUTION
-        if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
-            logger.info(f"Solution found! Status: {self.solver.StatusName(status)}")
-            
-            schedules = []
-            stats = defaultdict(int)
-            
-            for s in students:
-                student_sections = []
-                for sec in section_capacity.keys():
-                    if (s.id, sec) in x and self.solver.Value(x[s.id, sec]) == 1:
-                        student_sections.append(sec)
-                        course_id = section_to_course[sec]
-                        
-                        schedule = Schedule(
-                            student_id=s.id,
-                            course_id=course_id,
-                            timeslot_id=section_timeslots[sec].id,
-                            semester=semester
-                        )
-                        schedules.append(schedule)
-                        
-                        # Track statistics
-                        if course_id in pref_lookup[s.id]:
-                            priority = pref_lookup[s.id][course_id]
-                            stats[f'priority_{priority}'] += 1
-                        else:
-                            stats['unpreferred'] += 1
-                
-                stats[f'load_{len(student_sections)}'] += 1
-            
-            # Save schedules in batches
-            if schedules:
-                for i in range(0, len(schedules), 1000):
-                    batch = schedules[i:i+1000]
-                    db.session.bulk_save_objects(batch)
-                    db.session.commit()
-            
-            # Store detailed statistics
-            self.solution_stats = {
-                'status': self.solver.StatusName(status),
-                'objective_value': self.solver.ObjectiveValue(),
-                'solve_time': solve_time,
-                'num_conflicts': self.solver.NumConflicts(),
-                'num_branches': self.solver.NumBranches(),
-                'wall_time': self.solver.WallTime(),
-                'assignments_made': len(schedules),
-                'students_processed': len(students),
-                'distribution': dict(stats),
-                'solution_count': solution_printer.solution_count
-            }
-            
-            logger.info(f"Optimization complete: {len(schedules)} assignments in {solve_time:.2f}s")
-            return schedules
-            
-        else:
-            logger.error(f"No solution found. Status: {self.solver.StatusName(status)}")
-            self.solution_stats = {
-                'status': self.solver.StatusName(status),
-                'solve_time': solve_time,
-                'error': 'No feasible solution found'
-            }
-            return []
+        run.lap('objective')
+        run.count('objective_terms', len(objective_terms))
+        return x
+    
+    def _add_hint(self, groups, x, hint):
+        """Hint every variable with how many of its group's members take the
+        section in ``hint`` (student index, section index) arrays"""
+        taken = defaultdict(list)
+        for row, sec in zip(*(np.asarray(a).tolist() for a in hint)):
+            taken[row].append(sec + 1)
+        for group, row in zip(groups, x):
+            counts = defaultdict(int)
+            for member in group:
+                for sec in taken[member]:
+                    counts[sec] += 1
+            for sec, var in row.items():
+                self.model.AddHint(var, counts[sec])
+    
+    @staticmethod
+    def _split_groups(groups, solution, cand_ptr, candidates, section_course, section_time, requires):
+        """(student index, section index) arrays in student order from the
+        per-group candidate counts, and the groups that could not be split"""
+        sizes = np.fromiter(map(len, groups), dtype=np.int64, count=len(groups))
+        first = np.fromiter((group[0] for group in groups), dtype=np.int64, count=len(groups))
+        cand_group = np.repeat(np.arange(len(groups)), np.diff(cand_ptr))
+        cand_sec = np.fromiter((sec - 1 for secs in candidates for sec in secs), dtype=np.int64,
+                               count=len(solution))
+        
+        # Singletons read straight off the solution
+        taken = (solution > 0) & (sizes[cand_group] == 1)
+        rows, cols = [first[cand_group[taken]]], [cand_sec[taken]]
+        
+        unsplit = []
+        for k in np.flatnonzero(sizes > 1).tolist():
+            start, stop = cand_ptr[k], cand_ptr[k + 1]
+            counts = {int(cand_sec[i]): int(solution[i]) for i in range(start, stop) if solution[i]}
+            members = split_group(counts, len(groups[k]), section_course, section_time, requires[k])
+            if members is None:
+                unsplit.append(k)
+                continue
+            for student, member_secs in zip(groups[k], members):
+                rows.append(np.full(len(member_secs), student, dtype=np.int64))
+                cols.append(np.asarray(member_secs, dtype=np.int64))
+        
+        rows, cols = np.concatenate(rows), np.concatenate(cols)
+        order = np.lexsort((cols, rows))
+        return rows[order], cols[order], unsplit
+    
+    def _record_run(self, semester, started_at, trajectory):
+        """Persist this run so its statistics outlive the service instance"""
+        self.last_run = RunHistoryService().record(
+            semester=semester,
+            engine=self.engine_name,
+            status=self.solution_stats['status'],
+            started_at=started_at,
+            parameters={
+                'max_time_in_seconds': self.max_time_in_seconds,
+                'num_search_workers': self.num_search_workers,
+                'aggregate': self.aggregate
+            },
+            stats=self.solution_stats,
+            trajectory=trajectory
+        )
+    
+    def _refresh_timetables(self, student_ids):
+        """Rebuild the StudentTimetable read model for the optimized cohort"""
+        if current_app.config.get('TIMETABLE_READ_MODEL'):
+            TimetableService().rebuild(student_ids)
+    
+    def _last_recorded_stats(self, semester):
+        run = RunHistoryService().latest(semester=semester)
+        return RunHistoryService.serialize(run) if run else {}
     
     def calculate_metrics(self, semester):
         """Comprehensive metrics for 500 students"""
-        schedules = Schedule.query.filter_by(semester=semester).all()
-        all_students = Student.query.all()
+        snapshot = ScheduleSnapshot.load(semester)
         
-        if not schedules:
+        if not snapshot.schedules:
             return {'error': 'No schedules found'}
         
         # Initialize metrics
         metrics = defaultdict(lambda: defaultdict(int))
+        day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
         
         # Process each student
-        for student in all_students:
-            student_schedules = [s for s in schedules if s.student_id == student.id]
-            prefs = CoursePreference.query.filter_by(student_id=student.id).all()
-            pref_map = {p.course_id: p.priority for p in prefs}
+        for student_id, prefs, scheduled, entries in snapshot.iter_students():
+            pref_map = dict(prefs)
             
             # Course load
-            course_count = len(student_schedules)
-            metrics['course_load'][course_count] += 1
+            metrics['course_load'][len(entries)] += 1
             
             # Satisfaction analysis
-            for sched in student_schedules:
-                if sched.course_id in pref_map:
-                    priority = pref_map[sched.course_id]
-                    metrics['satisfaction'][f'priority_{priority}'] += 1
+            for course_id, _ in entries:
+                if course_id in pref_map:
+                    metrics['satisfaction'][f'priority_{pref_map[course_id]}'] += 1
                 else:
                     metrics['satisfaction']['unpreferred'] += 1
             
             # Check if got first choice
-            if prefs and student_schedules:
-                first_choices = [p.course_id for p in prefs if p.priority == 1]
-                got_first = any(s.course_id in first_choices for s in student_schedules)
+            if prefs and entries:
+                got_first = any(priority == 1 and course_id in scheduled for course_id, priority in prefs)
                 metrics['first_choice']['got_first' if got_first else 'no_first'] += 1
             
             # Time utilization
-            for sched in student_schedules:
-                ts = TimeSlot.query.get(sched.timeslot_id)
-                day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-                day = day_names[ts.day] if ts.day < 5 else f'Day{ts.day}'
-                time_slot = f"{day} {ts.start_time}"
-                metrics['time_distribution'][time_slot] += 1
+            for _, timeslot_id in entries:
+                day_index, start_time = snapshot.timeslots[timeslot_id][:2]
+                day = day_names[day_index] if day_index < 5 else f'Day{day_index}'
+                metrics['time_distribution'][f"{day} {start_time}"] += 1
         
         # Calculate conflict rate
-        conflicts = 0
-        for student in all_students:
-            student_times = defaultdict(list)
-            for s in [s for s in schedules if s.student_id == student.id]:
-                ts = TimeSlot.query.get(s.timeslot_id)
-                student_times[(ts.day, ts.start_time)].append(s)
-            
-            for times, scheds in student_times.items():
-                if len(scheds) > 1:
-                    conflicts += 1
-                    break
+        conflict_summary = VerificationService().summarize(semester, examples=0)
+        conflicts = conflict_summary['students_with_conflicts']
         
         # Course utilization
+        enrolled = defaultdict(int)
+        for entries in snapshot.schedules.values():
+            for course_id, _ in entries:
+                enrolled[course_id] += 1
+        demand = defaultdict(int)
+        total_by_priority = defaultdict(int)
+        for prefs in snapshot.preferences.values():
+            for course_id, priority in prefs:
+                demand[course_id] += 1
+                total_by_priority[priority] += 1
+        
         course_stats = {}
-        for course in Course.query.all():
-            enrolled = len([s for s in schedules if s.course_id == course.id])
-            demand = CoursePreference.query.filter_by(course_id=course.id).count()
-            course_stats[course.name] = {
-                'enrolled': enrolled,
-                'capacity': course.capacity,
-                'demand': demand,
-                'utilization': round(enrolled / course.capacity * 100, 1),
-                'demand_ratio': round(demand / course.capacity, 2)
+        for course_id in sorted(snapshot.courses):
+            _, name, capacity = snapshot.courses[course_id]
+            course_stats[name] = {
+                'enrolled': enrolled[course_id],
+                'capacity': capacity,
+                'demand': demand[course_id],
+                'utilization': round(enrolled[course_id] / capacity * 100, 1),
+                'demand_ratio': round(demand[course_id] / capacity, 2)
             }
         
         # Compile final metrics
-        total_students = len(all_students)
-        students_scheduled = len(set(s.student_id for s in schedules))
+        total_students = len(snapshot.students)
+        students_scheduled = len(snapshot.schedules)
+        total_assignments = sum(enrolled.values())
         
         # Satisfaction rates by priority
-        total_by_priority = defaultdict(int)
-        for pref in CoursePreference.query.all():
-            total_by_priority[pref.priority] += 1
-        
         satisfaction_rates = {}
         for priority in range(1, 6):
             satisfied = metrics['satisfaction'].get(f'priority_{priority}', 0)
@@ -319,11 +541,11 @@ class SchedulerService:
             'summary': {
                 'total_students': total_students,
                 'students_scheduled': students_scheduled,
-                'total_assignments': len(schedules),
-                'avg_courses_per_student': round(len(schedules) / students_scheduled, 2) if students_scheduled else 0,
+                'total_assignments': total_assignments,
+                'avg_courses_per_student': round(total_assignments / students_scheduled, 2) if students_scheduled else 0,
                 'schedule_rate': round(students_scheduled / total_students * 100, 1)
             },
-            'solver_performance': self.solution_stats,
+            'solver_performance': self.solution_stats or self._last_recorded_stats(semester),
             'course_load_distribution': dict(metrics['course_load']),
             'satisfaction_analysis': {
                 'by_priority': satisfaction_rates,
@@ -332,6 +554,7 @@ class SchedulerService:
             },
             'conflict_analysis': {
                 'students_with_conflicts': conflicts,
+                'conflicting_pairs': conflict_summary['conflicting_pairs'],
                 'conflict_rate': round(conflicts / students_scheduled * 100, 1) if students_scheduled else 0
             },
             'course_statistics': course_stats,
@@ -340,23 +563,151 @@ class SchedulerService:
         }
 
 
+def assignment_distribution(problem, rows, courses):
+    """Counts of assignments by the student's priority for the course
+    ('priority_<n>' or 'unpreferred') and of students by load ('load_<n>')
+    
+    ``rows``/``courses`` are the student and course indexes of each assignment.
+    """
+    num_courses = max(problem.num_courses, 1)
+    owners = np.repeat(np.arange(problem.num_students), np.diff(problem.pref_ptr))
+    pref_keys = owners * num_courses + problem.pref_course
+    order = np.argsort(pref_keys, kind='stable')
+    pref_keys = pref_keys[order]
+    
+    # The last listed preference for a course wins, as in a dict lookup
+    keys = rows * num_courses + courses
+    positions = np.searchsorted(pref_keys, keys, side='right') - 1
+    matched = positions >= 0
+    matched[matched] = pref_keys[positions[matched]] == keys[matched]
+    priorities = problem.pref_priority[order][positions[matched]]
+    
+    stats = {}
+    for priority, count in zip(*np.unique(priorities, return_counts=True)):
+        stats[f'priority_{priority}'] = int(count)
+    if (~matched).any():
+        stats['unpreferred'] = int((~matched).sum())
+    loads = np.bincount(rows, minlength=problem.num_students)
+    for load, count in zip(*np.unique(loads, return_counts=True)):
+        stats[f'load_{load}'] = int(count)
+    return stats
+
+
+def solution_metrics(problem, rows, sections):
+    """Headline figures of a solution given as (student index, section
+    index) arrays: assignments, students scheduled, the model objective and
+    the assignment distribution"""
+    rows = np.asarray(rows, dtype=np.int64)
+    courses = problem.section_course[np.asarray(sections, dtype=np.int64)]
+    distribution = assignment_distribution(problem, rows, courses)
+    objective = -2 * distribution.get('unpreferred', 0)
+    for key, count in distribution.items():
+        if key.startswith('priority_'):
+            objective += max(0, 11 - 2 * int(key[len('priority_'):])) * count
+    return {
+        'assignments': len(rows),
+        'students_scheduled': len(np.unique(rows)),
+        'objective_value': objective,
+        **{key: count for key, count in distribution.items() if not key.startswith('load_')}
+    }
+
+def save_sections(semester, problem):
+    """Insert the problem's planned sections as ``semester`` sections
+
+    Returns {(course id, timeslot id): [(section id, seats), ...]} in
+    section number order. Sections of a course usually meet at distinct
+    times, but the positional layout and sections placement could not seat
+    can share one, so a pair may name several sections.
+    """
+    course_ids = problem.course_id[problem.section_course].tolist()
+    timeslot_ids = problem.timeslot_id[problem.section_timeslot].tolist()
+    room_ids = [int(problem.room_id[r]) if r >= 0 else None for r in problem.section_room.tolist()]
+    instructors = problem.course_instructor[problem.section_course].tolist()
+    numbers = defaultdict(int)
+    rows = []
+    for course_id, timeslot_id, room_id, instructor, capacity in zip(
+            course_ids, timeslot_ids, room_ids, instructors, problem.section_capacity.tolist()):
+        numbers[course_id] += 1
+        rows.append({
+            'semester': semester,
+            'course_id': course_id,
+            'number': numbers[course_id],
+            'timeslot_id': timeslot_id,
+            'room_id': room_id,
+            'instructor_id': int(problem.instructor_id[instructor]) if instructor >= 0 else None,
+            'capacity': capacity
+        })
+    if rows:
+        db.session.execute(insert(Section), rows)
+    db.session.commit()
+    query = (select(Section.id, Section.course_id, Section.timeslot_id, Section.capacity)
+             .where(Section.semester == semester).order_by(Section.course_id, Section.number))
+    sections = defaultdict(list)
+    for row in db.session.execute(query):
+        sections[(row.course_id, row.timeslot_id)].append((row.id, row.capacity))
+    return dict(sections)
+
+def save_assignments(semester, assignments, batch_size=10000, sections=None):
+    """Insert (student id, course id, timeslot id) rows as ``semester`` schedules
+
+    ``sections`` is the mapping returned by ``save_sections``. Rows of a
+    (course, timeslot) pair fill its sections in order, each up to its
+    seats; the solver keeps the pair's rows within their total. The seat
+    counters of the semester's sections are then set to match.
+    """
+    seats = {key: [[section_id, capacity] for section_id, capacity in linked]
+             for key, linked in (sections or {}).items()}
+
+    def link(course_id, timeslot_id):
+        linked = seats.get((course_id, timeslot_id))
+        if not linked:
+            return None
+        for section in linked:
+            if section[1] > 0:
+                section[1] -= 1
+                return section[0]
+        return linked[-1][0]
+
+    for i in range(0, len(assignments), batch_size):
+        db.session.execute(insert(Schedule), [
+            {'student_id': student_id, 'course_id': course_id, 'timeslot_id': timeslot_id,
+             'section_id': link(course_id, timeslot_id), 'semester': semester}
+            for student_id, course_id, timeslot_id in assignments[i:i + batch_size]
+        ])
+    taken = select(func.count(Schedule.id)).where(Schedule.section_id == Section.id).scalar_subquery()
+    db.session.execute(update(Section).where(Section.semester == semester).values(enrolled=taken))
+    db.session.commit()
+
+
 class SolutionPrinter(cp_model.CpSolverSolutionCallback):
     """Progress callback for large optimization"""
     
-    def __init__(self, students, section_to_course, x, total_students):
+    def __init__(self, variables, total_students):
         cp_model.CpSolverSolutionCallback.__init__(self)
-        self.students = students
-        self.section_to_course = section_to_course
-        self.x = x
+        # Contiguous index range of the assignment variables
+        self.variables = variables
         self.solution_count = 0
         self.start_time = time.time()
         self.total_students = total_students
+        # (seconds, objective, best bound) per improving solution, thinned
+        # to every ``trajectory_stride``-th one once MAX_TRAJECTORY is hit
+        self.trajectory = []
+        self.trajectory_stride = 1
         
+    MAX_TRAJECTORY = 500
+    
     def on_solution_callback(self):
         self.solution_count += 1
         current_time = time.time() - self.start_time
         
+        if self.solution_count % self.trajectory_stride == 0:
+            self.trajectory.append([round(current_time, 3), self.ObjectiveValue(), self.BestObjectiveBound()])
+            if len(self.trajectory) >= self.MAX_TRAJECTORY:
+                self.trajectory = self.trajectory[::2]
+                self.trajectory_stride *= 2
+        
         if self.solution_count % 5 == 0:
-            assignments = sum(1 for key, var in self.x.items() if self.Value(var) == 1)
+            solution = self.Response().solution
+            assignments = sum(solution[self.variables.start:self.variables.stop])
             logger.info(f'Solution {self.solution_count} at {current_time:.1f}s: '
                        f'{assignments} assignments, objective: {self.ObjectiveValue()}')
@@ -0,0 +1,65 @@
+from app.models.models import Student, Course, TimeSlot, CoursePreference, Schedule
+from app import db
+from sqlalchemy import select
+from collections import defaultdict
+
+class ScheduleSnapshot:
+    """Everything the reports need for one semester, loaded with one query per table.
+
+    preferences  student id -> [(course id, priority)] sorted by priority, as
+                 records.load_preferences and Problem.preferences
+    schedules    student id -> [(course id, timeslot id)]
+    courses      course id -> (code, name, capacity)
+    durations    course id -> meeting minutes (0 = the whole timeslot)
+    timeslots    timeslot id -> (day, start_time, end_time, room)
+    students     student id -> name
+    """
+
+    def __init__(self, semester, students, courses, timeslots, preferences, schedules, durations=None):
+        self.semester = semester
+        self.students = students
+        self.courses = courses
+        self.durations = durations or {}
+        self.timeslots = timeslots
+        self.preferences = preferences
+        self.schedules = schedules
+
+    @classmethod
+    def load(cls, semester):
+        session = db.session
+        students = dict(session.execute(select(Student.id, Student.name).order_by(Student.id)).all())
+        courses = {}
+        durations = {}
+        for row in session.execute(
+            select(Course.id, Course.course_code, Course.name, Course.capacity, Course.duration_minutes)
+        ):
+            courses[row.id] = (row.course_code, row.name, row.capacity)
+            durations[row.id] = row.duration_minutes or 0
+        timeslots = {
+            row.id: (row.day, row.start_time, row.end_time, row.room)
+            for row in session.execute(
+                select(TimeSlot.id, TimeSlot.day, TimeSlot.start_time, TimeSlot.end_time, TimeSlot.room)
+            )
+        }
+
+        preferences = defaultdict(list)
+        for row in session.execute(
+            select(CoursePreference.student_id, CoursePreference.course_id, CoursePreference.priority)
+            .order_by(CoursePreference.student_id, CoursePreference.priority, CoursePreference.id)
+        ):
+            preferences[row.student_id].append((row.course_id, row.priority))
+
+        schedules = defaultdict(list)
+        for row in session.execute(
+            select(Schedule.student_id, Schedule.course_id, Schedule.timeslot_id)
+            .where(Schedule.semester == semester)
+        ):
+            schedules[row.student_id].append((row.course_id, row.timeslot_id))
+
+        return cls(semester, students, courses, timeslots, dict(preferences), dict(schedules), durations)
+
+    def iter_students(self):
+        """Yield (student id, preferences, scheduled course ids, schedule entries) per student"""
+        for student_id in self.students:
+            entries = self.schedules.get(student_id, [])
+            yield student_id, self.preferences.get(student_id, []), {c for c, _ in entries}, entries
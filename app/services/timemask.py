@@ -0,0 +1,140 @@
+"""Weekly time masks: meetings as bitsets over fixed-width week buckets.
+
+A ``WeekGrid`` cuts each day's window into ``bucket``-minute buckets and
+lays the days end to end. A meeting's mask has the bits of every bucket it
+touches set, a student's mask is the OR of their meetings' masks, and "does
+this meeting clash with the schedule so far" is one AND.
+
+Meetings are rounded outwards to whole buckets, so two masks that share a
+bit either overlap in time or both touch the same bucket. When every
+start and end lies on a bucket boundary (``WeekGrid.aligns``) the masks are
+exact; otherwise a mask clash is only a candidate, which the interval
+comparison in ``overlap`` settles.
+
+Masks come in two forms:
+
+    mask / masks   Python integers, for per-student loops
+    words          (rows, num_words) uint64 arrays, for whole cohorts;
+                   ``student_words`` ORs them per student and
+                   ``clashing_students`` finds students whose meetings
+                   share a bucket without comparing any pair
+"""
+import numpy as np
+
+MINUTES_PER_DAY = 24 * 60
+
+# _PREFIX[k] has the k lowest bits set
+_PREFIX = np.array([(1 << k) - 1 for k in range(65)], dtype=np.uint64)
+
+class WeekGrid:
+    """Bucket layout of a week
+
+    bucket     minutes per bucket
+    first      minute of the day where each day's window starts
+    last       minute of the day where it ends
+    days       number of days laid out
+    """
+
+    def __init__(self, bucket=5, first=0, last=MINUTES_PER_DAY, days=7):
+        if bucket <= 0:
+            raise ValueError('Bucket width must be positive')
+        self.bucket = int(bucket)
+        self.first = int(first) - int(first) % self.bucket
+        self.last = int(last)
+        self.days = int(days)
+        self.per_day = -(-(self.last - self.first) // self.bucket)
+        self.num_buckets = self.days * self.per_day
+        self.num_words = -(-self.num_buckets // 64)
+
+    @classmethod
+    def covering(cls, day, start, end, bucket=5):
+        """Smallest grid holding every (day, start, end) meeting"""
+        day, start, end = (np.asarray(a, dtype=np.int64) for a in (day, start, end))
+        if not len(day):
+            return cls(bucket, 0, bucket, 1)
+        return cls(bucket, int(start.min()), int(np.maximum(end, start + 1).max()), int(day.max()) + 1)
+
+    @classmethod
+    def for_timeslots(cls, problem, bucket=5):
+        """Grid holding the problem's timeslots at full length and every
+        course duration"""
+        start = problem.timeslot_start
+        longest = int(problem.course_duration.max()) if problem.num_courses else 0
+        return cls.covering(problem.timeslot_day, start, np.maximum(problem.timeslot_end, start + longest),
+                            bucket)
+
+    def aligns(self, start, end):
+        """Whether masks of these meetings are exact (all times on bucket edges)"""
+        start, end = np.asarray(start, dtype=np.int64), np.asarray(end, dtype=np.int64)
+        return bool(((start - self.first) % self.bucket == 0).all() and
+                    ((end - self.first) % self.bucket == 0).all())
+
+    def span(self, day, start, end):
+        """First and one-past-last bucket of each meeting"""
+        day, start, end = (np.asarray(a, dtype=np.int64) for a in (day, start, end))
+        if (day < 0).any() or (day >= self.days).any() or \
+                (start < self.first).any() or (end > self.last).any():
+            raise ValueError('Meeting outside the week grid')
+        # An empty meeting still occupies its bucket
+        end = np.maximum(end, start + 1)
+        base = day * self.per_day
+        return (base + (start - self.first) // self.bucket,
+                base - (-(end - self.first) // self.bucket))
+
+    def mask(self, day, start, end):
+        """Mask of one meeting as a Python integer"""
+        lo, hi = self.span([day], [start], [end])
+        return (1 << int(hi[0])) - (1 << int(lo[0]))
+
+    def masks(self, day, start, end):
+        """Masks of many meetings as Python integers"""
+        lo, hi = self.span(day, start, end)
+        return [(1 << h) - (1 << l) for l, h in zip(lo.tolist(), hi.tolist())]
+
+    def words(self, day, start, end):
+        """Masks of many meetings as a (rows, num_words) uint64 array; bit b
+        of the mask is bit b % 64 of word b // 64"""
+        lo, hi = self.span(day, start, end)
+        out = np.empty((len(lo), self.num_words), dtype=np.uint64)
+        for w in range(self.num_words):
+            # Bits [lo, hi) clipped to this word, as low-bit prefixes
+            out[:, w] = _PREFIX[np.clip(hi - 64 * w, 0, 64)] & ~_PREFIX[np.clip(lo - 64 * w, 0, 64)]
+        return out
+
+    def to_int(self, words):
+        """Python integer of one row of words"""
+        return int.from_bytes(np.ascontiguousarray(words, dtype='<u8').tobytes(), 'little')
+
+def _by_student(student):
+    """Sort order, distinct students and their first row in sorted order"""
+    student = np.asarray(student, dtype=np.int64)
+    order = np.argsort(student, kind='stable')
+    students, first = np.unique(student[order], return_index=True)
+    return order, students, first
+
+def student_words(student, words):
+    """(students, masks): each distinct student id with the OR of their rows"""
+    order, students, first = _by_student(student)
+    if not len(students):
+        return students, np.zeros((0, words.shape[1]), dtype=np.uint64)
+    return students, np.bitwise_or.reduceat(words[order], first, axis=0)
+
+def _row_bits(words):
+    """Number of set bits in every row of ``words``"""
+    if hasattr(np, 'bitwise_count'):  # numpy 2.0+
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+    return np.unpackbits(np.ascontiguousarray(words).view(np.uint8), axis=1).sum(axis=1, dtype=np.int64)
+
+def clashing_students(student, words):
+    """Distinct student ids whose rows share a bucket
+
+    Rows clash exactly when their bit counts add up to more than the bit
+    count of their OR, so no pair of rows is ever compared.
+    """
+    order, students, first = _by_student(student)
+    if not len(students):
+        return students
+    words = words[order]
+    combined = np.bitwise_or.reduceat(words, first, axis=0)
+    total = np.add.reduceat(_row_bits(words), first)
+    return students[total > _row_bits(combined)]
@@ -0,0 +1,75 @@
+from app.models.models import Student, StudentTimetable
+from app.services.reads import schedule_rows, timetable_entries, timetables, dumps
+from app import db
+from sqlalchemy import select, insert, update
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TimetableService:
+    """Maintains the denormalized StudentTimetable read model"""
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+
+    def rebuild(self, student_ids=None):
+        """Rebuild timetables for the given students, or for everyone when None.
+
+        Only rows whose payload actually changed are written, so re-running
+        after a partial re-solve touches just the affected students.
+        Returns the number of timetables written.
+        """
+        if student_ids is None:
+            student_ids = db.session.execute(select(Student.id).order_by(Student.id)).scalars().all()
+        else:
+            student_ids = sorted(set(student_ids))
+
+        written = 0
+        for i in range(0, len(student_ids), self.batch_size):
+            written += self._rebuild_batch(student_ids[i:i + self.batch_size])
+
+        logger.info(f"Timetable read model: {written} of {len(student_ids)} students rewritten")
+        return written
+
+    def _rebuild_batch(self, student_ids):
+        # One join for the whole batch instead of one per request
+        entries = timetable_entries(db.session.execute(schedule_rows(student_ids)))
+
+        existing = dict(db.session.execute(timetables(student_ids)).all())
+
+        now = datetime.utcnow()
+        inserts = []
+        updates = []
+        for student_id in student_ids:
+            student_entries = entries.get(student_id, [])
+            # Same key order and separators as jsonify, so routes can return the blob as-is
+            payload = dumps(student_entries)
+            row = {
+                'student_id': student_id,
+                'entries': payload,
+                'course_count': len(student_entries),
+                'updated_at': now
+            }
+            if student_id not in existing:
+                inserts.append(row)
+            elif existing[student_id] != payload:
+                updates.append(row)
+
+        if inserts:
+            db.session.execute(insert(StudentTimetable), inserts)
+        if updates:
+            db.session.execute(update(StudentTimetable), updates)
+        db.session.commit()
+
+        return len(inserts) + len(updates)
+
+    def get_many(self, student_ids):
+        """student id -> serialized timetable of the students that have one"""
+        return dict(db.session.execute(timetables(student_ids)).all())
+
+    def get(self, student_id):
+        """Return the serialized timetable for a student, or None if not materialized"""
+        return db.session.execute(
+            select(StudentTimetable.entries).where(StudentTimetable.student_id == student_id)
+        ).scalar()
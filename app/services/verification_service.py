@@ -0,0 +1,165 @@
+from app.models.models import Schedule, TimeSlot, Course, Student
+from app.services.overlap import meeting_end, overlapping_pairs
+from app.services.timemask import WeekGrid, clashing_students
+from app import db
+from sqlalchemy import select, and_, func, extract, case
+from sqlalchemy.orm import aliased
+from collections import namedtuple
+import numpy as np
+
+# One overlapping pair of assignments for a student; first_* starts no later
+ConflictPair = namedtuple('ConflictPair', [
+    'student_id', 'first_schedule_id', 'second_schedule_id',
+    'first_course_id', 'second_course_id', 'day', 'overlap_start', 'overlap_end'
+])
+
+def _minutes(t):
+    return t.hour * 60 + t.minute
+
+def _clock(minutes):
+    return f'{int(minutes) // 60:02d}:{int(minutes) % 60:02d}'
+
+def _sql_minutes(column):
+    return extract('hour', column) * 60 + extract('minute', column)
+
+def _sql_meeting_end(timeslot, course):
+    """SQL form of overlap.meeting_end"""
+    return case((course.duration_minutes > 0, _sql_minutes(timeslot.start_time) + course.duration_minutes),
+                else_=_sql_minutes(timeslot.end_time))
+
+class VerificationService:
+    """Finds per-student time overlaps in a semester's schedule.
+
+    Two equivalent engines: ``sql`` runs a single self-join in the database,
+    ``vectorized`` pulls one (student, day, start, end) row per assignment and
+    compares sorted intervals with numpy. Both return ``ConflictPair`` rows
+    ordered by student, day and start.
+    """
+
+    METHODS = ('sql', 'vectorized')
+
+    def find_conflicts(self, semester, method='sql', limit=None):
+        if method not in self.METHODS:
+            raise ValueError(f'Unknown verification method: {method}')
+        if method == 'sql':
+            return self._sql_conflicts(semester, limit)
+        return self._vectorized_conflicts(semester, limit)
+
+    def _sql_conflicts(self, semester, limit=None):
+        a, b = aliased(Schedule), aliased(Schedule)
+        ta, tb = aliased(TimeSlot), aliased(TimeSlot)
+        ca, cb = aliased(Course), aliased(Course)
+        a_start, b_start = _sql_minutes(ta.start_time), _sql_minutes(tb.start_time)
+        a_end, b_end = _sql_meeting_end(ta, ca), _sql_meeting_end(tb, cb)
+        # Order each pair by (start, id) so every overlap is reported once
+        a_first = (a_start < b_start) | and_(a_start == b_start, a.id < b.id)
+        query = (
+            select(a.student_id, a.id, b.id, a.course_id, b.course_id, ta.day,
+                   b_start, a_end, b_end)
+            .join(ta, ta.id == a.timeslot_id)
+            .join(ca, ca.id == a.course_id)
+            .join(b, and_(b.student_id == a.student_id, b.semester == a.semester, b.id != a.id))
+            .join(tb, tb.id == b.timeslot_id)
+            .join(cb, cb.id == b.course_id)
+            .where(a.semester == semester, ta.day == tb.day,
+                   b_start < a_end, a_start < b_end, a_first)
+            .order_by(a.student_id, ta.day, a_start, a.id, b_start, b.id)
+        )
+        if limit:
+            query = query.limit(limit)
+
+        return [
+            ConflictPair(row[0], row[1], row[2], row[3], row[4], row[5],
+                         _clock(row[6]), _clock(min(row[7], row[8])))
+            for row in db.session.execute(query)
+        ]
+
+    def load_intervals(self, semester):
+        """Column arrays (student, schedule, course, day, start, end) for one
+        semester; ``end`` is where the meeting ends (see overlap.meeting_end)"""
+        rows = db.session.execute(
+            select(Schedule.student_id, Schedule.id, Schedule.course_id,
+                   TimeSlot.day, TimeSlot.start_time, TimeSlot.end_time, Course.duration_minutes)
+            .join(TimeSlot, TimeSlot.id == Schedule.timeslot_id)
+            .join(Course, Course.id == Schedule.course_id)
+            .where(Schedule.semester == semester)
+        ).all()
+        n = len(rows)
+        arrays = {
+            'student': np.fromiter((r[0] for r in rows), dtype=np.int64, count=n),
+            'schedule': np.fromiter((r[1] for r in rows), dtype=np.int64, count=n),
+            'course': np.fromiter((r[2] for r in rows), dtype=np.int64, count=n),
+            'day': np.fromiter((r[3] for r in rows), dtype=np.int64, count=n),
+            'start': np.fromiter((_minutes(r[4]) for r in rows), dtype=np.int64, count=n)
+        }
+        arrays['end'] = meeting_end(arrays['start'],
+                                    np.fromiter((_minutes(r[5]) for r in rows), dtype=np.int64, count=n),
+                                    np.fromiter((r[6] or 0 for r in rows), dtype=np.int64, count=n))
+        return arrays
+
+    def _vectorized_conflicts(self, semester, limit=None):
+        arrays = self.load_intervals(semester)
+        first, second = overlapping_pairs(arrays['student'], arrays['day'],
+                                          arrays['start'], arrays['end'], arrays['schedule'])
+        if limit:
+            first, second = first[:limit], second[:limit]
+
+        overlap_end = np.minimum(arrays['end'][first], arrays['end'][second])
+        return [
+            ConflictPair(int(arrays['student'][i]), int(arrays['schedule'][i]), int(arrays['schedule'][j]),
+                         int(arrays['course'][i]), int(arrays['course'][j]), int(arrays['day'][i]),
+                         _clock(arrays['start'][j]), _clock(end))
+            for i, j, end in zip(first.tolist(), second.tolist(), overlap_end.tolist())
+        ]
+
+    def conflicted_students(self, semester):
+        """Sorted ids of the students with at least one overlap
+
+        Checks whole-week time masks per student instead of listing pairs.
+        Masks are exact when every meeting starts and ends on a 5-minute
+        mark; otherwise the students they flag are confirmed against the
+        intervals.
+        """
+        arrays = self.load_intervals(semester)
+        grid = WeekGrid.covering(arrays['day'], arrays['start'], arrays['end'])
+        words = grid.words(arrays['day'], arrays['start'], arrays['end'])
+        flagged = clashing_students(arrays['student'], words)
+        if grid.aligns(arrays['start'], arrays['end']):
+            return flagged.tolist()
+
+        rows = np.isin(arrays['student'], flagged)
+        first, _ = overlapping_pairs(arrays['student'][rows], arrays['day'][rows],
+                                     arrays['start'][rows], arrays['end'][rows])
+        return np.unique(arrays['student'][rows][first]).tolist()
+
+    def summarize(self, semester, method='sql', examples=5):
+        """Conflict counts plus a few readable examples"""
+        pairs = self.find_conflicts(semester, method)
+        conflicted = sorted({p.student_id for p in pairs})
+        scheduled = db.session.execute(
+            select(func.count(func.distinct(Schedule.student_id))).where(Schedule.semester == semester)
+        ).scalar()
+
+        sample = pairs[:examples]
+        names = dict(db.session.execute(
+            select(Student.id, Student.name).where(Student.id.in_({p.student_id for p in sample}))
+        ).all())
+        course_names = dict(db.session.execute(
+            select(Course.id, Course.name).where(
+                Course.id.in_({c for p in sample for c in (p.first_course_id, p.second_course_id)})
+            )
+        ).all())
+        day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+        return {
+            'students_scheduled': scheduled,
+            'students_with_conflicts': len(conflicted),
+            'conflicting_pairs': len(pairs),
+            'conflict_rate': round(len(conflicted) / scheduled * 100, 1) if scheduled else 0,
+            'examples': [{
+                'student': names.get(p.student_id, p.student_id),
+                'courses': [course_names.get(p.first_course_id), course_names.get(p.second_course_id)],
+                'time': f"{day_names[p.day] if p.day < 7 else f'Day{p.day}'} "
+                        f"{p.overlap_start}-{p.overlap_end}"
+            } for p in sample]
+        }
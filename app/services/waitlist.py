@@ -0,0 +1,289 @@
+"""Course waitlists and the promotion engine that fills freed seats.
+
+After each optimization every student who preferred a course, could take it
+and did not get it is queued for it (``WaitlistService.build``). A course's
+queue is served by preference priority, then by when the student joined.
+
+When seats free up, ``PromotionEngine`` takes them through the section seat
+counters (see enrollment.py) and promotes from the head of the course's
+queue the first student who is under the load limit, meets the course's
+prerequisites (completed, or in their schedule) and whose week time mask
+(see timemask.py) does not clash with the section's meeting:
+
+    queues     per-course heap of (priority, joined, entry id, student id),
+               read a page at a time from the ix_waitlist_queue index, so
+               no queue is loaded in full and each pop is O(log n)
+    students   time mask, load, courses and completed courses of every
+               student looked at, fetched once per page and updated on
+               promotion
+
+Each student is passed over at most once per section: one who clashes with
+the section goes back to the heap after the section is filled, for the
+course's other sections; one at the load limit leaves the engine's heaps
+(loads only grow); one missing a prerequisite is parked until a promotion
+puts a course in their schedule. A storm of drops across many sections is
+settled by one engine in one pass, without re-solving.
+"""
+from collections import namedtuple
+from datetime import datetime
+import heapq
+import logging
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import select, insert, delete, tuple_
+
+from app import db
+from app.models.models import Schedule, Section, TimeSlot, Course, WaitlistEntry, CourseCompletion
+from app.services.enrollment import take_seat, release_seat, record_change
+from app.services.overlap import meeting_end
+from app.services.prerequisites import PrerequisiteGraph, compile_prerequisites
+from app.services.timemask import WeekGrid
+from app.services.timetable_service import TimetableService
+
+logger = logging.getLogger(__name__)
+
+MAX_LOAD = 5
+PAGE_SIZE = 200
+
+Promotion = namedtuple('Promotion', ['student_id', 'course_id', 'section_id', 'priority'])
+
+def _minutes(t):
+    return t.hour * 60 + t.minute
+
+class _Queue:
+    """Heap over the part of one course's queue read so far"""
+
+    def __init__(self):
+        self.heap = []
+        self.last = None        # sort key of the last entry read from the index
+        self.exhausted = False
+
+class PromotionEngine:
+    """Fills free section seats of one semester from the course waitlists
+
+    One engine keeps its heaps and student masks across ``fill`` calls, so
+    a batch of drops shares the reads. Changes are added to the session;
+    the caller commits.
+    """
+
+    def __init__(self, semester, page_size=PAGE_SIZE, max_load=MAX_LOAD):
+        self.semester = semester
+        self.page_size = page_size
+        self.max_load = max_load
+        self.grid = WeekGrid()
+        self.queues = {}
+        self.students = {}  # student id -> [mask, load, course ids, completed course ids]
+        self.parked = {}    # student id -> [(course id, entry)] missing a prerequisite
+        self.requires = PrerequisiteGraph.load().requires
+
+    def fill(self, section_ids):
+        """Promote waitlisted students into the free seats of the sections;
+        returns one Promotion per seat filled"""
+        section_ids = sorted(set(section_ids))
+        if not section_ids:
+            return []
+        sections = db.session.execute(
+            select(Section.id, Section.course_id, Section.timeslot_id,
+                   TimeSlot.day, TimeSlot.start_time, TimeSlot.end_time, Course.duration_minutes)
+            .join(TimeSlot, TimeSlot.id == Section.timeslot_id)
+            .join(Course, Course.id == Section.course_id)
+            .where(Section.id.in_(section_ids))
+            .order_by(Section.id)
+        ).all()
+        promotions = []
+        for section in sections:
+            start = _minutes(section.start_time)
+            end = int(meeting_end(start, _minutes(section.end_time), section.duration_minutes or 0))
+            mask = self.grid.mask(section.day, start, end)
+            passed = []
+            # Seats are taken through the counter, shared with live enrollment
+            while take_seat(section.id):
+                head = self._next(section.course_id, mask, passed)
+                if head is None:
+                    release_seat(section.id)
+                    break
+                priority, _, entry_id, student_id = head
+                db.session.add(Schedule(student_id=student_id, course_id=section.course_id,
+                                        timeslot_id=section.timeslot_id, section_id=section.id,
+                                        semester=self.semester))
+                db.session.execute(delete(WaitlistEntry).where(WaitlistEntry.id == entry_id))
+                state = self.students[student_id]
+                state[0] |= mask
+                state[1] += 1
+                state[2].add(section.course_id)
+                promotions.append(Promotion(student_id, section.course_id, section.id, priority))
+                # The new course may be the prerequisite a parked entry waits for
+                for course_id, entry in self.parked.pop(student_id, ()):
+                    heapq.heappush(self.queues[course_id].heap, entry)
+            # Clashes are final for this section only
+            for entry in passed:
+                heapq.heappush(self.queues[section.course_id].heap, entry)
+        return promotions
+
+    def _next(self, course_id, mask, passed):
+        """Pop the first waitlisted student who fits; students who clash
+        with ``mask`` are collected in ``passed`` for the caller to put back"""
+        queue = self.queues.setdefault(course_id, _Queue())
+        while queue.heap or self._read_page(course_id, queue):
+            entry = heapq.heappop(queue.heap)
+            student_id = entry[3]
+            mask_so_far, load, courses, completed = self.students[student_id]
+            if course_id in courses or course_id in completed:
+                # Enrolled or passed by other means since joining; the entry is stale
+                db.session.execute(delete(WaitlistEntry).where(WaitlistEntry.id == entry[2]))
+                continue
+            if load >= self.max_load:
+                continue
+            if not self.requires.get(course_id, set()) <= courses | completed:
+                self.parked.setdefault(student_id, []).append((course_id, entry))
+                continue
+            if mask_so_far & mask:
+                passed.append(entry)
+                continue
+            return entry
+        return None
+
+    def _read_page(self, course_id, queue):
+        """Push the next page of the course's queue onto its heap"""
+        if queue.exhausted:
+            return False
+        key = tuple_(WaitlistEntry.priority, WaitlistEntry.created_at, WaitlistEntry.id)
+        query = (
+            select(WaitlistEntry.priority, WaitlistEntry.created_at, WaitlistEntry.id, WaitlistEntry.student_id)
+            .where(WaitlistEntry.semester == self.semester, WaitlistEntry.course_id == course_id)
+            .order_by(WaitlistEntry.priority, WaitlistEntry.created_at, WaitlistEntry.id)
+            .limit(self.page_size)
+        )
+        if queue.last is not None:
+            query = query.where(key > tuple_(*queue.last))
+        page = [tuple(row) for row in db.session.execute(query)]
+        if len(page) < self.page_size:
+            queue.exhausted = True
+        if not page:
+            return False
+        queue.last = page[-1][:3]
+        self._load_students([entry[3] for entry in page])
+        for entry in page:
+            heapq.heappush(queue.heap, entry)
+        return True
+
+    def _load_students(self, student_ids):
+        """Time mask, load, courses and completed courses of students not seen yet"""
+        new = sorted(set(student_ids) - self.students.keys())
+        if not new:
+            return
+        for student_id in new:
+            self.students[student_id] = [0, 0, set(), set()]
+        for student_id, course_id in db.session.execute(
+                select(CourseCompletion.student_id, CourseCompletion.course_id)
+                .where(CourseCompletion.student_id.in_(new))):
+            self.students[student_id][3].add(course_id)
+        rows = db.session.execute(
+            select(Schedule.student_id, Schedule.course_id, TimeSlot.day, TimeSlot.start_time,
+                   TimeSlot.end_time, Course.duration_minutes)
+            .join(TimeSlot, TimeSlot.id == Schedule.timeslot_id)
+            .join(Course, Course.id == Schedule.course_id)
+            .where(Schedule.semester == self.semester, Schedule.student_id.in_(new))
+        ).all()
+        start = [_minutes(row.start_time) for row in rows]
+        end = meeting_end(start, [_minutes(row.end_time) for row in rows],
+                          [row.duration_minutes or 0 for row in rows])
+        masks = self.grid.masks([row.day for row in rows], start, end)
+        for row, mask in zip(rows, masks):
+            state = self.students[row.student_id]
+            state[0] |= mask
+            state[1] += 1
+            state[2].add(row.course_id)
+
+class WaitlistService:
+    """Builds the waitlists and handles drops"""
+
+    def __init__(self, batch_size=10000):
+        self.batch_size = batch_size
+
+    def build(self, semester, problem, assignments, joined=None):
+        """Replace the semester's waitlists with every (student, preferred
+        course) pair the assignments leave out
+
+        ``assignments`` are (student id, course id, timeslot id) rows as
+        returned by the solvers. Courses the student can never take this
+        semester (see compile_prerequisites) are left out; a requested course
+        whose prerequisite is still missing stays queued, and promotion
+        checks the prerequisite against the student's schedule at the time.
+        A course listed twice keeps its best priority. Returns the number of
+        entries written.
+        """
+        db.session.execute(delete(WaitlistEntry).where(WaitlistEntry.semester == semester))
+        num_courses = max(problem.num_courses, 1)
+        owners = np.repeat(np.arange(problem.num_students), np.diff(problem.pref_ptr))
+        courses = problem.pref_course.astype(np.int64)
+        keys = owners * num_courses + courses
+
+        assigned = np.asarray(assignments, dtype=np.int64).reshape(-1, 3)
+        assigned_keys = (np.searchsorted(problem.student_id, assigned[:, 0]) * num_courses
+                         + np.searchsorted(problem.course_id, assigned[:, 1]))
+        eligible, _ = compile_prerequisites(problem)
+        wanted = ~np.isin(keys, assigned_keys) & eligible[owners, courses]
+
+        order = np.lexsort((problem.pref_priority[wanted], keys[wanted]))
+        keys, priorities = keys[wanted][order], problem.pref_priority[wanted][order]
+        first = np.concatenate(([True], keys[1:] != keys[:-1])) if len(keys) else np.zeros(0, dtype=bool)
+        keys, priorities = keys[first], priorities[first]
+
+        student_ids = problem.student_id[keys // num_courses].tolist()
+        course_ids = problem.course_id[keys % num_courses].tolist()
+        joined = joined or datetime.utcnow()
+        rows = [{'semester': semester, 'student_id': student_id, 'course_id': course_id,
+                 'priority': priority, 'created_at': joined}
+                for student_id, course_id, priority in zip(student_ids, course_ids, priorities.tolist())]
+        for i in range(0, len(rows), self.batch_size):
+            db.session.execute(insert(WaitlistEntry), rows[i:i + self.batch_size])
+        db.session.commit()
+        logger.info(f"Waitlisted {len(rows)} unmet preferences for {semester}")
+        return len(rows)
+
+    def queue(self, semester, course_id, limit=50):
+        """Head of a course's queue, in promotion order"""
+        return db.session.execute(
+            select(WaitlistEntry.student_id, WaitlistEntry.priority, WaitlistEntry.created_at)
+            .where(WaitlistEntry.semester == semester, WaitlistEntry.course_id == course_id)
+            .order_by(WaitlistEntry.priority, WaitlistEntry.created_at, WaitlistEntry.id)
+            .limit(limit)
+        ).all()
+
+    def drop(self, semester, drops):
+        """Remove (student id, course id) enrollments and promote waitlisted
+        students into the freed seats
+
+        Returns the drops that were applied, those that matched no
+        enrollment, and the promotions.
+        """
+        dropped, missing, freed = [], [], []
+        for student_id, course_id in drops:
+            row = db.session.execute(
+                select(Schedule.id, Schedule.section_id)
+                .where(Schedule.semester == semester, Schedule.student_id == student_id,
+                       Schedule.course_id == course_id)
+            ).first()
+            if row is None:
+                missing.append((student_id, course_id))
+                continue
+            # A concurrent drop of the same row may have deleted it since the
+            # select; only the drop that deletes it frees the seat
+            if db.session.execute(delete(Schedule).where(Schedule.id == row.id)).rowcount != 1:
+                missing.append((student_id, course_id))
+                continue
+            dropped.append((student_id, course_id))
+            if row.section_id is not None:
+                release_seat(row.section_id)
+                freed.append(row.section_id)
+
+        promotions = PromotionEngine(semester).fill(freed)
+        if dropped:
+            record_change(semester)
+        db.session.commit()
+        if current_app.config.get('TIMETABLE_READ_MODEL'):
+            TimetableService().rebuild([s for s, _ in dropped] + [p.student_id for p in promotions])
+        logger.info(f"{len(dropped)} drops in {semester}: {len(promotions)} waitlisted students promoted")
+        return {'dropped': dropped, 'not_enrolled': missing, 'promoted': promotions}
@@ -0,0 +1,213 @@
+"""What-if scenarios: re-solve a published semester with changed sections,
+without writing anything to the database.
+
+A scenario is a list of changes to the published sections::
+
+    {"type": "capacity", "course_id": 3, "seats": 20}      spread over the course's sections
+    {"type": "capacity", "section_id": 17, "seats": -10}
+    {"type": "add_section", "course_id": 3, "timeslot_id": 5, "capacity": 40}
+    {"type": "move_section", "section_id": 17, "timeslot_id": 8}
+    {"type": "remove_section", "section_id": 17}
+
+The semester's topology is the problem arrays with the saved sections plus
+the published assignments and their metrics. It is loaded once per
+published version and live version (see ``RunHistoryService.published_version``
+and ``enrollment.live_version``), so enrollments and drops since the run
+reload it too, and kept in process memory. A scenario copies only the section arrays, applies its
+changes and solves within a short time limit, hinted with the published
+assignments. When the changes only add seats or sections the hint is a
+complete solution, so the answer is never worse than the published one; a
+hint the changes broke still steers the first search.
+"""
+from collections import namedtuple
+import logging
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import select
+
+from app import db
+from app.models.models import Schedule
+from app.services.enrollment import live_version
+from app.services.problem import Problem, ARRAYS
+from app.services.run_history import RunHistoryService
+from app.services.scheduler_service import SchedulerService, solution_metrics
+
+logger = logging.getLogger(__name__)
+
+CHANGE_TYPES = ('capacity', 'add_section', 'move_section', 'remove_section')
+
+# (published run, live write) version, problem with saved sections, their
+# Section ids, the published assignments as (student index, section index)
+# arrays and the baseline metrics
+Topology = namedtuple('Topology', ['version', 'problem', 'section_ids', 'rows', 'sections', 'baseline'])
+
+class ScenarioError(ValueError):
+    pass
+
+class WhatIfService:
+    """Evaluates section changes against the published schedule"""
+
+    # semester -> Topology, shared by every service instance in the process
+    _topologies = {}
+    _lock = threading.Lock()
+
+    def __init__(self, max_time_in_seconds=5.0, num_search_workers=4):
+        self.max_time_in_seconds = max_time_in_seconds
+        self.num_search_workers = num_search_workers
+
+    @classmethod
+    def clear_cache(cls):
+        with cls._lock:
+            cls._topologies.clear()
+
+    def topology(self, semester):
+        """Cached topology of ``semester``, reloaded when a newer run was
+        published or students enrolled or dropped since it was loaded"""
+        version = (RunHistoryService().published_version(semester), live_version(semester))
+        cached = self._topologies.get(semester)
+        if cached is not None and cached.version == version:
+            return cached
+
+        problem = Problem.from_database(semester, plan=False)
+        section_ids = problem.load_sections(semester)
+        if not len(section_ids):
+            raise ScenarioError(f'No published schedule for {semester}')
+        published = db.session.execute(
+            select(Schedule.student_id, Schedule.section_id)
+            .where(Schedule.semester == semester, Schedule.section_id.isnot(None))
+        ).all()
+        section_index = {section_id: k for k, section_id in enumerate(section_ids.tolist())}
+        published = [(student_id, section_index[section_id]) for student_id, section_id in published
+                     if section_id in section_index]
+        student = np.fromiter((p[0] for p in published), dtype=np.int64, count=len(published))
+        rows = np.searchsorted(problem.student_id, student)
+        sections = np.fromiter((p[1] for p in published), dtype=np.int64, count=len(published))
+
+        topology = Topology(version, problem, section_ids, rows, sections,
+                            solution_metrics(problem, rows, sections))
+        with self._lock:
+            self._topologies[semester] = topology
+        logger.info(f"Loaded what-if topology for {semester}: {len(section_ids)} sections, "
+                    f"{len(rows)} published assignments")
+        return topology
+
+    def evaluate(self, semester, changes):
+        """Solve ``semester`` with ``changes`` applied; returns the baseline
+        and scenario metrics, their difference and per-course enrollment"""
+        started = time.time()
+        cached = self._topologies.get(semester)
+        topology = self.topology(semester)
+        scenario, remap, touched = self._apply(topology, changes)
+
+        keep = remap[topology.sections] >= 0
+        hint = (topology.rows[keep], remap[topology.sections[keep]])
+        solver = SchedulerService(max_time_in_seconds=self.max_time_in_seconds,
+                                  num_search_workers=self.num_search_workers, log_search_progress=False)
+        result = solver.solve_problem(scenario, hint=hint)
+
+        baseline = topology.baseline
+        metrics = solution_metrics(scenario, result['rows'], result['sections']) if result['feasible'] else None
+        delta = ({key: metrics.get(key, 0) - baseline.get(key, 0) for key in {**baseline, **metrics}}
+                 if metrics else None)
+        return {
+            'semester': semester,
+            'published_version': topology.version[0],
+            'live_version': topology.version[1],
+            'cached_topology': cached is topology,
+            'persisted': False,
+            'status': result['status'],
+            'feasible': result['feasible'],
+            'solve_time': round(time.time() - started, 3),
+            'baseline': baseline,
+            'scenario': metrics,
+            'delta': delta,
+            'courses': self._course_changes(topology, scenario, result, touched)
+        }
+
+    @staticmethod
+    def _course_changes(topology, scenario, result, touched):
+        """Seats and enrollment of the courses that were changed or whose
+        enrollment moved"""
+        problem = topology.problem
+        num_courses = problem.num_courses
+        count = lambda p, secs: np.bincount(p.section_course[secs], minlength=num_courses)
+        seats = lambda p: np.bincount(p.section_course, weights=p.section_capacity, minlength=num_courses)
+        before, after = count(problem, topology.sections), count(scenario, result['sections'])
+        seats_before, seats_after = seats(problem), seats(scenario)
+        changed = set(touched)
+        if result['feasible']:
+            changed.update(np.flatnonzero(before != after).tolist())
+        return [{
+            'course_id': int(problem.course_id[c]),
+            'seats': {'baseline': int(seats_before[c]), 'scenario': int(seats_after[c])},
+            'enrolled': {'baseline': int(before[c]),
+                         'scenario': int(after[c]) if result['feasible'] else None}
+        } for c in sorted(changed)]
+
+    @staticmethod
+    def _apply(topology, changes):
+        """Scenario problem, the new index of every published section (-1
+        when removed) and the course indexes the changes touch"""
+        problem = topology.problem
+        course_index = {course_id: c for c, course_id in enumerate(problem.course_id.tolist())}
+        timeslot_index = {timeslot_id: t for t, timeslot_id in enumerate(problem.timeslot_id.tolist())}
+        section_index = {section_id: k for k, section_id in enumerate(topology.section_ids.tolist())}
+        course = problem.section_course.tolist()
+        timeslot = problem.section_timeslot.tolist()
+        capacity = problem.section_capacity.tolist()
+        room = problem.section_room.tolist()
+        removed = set()
+        touched = set()
+
+        def lookup(index, change, key):
+            try:
+                return index[change[key]]
+            except KeyError:
+                raise ScenarioError(f'{change.get("type")} needs a known {key}') from None
+
+        for change in changes:
+            if not isinstance(change, dict) or change.get('type') not in CHANGE_TYPES:
+                raise ScenarioError(f'Each change needs a type, one of {", ".join(CHANGE_TYPES)}')
+            kind = change['type']
+            if kind == 'add_section':
+                c = lookup(course_index, change, 'course_id')
+                course.append(c)
+                timeslot.append(lookup(timeslot_index, change, 'timeslot_id'))
+                capacity.append(max(0, int(change.get('capacity', 0))))
+                room.append(-1)
+                touched.add(c)
+                continue
+
+            if kind == 'capacity' and 'section_id' not in change:
+                c = lookup(course_index, change, 'course_id')
+                targets = [k for k, sc in enumerate(course) if sc == c and k not in removed]
+                if not targets:
+                    raise ScenarioError(f'Course {change["course_id"]} has no sections')
+            else:
+                targets = [lookup(section_index, change, 'section_id')]
+                if targets[0] in removed:
+                    raise ScenarioError(f'Section {change["section_id"]} was removed')
+            touched.update(course[k] for k in targets)
+
+            if kind == 'capacity':
+                share, extra = divmod(int(change.get('seats', 0)), len(targets))
+                for i, k in enumerate(targets):
+                    capacity[k] = max(0, capacity[k] + share + (i < extra))
+            elif kind == 'move_section':
+                timeslot[targets[0]] = lookup(timeslot_index, change, 'timeslot_id')
+            else:
+                removed.add(targets[0])
+
+        kept = [k for k in range(len(course)) if k not in removed]
+        arrays = {name: getattr(problem, name) for name in ARRAYS}
+        arrays.update(
+            section_course=[course[k] for k in kept],
+            section_timeslot=[timeslot[k] for k in kept],
+            section_capacity=[capacity[k] for k in kept],
+            section_room=[room[k] for k in kept]
+        )
+        remap = np.full(len(course), -1, dtype=np.int64)
+        remap[kept] = np.arange(len(kept))
+        return Problem(arrays), remap[:len(topology.section_ids)], touched
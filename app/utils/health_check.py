@@ -1,5 +1,7 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, current_app
 from app import db
+from app.utils.instrumentation import metrics, InstrumentedQueuePool
+from app.utils.replica import REPLICA
 from sqlalchemy import text
 
 bp = Blueprint('health', __name__)
@@ -16,3 +18,24 @@ def readiness_check():
         return jsonify({'status': 'ready'}), 200
     except Exception as e:
         return jsonify({'status': 'not ready', 'error': str(e)}), 503
+
+@bp.route('/pool')
+def pool_stats():
+    """Connection pool counters of this process: checkouts, waits, overflow"""
+    pool = db.engine.pool
+    if not isinstance(pool, InstrumentedQueuePool):
+        return jsonify({'pool': type(pool).__name__, 'instrumented': False}), 200
+    stats = {'pool': type(pool).__name__, 'instrumented': True, **pool.stats()}
+    replica = current_app.extensions.get(REPLICA)
+    if replica is not None and isinstance(replica.pool, InstrumentedQueuePool):
+        stats['replica'] = replica.pool.stats()
+    return jsonify(stats), 200
+
+@bp.route('/metrics')
+def prometheus_metrics():
+    """Optimization stage timings and counters in Prometheus text format"""
+    pool = db.engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        for name, value in pool.stats().items():
+            metrics.set('db_pool', value, stat=name)
+    return current_app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,201 @@
+from contextlib import contextmanager
+from threading import Lock, local
+import json
+import logging
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+class RunInstrumentation:
+    """Stage timers and counters for a single optimization run.
+
+    Stages are recorded either as sequential laps (``lap('load')`` closes the
+    stage that started at the previous lap) or with the ``stage`` context
+    manager for nested work.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self._last_lap = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.stages[name] = self.stages.get(name, 0.0) + (now - self._last_lap)
+        self._last_lap = now
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - started)
+            self._last_lap = time.perf_counter()
+
+    def count(self, name, value):
+        self.counters[name] = value
+
+    def as_dict(self):
+        return {
+            'stages': {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            'counters': dict(self.counters)
+        }
+
+    def log(self, label='optimization'):
+        logger.info(f"{label} instrumentation {json.dumps(self.as_dict(), sort_keys=True)}")
+
+
+class MetricsRegistry:
+    """Process-local metrics rendered in the Prometheus text format.
+
+    Each gunicorn worker keeps its own registry, so scrape every worker (or
+    use the persisted run history) when aggregating across processes.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._summaries = {}
+        self._help = {}
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            total, count = self._summaries.get(key, (0.0, 0))
+            self._summaries[key] = (total + value, count + 1)
+
+    def observe_run(self, instrumentation, status):
+        """Fold one run's stage timings and counters into the registry"""
+        self.inc('scheduler_runs_total', status=status)
+        for stage, seconds in instrumentation.stages.items():
+            self.observe('scheduler_stage_seconds', seconds, stage=stage)
+            self.set('scheduler_last_stage_seconds', seconds, stage=stage)
+        for counter, value in instrumentation.counters.items():
+            if isinstance(value, (int, float)):
+                self.set('scheduler_last_run', value, counter=counter)
+
+    @staticmethod
+    def _labels(labels):
+        if not labels:
+            return ''
+        return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+    def render(self):
+        lines = []
+        with self._lock:
+            families = {}
+            for (name, labels), value in self._counters.items():
+                families.setdefault((name, 'counter'), []).append((labels, value))
+            for (name, labels), value in self._gauges.items():
+                families.setdefault((name, 'gauge'), []).append((labels, value))
+            summaries = dict(self._summaries)
+
+        for (name, kind), samples in sorted(families.items()):
+            if name in self._help:
+                lines.append(f'# HELP {name} {self._help[name]}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in sorted(samples):
+                lines.append(f'{name}{self._labels(labels)} {value}')
+
+        for name in sorted({name for name, _ in summaries}):
+            if name in self._help:
+                lines.append(f'# HELP {name} {self._help[name]}')
+            lines.append(f'# TYPE {name} summary')
+            for (sample_name, labels), (total, count) in sorted(summaries.items()):
+                if sample_name == name:
+                    lines.append(f'{name}_sum{self._labels(labels)} {total}')
+                    lines.append(f'{name}_count{self._labels(labels)} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+metrics.describe('scheduler_runs_total', 'Optimization runs by final solver status')
+metrics.describe('scheduler_stage_seconds', 'Time spent per optimization stage')
+metrics.describe('scheduler_last_stage_seconds', 'Stage timings of the most recent run')
+metrics.describe('scheduler_last_run', 'Model size and result counters of the most recent run')
+metrics.describe('db_pool', 'Connection pool counters and state of this process (see /pool)')
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that counts checkouts, waits and overflow use.
+
+    A checkout waits when every pooled and overflow connection is in use;
+    it then blocks until one is checked in or ``pool_timeout`` passes.
+    Counters are per process, like ``MetricsRegistry``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = Lock()
+        self._nested = local()
+        self._stats = {'checkouts': 0, 'waits': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0,
+                       'timeouts': 0, 'overflow_checkouts': 0, 'peak_checked_out': 0, 'peak_overflow': 0}
+
+    def _do_get(self):
+        # QueuePool retries by calling _do_get again; count the outer call only
+        if getattr(self._nested, 'active', False):
+            return super()._do_get()
+        exhausted = self._max_overflow > -1 and self._overflow >= self._max_overflow and not self.checkedin()
+        started = time.perf_counter()
+        self._nested.active = True
+        try:
+            entry = super()._do_get()
+        except PoolTimeout:
+            self._record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        finally:
+            self._nested.active = False
+        if exhausted:
+            self._record_wait(time.perf_counter() - started)
+        with self._stats_lock:
+            stats = self._stats
+            stats['checkouts'] += 1
+            overflow = max(self.overflow(), 0)
+            if overflow:
+                stats['overflow_checkouts'] += 1
+            stats['peak_checked_out'] = max(stats['peak_checked_out'], self.checkedout())
+            stats['peak_overflow'] = max(stats['peak_overflow'], overflow)
+        return entry
+
+    def _record_wait(self, seconds, timed_out=False):
+        with self._stats_lock:
+            stats = self._stats
+            stats['waits'] += 1
+            stats['timeouts'] += timed_out
+            stats['wait_seconds'] += seconds
+            stats['max_wait_seconds'] = max(stats['max_wait_seconds'], seconds)
+
+    def stats(self):
+        """Counters since the pool was created, plus its current state"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update(
+            wait_seconds=round(stats['wait_seconds'], 6),
+            max_wait_seconds=round(stats['max_wait_seconds'], 6),
+            size=self.size(),
+            max_overflow=self._max_overflow,
+            timeout=self.timeout(),
+            checked_in=self.checkedin(),
+            checked_out=self.checkedout(),
+            overflow=max(self.overflow(), 0)
+        )
+        return stats
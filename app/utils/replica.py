@@ -0,0 +1,109 @@
+"""Read-replica routing for reporting and listing reads.
+
+With ``REPLICA_DATABASE_URL`` set, ``create_app`` opens a second engine
+(``app.extensions['replica']``) next to the primary one. The session is a
+``RoutingSession``: inside ``replica_reads`` (or a view decorated with
+``replica_route``) its SELECTs go to the replica, everything else to the
+primary:
+
+    flushes, INSERT/UPDATE/DELETE, text() and SELECT ... FOR UPDATE
+    every read after the session has written, so a block reads its own writes
+
+Staleness guard: entering replica reads compares two versions on both
+databases: the published schedule version
+(``RunHistoryService.published_version``) and the live version that every
+enrollment and drop bumps (``enrollment.live_version``). A replica that has
+not replayed the latest run or the latest live write yet, or cannot be
+reached, is skipped and the block reads from the primary. The guard costs
+two indexed lookups on each database.
+
+Without a replica every read goes to the primary, as before.
+"""
+from contextlib import contextmanager
+from functools import wraps
+import logging
+
+from flask import current_app, g, has_app_context, make_response, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+REPLICA = 'replica'
+
+class RoutingSession(Session):
+    """Session that sends plain reads to the replica engine when asked to"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            reading = (not self._flushing and getattr(clause, 'is_select', False)
+                       and getattr(clause, '_for_update_arg', None) is None)
+            if not reading and (self._flushing or getattr(clause, 'is_dml', False)):
+                self.info['wrote'] = True
+            elif reading and not self.info.get('wrote') and has_app_context() and g.get('_replica_reads'):
+                return current_app.extensions[REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def has_replica():
+    return REPLICA in current_app.extensions
+
+def _versions(semester):
+    """(published run id, live write id) of the semester on the database
+    the session reads from"""
+    from app.services.enrollment import live_version
+    from app.services.run_history import RunHistoryService
+
+    return RunHistoryService().published_version(semester), live_version(semester)
+
+def _replica_is_current(semester):
+    """Whether the replica has the semester's published schedule version and
+    its latest enrollment or drop"""
+    db = current_app.extensions['sqlalchemy']
+    previous = g.get('_replica_reads', False)
+    try:
+        g._replica_reads = False
+        primary = _versions(semester)
+        g._replica_reads = True
+        replica = _versions(semester)
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.warning(f"Replica unavailable, reading from the primary: {e}")
+        return False
+    finally:
+        g._replica_reads = previous
+    if replica != primary:
+        logger.info(f"Replica behind for {semester or 'all semesters'} "
+                    f"(published run and live write {replica} vs {primary}), reading from the primary")
+        return False
+    return True
+
+@contextmanager
+def replica_reads(semester=None):
+    """Send the block's reads to the replica unless it lags behind the
+    primary; yields the source used, 'replica' or 'primary'"""
+    source = REPLICA if has_replica() and _replica_is_current(semester) else 'primary'
+    previous = g.get('_replica_reads', False)
+    g._replica_reads = source == REPLICA
+    try:
+        yield source
+    finally:
+        g._replica_reads = previous
+
+def stream_from_replica(chunks, semester=None):
+    """Wrap a streamed body so its reads, which run after the view has
+    returned, go to the replica too"""
+    with replica_reads(semester):
+        yield from chunks
+
+def replica_route(view):
+    """Serve a read-only view from the replica; the X-Read-Source header
+    tells which database answered. The staleness guard checks the
+    ``semester`` view argument or query parameter, if any."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        semester = kwargs.get('semester') or request.args.get('semester')
+        with replica_reads(semester) as source:
+            response = make_response(view(*args, **kwargs))
+        response.headers['X-Read-Source'] = source
+        return response
+    return wrapper
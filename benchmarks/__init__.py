@@ -0,0 +1 @@
+"""Scheduler benchmarks and synthetic workload generators"""
@@ -0,0 +1,365 @@
+"""Production-like synthetic workloads.
+
+Demand in a real registration round is far from uniform: a few courses take
+most of the requests, students mostly ask for courses in their own major and
+advanced courses are requested together with (or after) their prerequisites.
+WorkloadGenerator reproduces those properties from a seed and can stream
+100k-student datasets straight into the database without holding them in
+memory.
+"""
+from datetime import time
+import bisect
+import csv
+import io
+import itertools
+import math
+import random
+
+POPULARITY_DISTRIBUTIONS = ('uniform', 'zipf', 'lognormal')
+
+DAYS = 5
+PERIODS = [
+    (time(8, 0), time(9, 30)),
+    (time(10, 0), time(11, 30)),
+    (time(13, 0), time(14, 30)),
+    (time(15, 0), time(16, 30))
+]
+
+class WorkloadGenerator:
+    """Seeded generator for students, courses, timeslots and preferences.
+
+    popularity      'uniform', 'zipf' (``skew`` = exponent) or 'lognormal'
+                    (``skew`` = sigma) course popularity within each major
+    num_majors      number of major clusters; courses are split evenly
+    major_affinity  probability a request is drawn from the student's major
+    prereq_depth    length of prerequisite chains inside a major (0 = none)
+    prereq_coherence  probability an advanced request is backed by its
+                    prerequisite, either completed or requested alongside it
+    tightness       realized demand / seats per course (>1 oversubscribes)
+    rooms           number of rooms (default: enough for the expected
+                    sections with a quarter to spare)
+    """
+
+    def __init__(self, num_students, num_courses=None, num_majors=1, popularity='zipf',
+                 skew=1.0, major_affinity=0.7, prereq_depth=0, prereq_coherence=0.8,
+                 tightness=0.85, min_prefs=3, max_prefs=5, rooms=None, seed=0):
+        if popularity not in POPULARITY_DISTRIBUTIONS:
+            raise ValueError(f'Unknown popularity distribution: {popularity}')
+
+        self.num_students = num_students
+        self.num_courses = num_courses or max(10, num_students // 50)
+        self.num_majors = max(1, min(num_majors, self.num_courses))
+        self.popularity = popularity
+        self.skew = skew
+        self.major_affinity = major_affinity if self.num_majors > 1 else 0.0
+        self.prereq_depth = prereq_depth
+        self.prereq_coherence = prereq_coherence
+        self.tightness = tightness
+        self.min_prefs = min_prefs
+        self.max_prefs = max_prefs
+        self.seed = seed
+
+        self._build_catalog()
+        self.num_instructors = max(1, self.num_courses // 3)
+        self.num_rooms = rooms
+
+    def _rng(self, stream):
+        # Independent streams keep each table reproducible on its own
+        return random.Random(f'{self.seed}:{stream}')
+
+    def _weights(self, n, rng):
+        if self.popularity == 'uniform':
+            weights = [1.0] * n
+        elif self.popularity == 'zipf':
+            weights = [1.0 / (rank + 1) ** self.skew for rank in range(n)]
+        else:
+            weights = [rng.lognormvariate(0.0, self.skew) for _ in range(n)]
+        rng.shuffle(weights)
+        return weights
+
+    def _build_catalog(self):
+        """Assign majors, chain levels, prerequisites and popularity to courses"""
+        rng = self._rng('catalog')
+        chain_length = self.prereq_depth + 1
+
+        self.course_major = [c % self.num_majors for c in range(self.num_courses)]
+        self.course_level = [0] * self.num_courses
+        self.course_prereq = [None] * self.num_courses
+        self.course_chain = [0] * self.num_courses
+        self.major_courses = [[] for _ in range(self.num_majors)]
+        for c in range(self.num_courses):
+            self.major_courses[self.course_major[c]].append(c)
+
+        for courses in self.major_courses:
+            for position, c in enumerate(courses):
+                self.course_level[c] = position % chain_length
+                self.course_chain[c] = position // chain_length
+                if self.course_level[c] > 0:
+                    self.course_prereq[c] = courses[position - 1]
+
+        self.course_weight = self._weights(self.num_courses, rng)
+        self._global_cumulative = list(itertools.accumulate(self.course_weight))
+        self._major_cumulative = [
+            list(itertools.accumulate(self.course_weight[c] for c in courses))
+            for courses in self.major_courses
+        ]
+
+    def course_code(self, c):
+        return f'D{self.course_major[c]:02d}-{self.course_level[c] + 1}{self.course_chain[c]:03d}'
+
+    def _draw(self, rng, major):
+        if rng.random() < self.major_affinity:
+            cumulative = self._major_cumulative[major]
+            pool = self.major_courses[major]
+        else:
+            cumulative = self._global_cumulative
+            pool = None
+        idx = min(bisect.bisect(cumulative, rng.random() * cumulative[-1]), len(cumulative) - 1)
+        return pool[idx] if pool is not None else idx
+
+    # Row streams ---------------------------------------------------------
+
+    def _section_sizes(self, demand=None):
+        """Seats of every section, largest first (see Problem.plan_sections)"""
+        sizes = []
+        for c, course in enumerate(self.courses(demand)):
+            requests = demand[c] if demand is not None else course['capacity'] * self.tightness
+            sections = max(1, min(5, int(requests) // 40))
+            sizes.extend([course['capacity'] // sections] * sections)
+        return sorted(sizes, reverse=True)
+
+    def timeslots(self):
+        slot_id = 0
+        for day in range(DAYS):
+            for start, end in PERIODS:
+                slot_id += 1
+                yield {
+                    'id': slot_id,
+                    'day': day,
+                    'start_time': start,
+                    'end_time': end,
+                    'room': None
+                }
+
+    def rooms(self, demand=None):
+        """Rooms sized by quantile of the sections ``demand`` calls for, with
+        headroom: room k seats the k/num_rooms-th largest section and a tenth
+        more. Without ``num_rooms`` there are enough for every section with a
+        quarter of the room-periods to spare."""
+        sizes = self._section_sizes(demand)
+        num_rooms = self.num_rooms or max(4, math.ceil(1.25 * len(sizes) / len(PERIODS) / DAYS))
+        for k in range(num_rooms):
+            size = sizes[min(len(sizes) - 1, k * len(sizes) // num_rooms)]
+            yield {
+                'id': k + 1,
+                'name': f'Room {k + 1:03d}',
+                'capacity': max(30, 10 * math.ceil(size * 1.1 / 10))
+            }
+
+    def instructors(self):
+        for i in range(self.num_instructors):
+            yield {'id': i + 1, 'name': f'Instructor {i + 1}'}
+
+    def profiles(self):
+        """Yield (student index, major, year) for every student"""
+        rng = self._rng('profiles')
+        for i in range(self.num_students):
+            yield i, rng.randrange(self.num_majors), rng.randint(1, 4)
+
+    def students(self):
+        for i, _, _ in self.profiles():
+            yield {
+                'id': i + 1,
+                'student_id': f'S{i:06d}',
+                'name': f'Student {i}',
+                'email': f'student{i}@university.edu'
+            }
+
+    def requests(self):
+        """Yield (student id, ordered course indexes, completed course indexes)"""
+        rng = self._rng('preferences')
+        max_prefs = min(self.max_prefs, self.num_courses)
+        for i, major, year in self.profiles():
+            k = min(max_prefs, rng.randint(self.min_prefs, self.max_prefs))
+            chosen = []
+            completed = set()
+            attempts = 0
+            # Completed courses are not requested again, so stop once none are left
+            while len(chosen) < k and len(chosen) + len(completed) < self.num_courses:
+                attempts += 1
+                if attempts > 100 * k:
+                    break
+                c = self._draw(rng, major)
+                if c in chosen or c in completed:
+                    continue
+                prereq = self.course_prereq[c]
+                backed = prereq is None or prereq in chosen or prereq in completed
+                if not backed and rng.random() < self.prereq_coherence:
+                    if year > self.course_level[c]:
+                        # Far enough along to have finished the whole chain below
+                        while prereq is not None and prereq not in chosen:
+                            completed.add(prereq)
+                            prereq = self.course_prereq[prereq]
+                    elif len(chosen) + 1 < k:
+                        chosen.append(prereq)
+                    else:
+                        continue
+                chosen.append(c)
+            yield i + 1, chosen, sorted(completed)
+
+    def preferences(self):
+        pref_id = 0
+        for student_id, chosen, _ in self.requests():
+            for priority, c in enumerate(chosen, start=1):
+                pref_id += 1
+                yield {
+                    'id': pref_id,
+                    'student_id': student_id,
+                    'course_id': c + 1,
+                    'priority': priority
+                }
+
+    def completions(self):
+        for student_id, _, completed in self.requests():
+            for c in completed:
+                yield {'student_id': student_id, 'course_id': c + 1}
+
+    def prerequisites(self):
+        for c, prereq in enumerate(self.course_prereq):
+            if prereq is not None:
+                yield {'course_id': c + 1, 'prerequisite_id': prereq + 1}
+
+    def courses(self, demand=None):
+        """Course rows; capacities follow ``demand`` when it is known"""
+        rng = self._rng('capacity')
+        if demand is None:
+            mean_prefs = (self.min_prefs + self.max_prefs) / 2
+            total = self._global_cumulative[-1]
+            demand = [self.num_students * mean_prefs * w / total for w in self.course_weight]
+        # Never fewer seats than an even share of the minimum 3-course load
+        floor = math.ceil(3 * self.num_students / self.num_courses)
+        for c in range(self.num_courses):
+            jitter = rng.uniform(0.9, 1.1)
+            yield {
+                'id': c + 1,
+                'course_code': self.course_code(c),
+                'name': f'Course {c + 1}',
+                'capacity': max(floor, 30, math.ceil(demand[c] * jitter / self.tightness)),
+                'duration_minutes': 90,
+                'instructor': f'Instructor {c % self.num_instructors + 1}',
+                'instructor_id': c % self.num_instructors + 1
+            }
+
+    # Materialization -----------------------------------------------------
+
+    def generate(self):
+        """Build the whole problem in memory"""
+        preferences = list(self.preferences())
+        demand = [0] * self.num_courses
+        for pref in preferences:
+            demand[pref['course_id'] - 1] += 1
+        return {
+            'students': list(self.students()),
+            'courses': list(self.courses(demand)),
+            'timeslots': list(self.timeslots()),
+            'rooms': list(self.rooms(demand)),
+            'instructors': list(self.instructors()),
+            'preferences': preferences,
+            'prerequisites': list(self.prerequisites()),
+            'completions': list(self.completions())
+        }
+
+    def write(self, batch_size=10000):
+        """Stream the problem into the app database (inside an app context).
+
+        Preferences are written as they are generated; course capacities are
+        corrected and rooms sized afterwards from the realized demand.
+        """
+        from app import db
+        from app.models.models import (Student, Course, TimeSlot, Room, Instructor, CoursePreference,
+                                       CoursePrerequisite, CourseCompletion)
+        from sqlalchemy import update, bindparam
+
+        db.drop_all()
+        db.create_all()
+
+        bulk_insert(TimeSlot.__table__, self.timeslots(), batch_size)
+        bulk_insert(Instructor.__table__, self.instructors(), batch_size)
+        bulk_insert(Course.__table__, self.courses(), batch_size)
+        bulk_insert(Student.__table__, self.students(), batch_size)
+
+        demand = [0] * self.num_courses
+
+        def counted(rows):
+            for row in rows:
+                demand[row['course_id'] - 1] += 1
+                yield row
+
+        bulk_insert(CoursePreference.__table__, counted(self.preferences()), batch_size)
+        bulk_insert(CoursePrerequisite.__table__, self.prerequisites(), batch_size)
+        bulk_insert(CourseCompletion.__table__, self.completions(), batch_size)
+        # Rooms are sized to the sections the realized demand calls for
+        bulk_insert(Room.__table__, self.rooms(demand), batch_size)
+
+        db.session.execute(
+            update(Course.__table__)
+            .where(Course.__table__.c.id == bindparam('course_pk'))
+            .values(capacity=bindparam('new_capacity')),
+            [{'course_pk': row['id'], 'new_capacity': row['capacity']} for row in self.courses(demand)]
+        )
+        db.session.commit()
+        return demand
+
+def bulk_insert(table, rows, batch_size=10000):
+    """Insert an iterable of row dicts in fixed-size chunks.
+
+    PostgreSQL gets COPY ... FROM STDIN; other backends use executemany.
+    Explicit ids are assumed, so PostgreSQL sequences are bumped afterwards.
+    """
+    from app import db
+
+    postgres = db.engine.dialect.name == 'postgresql'
+    written = 0
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, batch_size))
+        if not chunk:
+            break
+        if postgres:
+            _copy_chunk(db, table, chunk)
+        else:
+            db.session.execute(table.insert(), chunk)
+            db.session.commit()
+        written += len(chunk)
+
+    if postgres and written and 'id' in table.c:
+        db.session.execute(db.text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), (SELECT MAX(id) FROM {table.name}))"
+        ))
+        db.session.commit()
+    return written
+
+def _copy_rows(table, chunk):
+    """Columns and value rows for COPY, with the client-side column defaults
+    (e.g. ``created_at``) that COPY, unlike an INSERT, would leave NULL"""
+    columns = list(chunk[0].keys())
+    defaults = {}
+    for column in table.c:
+        default = column.default
+        if column.name in columns or default is None or not (default.is_scalar or default.is_callable):
+            continue
+        defaults[column.name] = default.arg(None) if default.is_callable else default.arg
+    return columns + list(defaults), [[row[c] for c in columns] + list(defaults.values()) for row in chunk]
+
+def _copy_chunk(db, table, chunk):
+    columns, rows = _copy_rows(table, chunk)
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+
+    connection = db.session.connection().connection
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    db.session.commit()
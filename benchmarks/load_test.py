@@ -0,0 +1,364 @@
+"""Load-test harness for the Flask API.
+
+Boots the app against a local database (a seeded SQLite file by default, or
+any DATABASE_URL such as a local PostgreSQL), serves it with gunicorn or the
+threaded Werkzeug server, drives concurrent requests at the main read
+endpoints and reports latency percentiles and throughput per endpoint:
+
+    python -m benchmarks.load_test --students 2000 --server gunicorn --workers 4 \\
+        --concurrency 32 --duration 20 --baseline benchmarks/load_baseline.json
+
+With --baseline the run exits non-zero when an endpoint's p95 latency or
+throughput regresses past --tolerance; --save-baseline records a new one.
+
+--server uvicorn serves the async read API (app/asgi.py) instead, so the same
+read endpoints can be compared between the sync and the async path.
+
+--hot-seats N adds a write workload after the reads: N extra seats go to the
+semester's largest section, every thread POSTs enrollments into it with
+fresh idempotency keys, and the run fails if the section ends up oversold.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_DB = os.path.join(ROOT, 'benchmarks', '.cache', 'load_test.db')
+SEMESTER = 'Spring2024'
+
+# name -> path template; {student} is drawn uniformly from the cohort and
+# {batch} is BATCH_SIZE such students
+ENDPOINTS = {
+    'student_schedule': '/api/schedules/student/{student}',
+    'student_batch': '/api/schedules/students?ids={batch}',
+    'course_availability': f'/api/v1/courses/availability?semester={SEMESTER}',
+    'students': '/api/v1/students?page={page}',
+    'courses': '/api/v1/courses',
+    'metrics': f'/api/schedules/metrics/{SEMESTER}'
+}
+# The ones the async read API (app/asgi.py) serves
+ASYNC_ENDPOINTS = ['student_schedule', 'student_batch', 'course_availability']
+BATCH_SIZE = 20
+
+def prepare_database(database_url, num_students, engine_name, seed):
+    """Seed and schedule the database unless it already holds a cohort"""
+    os.environ['DATABASE_URL'] = database_url
+    from app import create_app, db
+    from app.models.models import Student, Schedule
+    from app.services.timetable_service import TimetableService
+    from benchmarks.generator import WorkloadGenerator
+    from benchmarks.run_benchmarks import load_engine
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        if Student.query.count() != num_students:
+            print(f'Seeding {num_students} students...', flush=True)
+            WorkloadGenerator(num_students, seed=seed).write()
+        if not Schedule.query.filter_by(semester=SEMESTER).count():
+            print(f'Scheduling with the {engine_name} engine...', flush=True)
+            engine_cls = load_engine(engine_name)
+            engine_cls().optimize_schedules(SEMESTER)
+            TimetableService().rebuild()
+        return Student.query.count()
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_until_up(base_url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'{base_url}/health', timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server at {base_url} did not come up')
+
+def start_server(kind, database_url, workers):
+    """Start the app and return (base_url, stop callback)"""
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+
+    if kind == 'gunicorn':
+        env = dict(os.environ, DATABASE_URL=database_url)
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}',
+             '--log-level', 'warning', 'app:create_app("production")'],
+            cwd=ROOT, env=env
+        )
+        wait_until_up(base_url)
+        return base_url, lambda: (process.terminate(), process.wait())
+
+    if kind == 'uvicorn':
+        env = dict(os.environ, DATABASE_URL=database_url)
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', '--workers', str(workers), '--host', '127.0.0.1',
+             '--port', str(port), '--log-level', 'warning', '--no-access-log', 'app.asgi:app'],
+            cwd=ROOT, env=env
+        )
+        wait_until_up(base_url)
+        return base_url, lambda: (process.terminate(), process.wait())
+
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    os.environ['DATABASE_URL'] = database_url
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', port, create_app('production'), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    wait_until_up(base_url)
+    return base_url, server.shutdown
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    to_ms = lambda v: round(v * 1000, 2) if v is not None else None
+    return {
+        'requests': len(latencies) + errors,
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0,
+        'mean_ms': to_ms(sum(latencies) / len(latencies)) if latencies else None,
+        'p50_ms': to_ms(percentile(latencies, 50)),
+        'p95_ms': to_ms(percentile(latencies, 95)),
+        'p99_ms': to_ms(percentile(latencies, 99))
+    }
+
+def drive(base_url, template, num_students, concurrency, duration, max_requests, seed):
+    """Hammer one endpoint from ``concurrency`` threads; returns the summary"""
+    lock = threading.Lock()
+    latencies = []
+    errors = [0]
+    issued = [0]
+    deadline = time.time() + duration
+
+    def worker(worker_id):
+        rng = random.Random(f'{seed}:{worker_id}')
+        local_latencies = []
+        local_errors = 0
+        while time.time() < deadline:
+            with lock:
+                if max_requests and issued[0] >= max_requests:
+                    break
+                issued[0] += 1
+            path = template.format(student=rng.randint(1, num_students),
+                                   page=rng.randint(1, max(1, num_students // 20)),
+                                   batch=','.join(str(rng.randint(1, num_students)) for _ in range(BATCH_SIZE)))
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(base_url + path, timeout=60) as response:
+                    response.read()
+                local_latencies.append(time.perf_counter() - started)
+            except OSError:
+                local_errors += 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return summarize(latencies, errors[0], time.time() - started)
+
+def prepare_hot_section(database_url, extra_seats):
+    """Add seats to the semester's largest section; returns its id"""
+    os.environ['DATABASE_URL'] = database_url
+    from app import create_app, db
+    from app.models.models import Section
+
+    with create_app().app_context():
+        section = db.session.scalars(
+            db.select(Section).where(Section.semester == SEMESTER).order_by(Section.capacity.desc(), Section.id)
+        ).first()
+        if section is None:
+            raise RuntimeError(f'No sections in {SEMESTER}; run an optimization first')
+        section.capacity += extra_seats
+        db.session.commit()
+        return section.id
+
+def check_hot_section(database_url, section_id):
+    """(seat counter, capacity, schedule rows) of the hot section"""
+    os.environ['DATABASE_URL'] = database_url
+    from app import create_app, db
+    from app.models.models import Section, Schedule
+
+    with create_app().app_context():
+        section = db.session.get(Section, section_id)
+        return section.enrolled, section.capacity, Schedule.query.filter_by(section_id=section_id).count()
+
+def drive_enrollments(base_url, section_id, num_students, concurrency, duration, max_requests, seed):
+    """POST enrollments into one section from ``concurrency`` threads; 201
+    and 409 (full, conflict) are both answers, anything else an error"""
+    lock = threading.Lock()
+    latencies = []
+    errors = [0]
+    issued = [0]
+    outcomes = {}
+    deadline = time.time() + duration
+
+    def worker(worker_id):
+        rng = random.Random(f'{seed}:{worker_id}')
+        local_latencies, local_outcomes = [], {}
+        local_errors = 0
+        while time.time() < deadline:
+            with lock:
+                if max_requests and issued[0] >= max_requests:
+                    break
+                issued[0] += 1
+            body = json.dumps({'semester': SEMESTER, 'student_id': rng.randint(1, num_students),
+                               'section_id': section_id}).encode()
+            req = urllib.request.Request(base_url + '/api/v1/enrollments', data=body, method='POST', headers={
+                'Content-Type': 'application/json', 'Idempotency-Key': uuid.uuid4().hex})
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req, timeout=60) as response:
+                    status = json.loads(response.read())['status']
+            except urllib.error.HTTPError as e:
+                if e.code != 409:
+                    local_errors += 1
+                    continue
+                status = json.loads(e.read())['status']
+            except OSError:
+                local_errors += 1
+                continue
+            local_latencies.append(time.perf_counter() - started)
+            local_outcomes[status] = local_outcomes.get(status, 0) + 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+            for status, count in local_outcomes.items():
+                outcomes[status] = outcomes.get(status, 0) + count
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return {**summarize(latencies, errors[0], time.time() - started), 'outcomes': outcomes}
+
+def check_regressions(results, baseline, tolerance):
+    """Return human-readable regressions of ``results`` against ``baseline``"""
+    failures = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if current['errors'] and not previous.get('errors'):
+            failures.append(f"{name}: {current['errors']} errors (baseline had none)")
+        if previous.get('p95_ms') and current['p95_ms'] is not None \
+                and current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            failures.append(f"{name}: p95 {current['p95_ms']}ms vs baseline {previous['p95_ms']}ms")
+        if previous.get('throughput_rps') \
+                and current['throughput_rps'] < previous['throughput_rps'] * (1 - tolerance):
+            failures.append(f"{name}: {current['throughput_rps']} req/s vs baseline "
+                            f"{previous['throughput_rps']} req/s")
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load-test the scheduler API')
+    parser.add_argument('--database-url', default=f'sqlite:///{DEFAULT_DB}')
+    parser.add_argument('--students', type=int, default=500)
+    parser.add_argument('--engine', default='service',
+                        help='Scheduler engine used to populate schedules (see run_benchmarks); only '
+                             'service saves the sections that availability and --hot-seats read')
+    parser.add_argument('--server', choices=['gunicorn', 'werkzeug', 'uvicorn'], default='gunicorn',
+                        help='uvicorn serves the async read API (read endpoints only)')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn or uvicorn worker processes')
+    parser.add_argument('--url', help='Target an already running server instead of booting one')
+    parser.add_argument('--endpoints', nargs='+', choices=list(ENDPOINTS),
+                        help='Default: all, or those of the async API with --server uvicorn')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per endpoint')
+    parser.add_argument('--max-requests', type=int, default=0, help='Cap per endpoint (0 = none)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', help='Fail when results regress past this baseline file')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--save-baseline', help='Write the results as a new baseline file')
+    parser.add_argument('--hot-seats', type=int, default=0,
+                        help='Also hammer enrollments into one section given this many extra seats')
+    args = parser.parse_args(argv)
+    if args.server == 'uvicorn':
+        if set(args.endpoints or ()) - set(ASYNC_ENDPOINTS) or args.hot_seats:
+            parser.error(f'The async read API only serves {", ".join(ASYNC_ENDPOINTS)}')
+    args.endpoints = args.endpoints or (ASYNC_ENDPOINTS if args.server == 'uvicorn' else list(ENDPOINTS))
+
+    sys.path.insert(0, ROOT)
+    if args.database_url.startswith('sqlite:///'):
+        os.makedirs(os.path.dirname(args.database_url[len('sqlite:///'):]) or '.', exist_ok=True)
+    num_students = prepare_database(args.database_url, args.students, args.engine, args.seed)
+    hot_section = prepare_hot_section(args.database_url, args.hot_seats) if args.hot_seats else None
+
+    stop = None
+    base_url = args.url
+    if not base_url:
+        base_url, stop = start_server(args.server, args.database_url, args.workers)
+
+    results = {}
+    try:
+        for name in args.endpoints:
+            summary = drive(base_url, ENDPOINTS[name], num_students, args.concurrency,
+                            args.duration, args.max_requests, args.seed)
+            results[name] = summary
+            print(f"{name:18s} {summary['throughput_rps']:9.1f} req/s  p50 {summary['p50_ms']}ms  "
+                  f"p95 {summary['p95_ms']}ms  p99 {summary['p99_ms']}ms  errors {summary['errors']}",
+                  flush=True)
+        if hot_section:
+            summary = drive_enrollments(base_url, hot_section, num_students, args.concurrency,
+                                        args.duration, args.max_requests, args.seed)
+            results['enroll_hot_section'] = summary
+            print(f"{'enroll_hot_section':18s} {summary['throughput_rps']:9.1f} req/s  p50 {summary['p50_ms']}ms  "
+                  f"p95 {summary['p95_ms']}ms  p99 {summary['p99_ms']}ms  errors {summary['errors']}  "
+                  f"{summary['outcomes']}", flush=True)
+    finally:
+        if stop:
+            stop()
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({
+                'recorded_at': datetime.utcnow().isoformat(),
+                'config': {k: v for k, v in vars(args).items() if k not in ('baseline', 'save_baseline')},
+                'results': results
+            }, f, indent=2)
+        print(f'Baseline written to {args.save_baseline}')
+
+    if hot_section:
+        enrolled, capacity, rows = check_hot_section(args.database_url, hot_section)
+        print(f'Hot section {hot_section}: {enrolled}/{capacity} seats, {rows} schedule rows')
+        if enrolled > capacity or enrolled != rows:
+            print('OVERSOLD: seat counter and schedule rows disagree with capacity')
+            return 1
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        failures = check_regressions(results, baseline, args.tolerance)
+        for failure in failures:
+            print(f'REGRESSION {failure}')
+        if failures:
+            return 1
+        print('No regressions against baseline')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,286 @@
+"""Scheduler benchmark suite.
+
+Generates (or reuses) a SQLite database per synthetic cohort, runs each
+scheduler engine against it in a fresh process with a fixed solver budget and
+writes one JSON results file that can be diffed between commits:
+
+    python -m benchmarks.run_benchmarks --scales 500 2000 10000 \\
+        --engines service realistic --time-limit 30 --output results.json
+    python -m benchmarks.run_benchmarks --compare baseline.json results.json
+"""
+from datetime import datetime
+import argparse
+import importlib
+import importlib.util
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import queue as queue_module
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CACHE_DIR = os.path.join(ROOT, 'benchmarks', '.cache')
+
+# name -> (import target, accepts a solver budget)
+ENGINES = {
+    'service': ('app.services.scheduler_service', True),
+    'full_scale': ('schedulers/full_scale_scheduler.py', True),
+    'ortools': ('schedulers/ortools_scheduler.py', True),
+    'realistic': ('schedulers/realistic_scheduler.py', False)
+}
+
+SEMESTER = 'Benchmark'
+
+def load_engine(name):
+    """Return the SchedulerService class implementing ``name``"""
+    target, _ = ENGINES[name]
+    if target.endswith('.py'):
+        spec = importlib.util.spec_from_file_location(f'bench_{name}', os.path.join(ROOT, target))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(target)
+    return module.SchedulerService
+
+def database_path(spec):
+    key = '_'.join(f'{k}-{spec[k]}' for k in sorted(spec))
+    return os.path.join(CACHE_DIR, f'{key}.db')
+
+def prepare_database(spec, rebuild=False):
+    """Materialize the synthetic cohort for ``spec`` into a cached SQLite file"""
+    path = database_path(spec)
+    if os.path.exists(path) and not rebuild:
+        return path, None
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    from app import create_app
+    from benchmarks.generator import WorkloadGenerator
+
+    started = time.time()
+    app = create_app()
+    with app.app_context():
+        WorkloadGenerator(**spec).write()
+    return path, time.time() - started
+
+def weighted_score(db, semester):
+    """Engine-independent objective: the service's priority weights over saved rows"""
+    from app.models.models import Schedule, CoursePreference
+    from sqlalchemy import select
+
+    priorities = {
+        (row.student_id, row.course_id): row.priority
+        for row in db.session.execute(
+            select(CoursePreference.student_id, CoursePreference.course_id, CoursePreference.priority)
+        )
+    }
+    score = 0
+    for row in db.session.execute(
+        select(Schedule.student_id, Schedule.course_id).where(Schedule.semester == semester)
+    ):
+        priority = priorities.get((row.student_id, row.course_id))
+        score += max(0, 11 - 2 * priority) if priority is not None else -2
+    return score
+
+def _run_case(db_path, engine_name, budget, queue):
+    """Child-process entry point; isolates peak RSS per case"""
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    sys.path.insert(0, ROOT)
+    from app import create_app, db
+
+    app = create_app()
+    with app.app_context():
+        engine_cls = load_engine(engine_name)
+        engine = engine_cls(**budget) if ENGINES[engine_name][1] else engine_cls()
+
+        started = time.time()
+        schedules = engine.optimize_schedules(SEMESTER)
+        total_time = time.time() - started
+
+        stats = getattr(engine, 'solution_stats', None) or getattr(engine, '_last_run_stats', {})
+        queue.put({
+            'status': stats.get('status', 'COMPLETED' if schedules else 'EMPTY'),
+            'total_time': round(total_time, 4),
+            'build_time': stats.get('build_time'),
+            'solve_time': stats.get('wall_time'),
+            'persist_time': stats.get('persist_time'),
+            'objective': stats.get('objective_value'),
+            'score': weighted_score(db, SEMESTER),
+            'assignments': len(schedules),
+            # ru_maxrss is reported in kilobytes on Linux
+            'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            'stages': stats.get('stages'),
+            'counters': stats.get('counters')
+        })
+
+def run_case(db_path, engine_name, budget, timeout):
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run_case, args=(db_path, engine_name, budget, queue))
+    process.start()
+
+    deadline = time.time() + timeout
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=1)
+        except queue_module.Empty:
+            if not process.is_alive():
+                result = {'status': 'CRASHED', 'exit_code': process.exitcode}
+            elif time.time() > deadline:
+                process.kill()
+                result = {'status': 'TIMEOUT'}
+    process.join()
+    return result
+
+def audit_scaling(db_path, worker_counts):
+    """Time the full analysis audit of the benchmark schedule at each worker count"""
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    from app import create_app
+    from app.services.snapshot import ScheduleSnapshot
+    from analysis.__main__ import REPORT_NAMES
+    from analysis.reports import run_reports
+
+    app = create_app()
+    with app.app_context():
+        started = time.time()
+        snapshot = ScheduleSnapshot.load(SEMESTER)
+        load_time = time.time() - started
+        timings = []
+        for workers in worker_counts:
+            started = time.time()
+            run_reports(snapshot, REPORT_NAMES, workers=workers)
+            timings.append({'workers': workers, 'load_time': round(load_time, 4),
+                            'report_time': round(time.time() - started, 4)})
+    base = timings[0]['report_time']
+    for timing in timings:
+        timing['speedup'] = round(base / timing['report_time'], 2) if timing['report_time'] else None
+    return timings
+
+def environment():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+CASE_FIELDS = ['engine', 'num_students', 'popularity', 'skew', 'num_majors',
+               'prereq_depth', 'tightness', 'seed']
+
+def case_key(result):
+    return tuple(result.get(field) for field in CASE_FIELDS)
+
+def compare(baseline_path, current_path):
+    """Print per-case deltas between two results files"""
+    with open(baseline_path) as f:
+        baseline = {case_key(r): r for r in json.load(f)['results']}
+    with open(current_path) as f:
+        current = json.load(f)['results']
+
+    fields = ['total_time', 'build_time', 'solve_time', 'persist_time', 'peak_rss_mb', 'score']
+    print(f"{'engine':12s} {'students':>8s} {'skew':>5s}  " + '  '.join(f'{f:>18s}' for f in fields))
+    for result in current:
+        old = baseline.get(case_key(result))
+        if old is None:
+            continue
+        cells = []
+        for field in fields:
+            before, after = old.get(field), result.get(field)
+            if before is None or after is None:
+                cells.append(f'{"n/a":>18s}')
+            elif before:
+                cells.append(f'{after:>10.2f} ({(after - before) / abs(before) * 100:+5.1f}%)')
+            else:
+                cells.append(f'{after:>18.2f}')
+        print(f"{result['engine']:12s} {result['num_students']:>8d} {result['skew']:>5.1f}  " + '  '.join(cells))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the scheduler engines on synthetic cohorts')
+    parser.add_argument('--scales', type=int, nargs='+', default=[500, 2000, 10000])
+    parser.add_argument('--engines', nargs='+', default=['service', 'realistic'], choices=sorted(ENGINES))
+    parser.add_argument('--skew', type=float, nargs='+', default=[1.0],
+                        help='Zipf exponent (or lognormal sigma) of course popularity')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--popularity', default='zipf', choices=['uniform', 'zipf', 'lognormal'])
+    parser.add_argument('--majors', type=int, default=1)
+    parser.add_argument('--prereq-depth', type=int, default=0)
+    parser.add_argument('--tightness', type=float, default=0.85,
+                        help='Realized demand per seat for each course')
+    parser.add_argument('--time-limit', type=float, default=30.0)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='Seconds before a case is killed (default: 10x time limit + 10 minutes)')
+    parser.add_argument('--rebuild', action='store_true', help='Regenerate cached cohort databases')
+    parser.add_argument('--audit-workers', type=int, nargs='+', default=[],
+                        help='Also time the analysis audit at these worker counts (e.g. 1 2 4 8)')
+    parser.add_argument('--output', default=os.path.join(ROOT, 'benchmarks', 'results.json'))
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='Compare two results files instead of running')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    budget = {
+        'max_time_in_seconds': args.time_limit,
+        'num_search_workers': args.workers,
+        'log_search_progress': False
+    }
+    timeout = args.timeout or args.time_limit * 10 + 600
+
+    results = []
+    audits = []
+    for num_students in args.scales:
+        for skew in args.skew:
+            spec = {
+                'num_students': num_students,
+                'popularity': args.popularity,
+                'skew': skew,
+                'num_majors': args.majors,
+                'prereq_depth': args.prereq_depth,
+                'tightness': args.tightness,
+                'seed': args.seed
+            }
+            db_path, generate_time = prepare_database(spec, rebuild=args.rebuild)
+            for engine_name in args.engines:
+                print(f'Running {engine_name} on {num_students} students (skew {skew})...', flush=True)
+                result = {'engine': engine_name, **spec, 'generate_time': generate_time}
+                result.update(run_case(db_path, engine_name, budget, timeout))
+                results.append(result)
+                print(f"  {result['status']}: total {result.get('total_time')}s, "
+                      f"solve {result.get('solve_time')}s, rss {result.get('peak_rss_mb')}MB", flush=True)
+            if args.audit_workers:
+                # Audits the schedule left by the last engine above
+                for timing in audit_scaling(db_path, args.audit_workers):
+                    audits.append({**spec, 'engine': args.engines[-1], **timing})
+                    print(f"  audit with {timing['workers']} workers: {timing['report_time']}s "
+                          f"(x{timing['speedup']})", flush=True)
+
+    report = {
+        'environment': environment(),
+        'budget': budget,
+        'results': results,
+        'audit_scaling': audits
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f'Wrote {len(results)} results to {args.output}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""Reproducible synthetic scheduling problems for benchmarks.
+
+A problem is a plain dict of row lists (students, courses, timeslots,
+preferences, ...) with explicit primary keys, so the same seed always yields
+the same rows whether it is kept in memory or written to SQLite. The rows
+come from benchmarks.generator.WorkloadGenerator; use its ``write`` method
+directly to stream large cohorts without materializing them.
+"""
+from benchmarks.generator import WorkloadGenerator, bulk_insert
+
+def generate_problem(num_students, skew=0.0, tightness=0.85, seed=0, **options):
+    """Build an in-memory problem.
+
+    ``skew`` is the Zipf exponent of course popularity (0 = uniform, as in
+    seed_data.py); any other WorkloadGenerator option may be passed through.
+    """
+    problem = WorkloadGenerator(num_students, skew=skew, tightness=tightness,
+                                seed=seed, **options).generate()
+    problem['spec'] = {
+        'num_students': num_students,
+        'skew': skew,
+        'tightness': tightness,
+        'seed': seed,
+        **options
+    }
+    return problem
+
+def write_problem(problem, batch_size=10000):
+    """Replace the current app database contents with ``problem``.
+
+    Must be called inside an app context.
+    """
+    from app import db
+    from app.models.models import Student, Course, TimeSlot, Room, Instructor, CoursePreference
+
+    db.drop_all()
+    db.create_all()
+
+    for model, key in [(TimeSlot, 'timeslots'),
+                       (Room, 'rooms'),
+                       (Instructor, 'instructors'),
+                       (Course, 'courses'),
+                       (Student, 'students'),
+                       (CoursePreference, 'preferences')]:
+        bulk_insert(model.__table__, problem[key], batch_size)
@@ -0,0 +1,72 @@
+"""Per-environment settings for ``create_app``.
+
+``load(name)`` returns the settings of one of ``CONFIGS`` with environment
+overrides applied: any setting can be set by an environment variable of the
+same name (``DB_POOL_SIZE=40``), and ``DATABASE_URL`` sets the database.
+``engine_options`` turns the ``DB_*`` settings into SQLAlchemy engine
+options.
+"""
+import os
+
+from sqlalchemy.engine import make_url
+
+from config.base import Config
+from config.development import DevelopmentConfig
+from config.testing import TestingConfig
+from config.production import ProductionConfig
+
+CONFIGS = {
+    'development': DevelopmentConfig,
+    'testing': TestingConfig,
+    'production': ProductionConfig
+}
+
+def _parse(raw, default):
+    if isinstance(default, bool):
+        return raw.strip().lower() in ('1', 'true', 'yes', 'on')
+    if isinstance(default, int):
+        return int(raw)
+    if isinstance(default, float):
+        return float(raw)
+    return raw
+
+def load(name, environ=None):
+    """Settings of the ``name`` environment with overrides from ``environ``"""
+    environ = os.environ if environ is None else environ
+    try:
+        config = CONFIGS[name]
+    except KeyError:
+        raise ValueError(f'Unknown config {name!r}; one of {", ".join(CONFIGS)}') from None
+    settings = {key: getattr(config, key) for key in dir(config) if key.isupper()}
+    for key, default in settings.items():
+        if key in environ:
+            try:
+                settings[key] = _parse(environ[key], default)
+            except ValueError:
+                raise ValueError(f'{key}={environ[key]!r} is not a valid {type(default).__name__}') from None
+    if 'DATABASE_URL' in environ:
+        settings['SQLALCHEMY_DATABASE_URI'] = environ['DATABASE_URL']
+    return settings
+
+def pooled(url):
+    """Whether the database at ``url`` is served from a sized pool (an
+    in-memory SQLite database lives in a single connection)"""
+    url = make_url(url)
+    return not (url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'))
+
+def engine_options(settings):
+    """SQLAlchemy engine options of the ``DB_*`` settings; explicit
+    ``SQLALCHEMY_ENGINE_OPTIONS`` win"""
+    url = make_url(settings['SQLALCHEMY_DATABASE_URI'])
+    options = {'pool_pre_ping': settings['DB_POOL_PRE_PING']}
+    if pooled(url):
+        options.update(
+            pool_size=settings['DB_POOL_SIZE'],
+            max_overflow=settings['DB_MAX_OVERFLOW'],
+            pool_timeout=settings['DB_POOL_TIMEOUT'],
+            pool_recycle=settings['DB_POOL_RECYCLE']
+        )
+    if settings['DB_STATEMENT_TIMEOUT_MS'] and url.get_backend_name() == 'postgresql':
+        options['connect_args'] = {'options': f"-c statement_timeout={int(settings['DB_STATEMENT_TIMEOUT_MS'])}"}
+    options.update(settings.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    return options
@@ -0,0 +1,4 @@
+from config.base import Config
+
+class DevelopmentConfig(Config):
+    DEBUG = True
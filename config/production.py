@@ -1,16 +1,14 @@
-import os
+from config.base import Config
+
+class ProductionConfig(Config):
+    SECRET_KEY = None  # must come from the environment
 
-class ProductionConfig:
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SECRET_KEY = os.environ.get('SECRET_KEY')
-    
     # Redis for caching
-    REDIS_URL = os.environ.get('REDIS_URL')
-    
+    REDIS_URL = None
+
     # Production optimizations
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_size': 10,
-        'pool_recycle': 300,
-        'pool_pre_ping': True
-    }
+    DB_POOL_SIZE = 10
+    DB_MAX_OVERFLOW = 20
+    DB_POOL_RECYCLE = 300
+    DB_POOL_PRE_PING = True
+    DB_STATEMENT_TIMEOUT_MS = 60000
@@ -0,0 +1,5 @@
+from config.base import Config
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
@@ -0,0 +1,53 @@
+from app.services.distributed import DistributedScheduler, STRATEGIES, run_worker, run_workers
+import argparse
+import logging
+import os
+
+def coordinate(args):
+    from app import create_app
+    app = create_app()
+    
+    with app.app_context():
+        scheduler = DistributedScheduler(
+            args.queue, shards=args.shards, strategy=args.strategy, local_workers=args.local_workers,
+            max_time_in_seconds=args.time_limit, num_search_workers=args.solver_workers, broker=args.broker
+        )
+        schedules = scheduler.optimize_schedules(args.semester)
+    
+    stats = scheduler.solution_stats
+    print(f"{stats['status']}: {len(schedules)} assignments from {stats['counters']['shards']} shards "
+          f"in {stats['solve_time']:.1f}s (run {stats['run_id']})")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Solve schedules on shard workers fed from a queue')
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    run_parser = commands.add_parser('run', help='Split the semester into shards, wait for workers, save')
+    run_parser.add_argument('--queue', required=True, help='Shard file directory shared with the workers')
+    run_parser.add_argument('--semester', default='Spring2024')
+    run_parser.add_argument('--shards', type=int, default=4)
+    run_parser.add_argument('--strategy', choices=STRATEGIES, default='students')
+    run_parser.add_argument('--local-workers', type=int, default=0,
+                            help='Also start this many worker processes on this machine')
+    run_parser.add_argument('--time-limit', type=float, default=60.0, help='Solver seconds per shard')
+    run_parser.add_argument('--solver-workers', type=int, default=1, help='CP-SAT threads per shard')
+    
+    worker_parser = commands.add_parser('worker', help='Claim and solve shards until stopped')
+    worker_parser.add_argument('--queue', required=True)
+    for command in (run_parser, worker_parser):
+        command.add_argument('--broker', default=os.environ.get('SOLVER_BROKER_URL'),
+                             help='Redis URL of the job queue (default: $SOLVER_BROKER_URL, '
+                                  'else a SQLite queue in --queue on this host)')
+    worker_parser.add_argument('--idle-timeout', type=float, default=None,
+                               help='Exit after this many seconds without work (default: never)')
+    worker_parser.add_argument('--processes', type=int, default=1,
+                               help='Worker processes on this host')
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    if args.command == 'run':
+        coordinate(args)
+    elif args.processes > 1:
+        run_workers(args.queue, args.processes, idle_timeout=args.idle_timeout, broker=args.broker)
+    else:
+        run_worker(args.queue, idle_timeout=args.idle_timeout, broker=args.broker)
@@ -0,0 +1,25 @@
+from app import create_app
+from app.services.export_service import ExportService, TABLES, FORMATS, default_format
+import argparse
+
+def export_semester(semester, directory, fmt, tables, batch_size):
+    app = create_app()
+    
+    with app.app_context():
+        written = ExportService(batch_size=batch_size).export(semester, directory, fmt, tables)
+    
+    for table, info in written.items():
+        print(f"{table}: {info['rows']} rows -> {info['path']}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export scheduling tables for offline analytics')
+    parser.add_argument('semester')
+    parser.add_argument('--output-dir', default='export')
+    parser.add_argument('--format', choices=FORMATS, default=None,
+                        help=f'Defaults to {default_format()} (parquet when pyarrow is installed)')
+    parser.add_argument('--tables', nargs='+', choices=TABLES, default=list(TABLES))
+    parser.add_argument('--batch-size', type=int, default=50000,
+                        help='Rows fetched from the cursor and written per chunk')
+    args = parser.parse_args()
+    
+    export_semester(args.semester, args.output_dir, args.format, args.tables, args.batch_size)
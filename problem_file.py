@@ -0,0 +1,57 @@
+from app import create_app
+from app.services.problem import Problem
+import argparse
+
+def dump(semester, path):
+    app = create_app()
+    
+    with app.app_context():
+        problem = Problem.from_database(semester)
+        problem.save(path)
+    
+    print(f"Wrote {problem.num_students} students, {problem.num_courses} courses, "
+          f"{problem.num_sections} sections, {len(problem.pref_course)} preferences to {path}")
+
+def info(path):
+    with Problem.load(path) as problem:
+        print(f"Metadata:    {problem.metadata}")
+        print(f"Students:    {problem.num_students}")
+        print(f"Courses:     {problem.num_courses}")
+        print(f"Timeslots:   {problem.num_timeslots}")
+        print(f"Sections:    {problem.num_sections}")
+        print(f"Preferences: {len(problem.pref_course)}")
+
+def solve(path, semester, time_limit, workers):
+    from app.services.scheduler_service import SchedulerService
+    app = create_app()
+    
+    with app.app_context():
+        scheduler = SchedulerService(max_time_in_seconds=time_limit, num_search_workers=workers)
+        schedules = scheduler.optimize_schedules(semester, problem=path)
+    
+    print(f"{scheduler.solution_stats['status']}: {len(schedules)} assignments saved for {semester}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write, inspect or solve binary problem files')
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    dump_parser = commands.add_parser('dump', help='Snapshot the database into a problem file')
+    dump_parser.add_argument('path')
+    dump_parser.add_argument('--semester', default='Spring2024')
+    
+    info_parser = commands.add_parser('info', help='Print the sizes stored in a problem file')
+    info_parser.add_argument('path')
+    
+    solve_parser = commands.add_parser('solve', help='Optimize from a problem file and save the schedule')
+    solve_parser.add_argument('path')
+    solve_parser.add_argument('--semester', default='Spring2024')
+    solve_parser.add_argument('--time-limit', type=float, default=60.0)
+    solve_parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+    
+    if args.command == 'dump':
+        dump(args.semester, args.path)
+    elif args.command == 'info':
+        info(args.path)
+    else:
+        solve(args.path, args.semester, args.time_limit, args.workers)
@@ -1,5 +1,8 @@
 from ortools.sat.python import cp_model
-from app.models.models import Student, Course, TimeSlot, CoursePreference, Schedule
+from app.models.models import Schedule
+from app.services.records import load_students, load_courses, load_timeslots, load_preferences, load_schedules
+from app.services.overlap import OverlapIndex, meeting_end
+from app.services.verification_service import VerificationService
 from app import db
 import logging
 import time
@@ -8,10 +11,13 @@ from collections import defaultdict
 logger = logging.getLogger(__name__)
 
 class SchedulerService:
-    def __init__(self):
+    def __init__(self, max_time_in_seconds=60.0, num_search_workers=4, log_search_progress=True):
         self.model = None
         self.solver = None
         self.solution_stats = {}
+        self.max_time_in_seconds = max_time_in_seconds
+        self.num_search_workers = num_search_workers
+        self.log_search_progress = log_search_progress
         
     def optimize_schedules(self, semester):
         """Full-scale OR-Tools optimization for 500 students"""
@@ -27,9 +33,10 @@ class SchedulerService:
         self.solver = cp_model.CpSolver()
         
         # Get ALL students - full 500
-        students = Student.query.all()
-        courses = Course.query.all()
-        timeslots = TimeSlot.query.all()
+        students = load_students()
+        courses = load_courses()
+        timeslots = load_timeslots()
+        preferences = load_preferences()
         
         logger.info(f"Optimizing for {len(students)} students, {len(courses)} courses, {len(timeslots)} timeslots")
         
@@ -39,12 +46,17 @@ class SchedulerService:
         section_capacity = {}
         section_timeslots = {}
         
+        demand_by_course = defaultdict(int)
+        for prefs in preferences.values():
+            for course_id, _ in prefs:
+                demand_by_course[course_id] += 1
+        
         section_id = 0
         for course in courses:
             course_sections[course.id] = []
             
             # Calculate number of sections based on demand
-            demand = CoursePreference.query.filter_by(course_id=course.id).count()
+            demand = demand_by_course[course.id]
             sections_needed = max(1, min(5, demand // 40))  # 40 students per section max
             
             capacity_per_section = course.capacity // sections_needed
@@ -84,15 +96,19 @@ class SchedulerService:
         
         # 2. Time conflict constraints
         logger.info("Adding time conflict constraints...")
+        # Sections whose meetings all overlap (maximal cliques)
+        minutes = lambda t: t.hour * 60 + t.minute
+        sections = list(section_timeslots)
+        start = [minutes(section_timeslots[sec].start_time) for sec in sections]
+        end = [minutes(section_timeslots[sec].end_time) for sec in sections]
+        durations = {course.id: course.duration_minutes or 0 for course in courses}
+        index = OverlapIndex([section_timeslots[sec].day for sec in sections], start,
+                             meeting_end(start, end, [durations[section_to_course[sec]] for sec in sections]))
+        time_groups = [[sections[i] for i in clique] for clique in index.cliques]
+        
         for s in students:
-            # Group sections by time
-            time_groups = defaultdict(list)
-            for sec, ts in section_timeslots.items():
-                time_key = (ts.day, ts.start_time, ts.end_time)
-                time_groups[time_key].append(sec)
-            
-            # Student can take at most one section at each time
-            for time_key, sections in time_groups.items():
+            # Student can take at most one section of each overlapping set
+            for sections in time_groups:
                 if len(sections) > 1:
                     self.model.Add(
                         sum(x.get((s.id, sec), 0) for sec in sections) <= 1
@@ -131,8 +147,8 @@ class SchedulerService:
         
         # Get all preferences
         pref_lookup = defaultdict(dict)
-        for pref in CoursePreference.query.all():
-            pref_lookup[pref.student_id][pref.course_id] = pref.priority
+        for student_id, prefs in preferences.items():
+            pref_lookup[student_id] = dict(prefs)
         
         # Build objective
         for s in students:
@@ -152,12 +168,12 @@ class SchedulerService:
         logger.info("Solving optimization problem...")
         
         # Set solver parameters for large problem
-        self.solver.parameters.max_time_in_seconds = 60.0  # Allow more time for 500 students
-        self.solver.parameters.num_search_workers = 4
-        self.solver.parameters.log_search_progress = True
+        self.solver.parameters.max_time_in_seconds = self.max_time_in_seconds
+        self.solver.parameters.num_search_workers = self.num_search_workers
+        self.solver.parameters.log_search_progress = self.log_search_progress
         
         # Add solution callback
-        solution_printer = SolutionPrinter(students, section_to_course, x, len(students))
+        solution_printer = SolutionPrinter(x, len(students))
         status = self.solver.Solve(self.model, solution_printer)
         
         solve_time = time.time() - start_time
@@ -228,8 +244,8 @@ class SchedulerService:
     
     def calculate_metrics(self, semester):
         """Comprehensive metrics for 500 students"""
-        schedules = Schedule.query.filter_by(semester=semester).all()
-        all_students = Student.query.all()
+        schedules = load_schedules(semester)
+        all_students = load_students()
         
         if not schedules:
             return {'error': 'No schedules found'}
@@ -237,11 +253,17 @@ class SchedulerService:
         # Initialize metrics
         metrics = defaultdict(lambda: defaultdict(int))
         
+        schedules_by_student = defaultdict(list)
+        for s in schedules:
+            schedules_by_student[s.student_id].append(s)
+        preferences = load_preferences()
+        timeslots = {ts.id: ts for ts in load_timeslots()}
+        
         # Process each student
         for student in all_students:
-            student_schedules = [s for s in schedules if s.student_id == student.id]
-            prefs = CoursePreference.query.filter_by(student_id=student.id).all()
-            pref_map = {p.course_id: p.priority for p in prefs}
+            student_schedules = schedules_by_student[student.id]
+            prefs = preferences[student.id]
+            pref_map = dict(prefs)
             
             # Course load
             course_count = len(student_schedules)
@@ -257,42 +279,39 @@ class SchedulerService:
             
             # Check if got first choice
             if prefs and student_schedules:
-                first_choices = [p.course_id for p in prefs if p.priority == 1]
+                first_choices = [course_id for course_id, priority in prefs if priority == 1]
                 got_first = any(s.course_id in first_choices for s in student_schedules)
                 metrics['first_choice']['got_first' if got_first else 'no_first'] += 1
             
             # Time utilization
             for sched in student_schedules:
-                ts = TimeSlot.query.get(sched.timeslot_id)
+                ts = timeslots[sched.timeslot_id]
                 day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
                 day = day_names[ts.day] if ts.day < 5 else f'Day{ts.day}'
                 time_slot = f"{day} {ts.start_time}"
                 metrics['time_distribution'][time_slot] += 1
         
         # Calculate conflict rate
-        conflicts = 0
-        for student in all_students:
-            student_times = defaultdict(list)
-            for s in [s for s in schedules if s.student_id == student.id]:
-                ts = TimeSlot.query.get(s.timeslot_id)
-                student_times[(ts.day, ts.start_time)].append(s)
-            
-            for times, scheds in student_times.items():
-                if len(scheds) > 1:
-                    conflicts += 1
-                    break
+        conflicts = len(VerificationService().conflicted_students(semester))
         
         # Course utilization
         course_stats = {}
-        for course in Course.query.all():
-            enrolled = len([s for s in schedules if s.course_id == course.id])
-            demand = CoursePreference.query.filter_by(course_id=course.id).count()
+        enrolled = defaultdict(int)
+        for s in schedules:
+            enrolled[s.course_id] += 1
+        demand = defaultdict(int)
+        total_by_priority = defaultdict(int)
+        for prefs in preferences.values():
+            for course_id, priority in prefs:
+                demand[course_id] += 1
+                total_by_priority[priority] += 1
+        for course in load_courses():
             course_stats[course.name] = {
-                'enrolled': enrolled,
+                'enrolled': enrolled[course.id],
                 'capacity': course.capacity,
-                'demand': demand,
-                'utilization': round(enrolled / course.capacity * 100, 1),
-                'demand_ratio': round(demand / course.capacity, 2)
+                'demand': demand[course.id],
+                'utilization': round(enrolled[course.id] / course.capacity * 100, 1),
+                'demand_ratio': round(demand[course.id] / course.capacity, 2)
             }
         
         # Compile final metrics
@@ -300,10 +319,6 @@ class SchedulerService:
         students_scheduled = len(set(s.student_id for s in schedules))
         
         # Satisfaction rates by priority
-        total_by_priority = defaultdict(int)
-        for pref in CoursePreference.query.all():
-            total_by_priority[pref.priority] += 1
-        
         satisfaction_rates = {}
         for priority in range(1, 6):
             satisfied = metrics['satisfaction'].get(f'priority_{priority}', 0)
@@ -343,11 +358,9 @@ class SchedulerService:
 class SolutionPrinter(cp_model.CpSolverSolutionCallback):
     """Progress callback for large optimization"""
     
-    def __init__(self, students, section_to_course, x, total_students):
+    def __init__(self, x, total_students):
         cp_model.CpSolverSolutionCallback.__init__(self)
-        self.students = students
-        self.section_to_course = section_to_course
-        self.x = x
+        self.variables = list(x.values())
         self.solution_count = 0
         self.start_time = time.time()
         self.total_students = total_students
@@ -357,6 +370,6 @@ class SolutionPrinter(cp_model.CpSolverSolutionCallback):
         current_time = time.time() - self.start_time
         
         if self.solution_count % 5 == 0:
-            assignments = sum(1 for key, var in self.x.items() if self.Value(var) == 1)
+            assignments = sum(1 for var in self.variables if self.Value(var) == 1)
             logger.info(f'Solution {self.solution_count} at {current_time:.1f}s: '
                        f'{assignments} assignments, objective: {self.ObjectiveValue()}')
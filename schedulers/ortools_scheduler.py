@@ -1,5 +1,8 @@
 from ortools.sat.python import cp_model
-from app.models.models import Student, Course, TimeSlot, CoursePreference, Schedule
+from app.models.models import Schedule
+from app.services.records import load_students, load_courses, load_timeslots, load_preferences, load_schedules
+from app.services.overlap import OverlapIndex, meeting_end
+from app.services.verification_service import VerificationService
 from app import db
 import logging
 import time
@@ -8,10 +11,13 @@ from collections import defaultdict
 logger = logging.getLogger(__name__)
 
 class SchedulerService:
-    def __init__(self):
+    def __init__(self, max_time_in_seconds=30.0, num_search_workers=4, log_search_progress=False):
         self.model = None
         self.solver = None
         self.solution_stats = {}
+        self.max_time_in_seconds = max_time_in_seconds
+        self.num_search_workers = num_search_workers
+        self.log_search_progress = log_search_progress
         
     def optimize_schedules(self, semester):
         """Real OR-Tools constraint optimization"""
@@ -27,20 +33,20 @@ class SchedulerService:
         self.solver = cp_model.CpSolver()
         
         # Get data - limit for performance
-        students = Student.query.limit(200).all()  # Start with 200 for reasonable solve time
-        courses = Course.query.all()
-        timeslots = TimeSlot.query.all()
+        students = load_students(limit=200)  # Start with 200 for reasonable solve time
+        courses = load_courses()
+        timeslots = load_timeslots()
         
         logger.info(f"Optimizing for {len(students)} students, {len(courses)} courses, {len(timeslots)} timeslots")
         
-        # Create time conflict groups (timeslots that overlap)
-        time_conflicts = self._find_time_conflicts(timeslots)
-        
         # Assign courses to specific timeslots (one timeslot per course for simplicity)
         course_timeslots = {}
         for i, course in enumerate(courses):
             course_timeslots[course.id] = timeslots[i % len(timeslots)]
         
+        # Create time conflict groups (courses whose meetings overlap)
+        time_conflicts = self._find_time_conflicts(courses, course_timeslots)
+        
         # DECISION VARIABLES
         # x[s,c] = 1 if student s is assigned to course c
         x = {}
@@ -54,16 +60,11 @@ class SchedulerService:
         # 1. Time conflict constraints - student cannot take conflicting courses
         logger.info("Adding time conflict constraints...")
         for s in students:
-            for ts_group in time_conflicts:
-                # Get courses scheduled at conflicting times
-                conflicting_courses = [c for c in courses 
-                                     if course_timeslots[c.id].id in ts_group]
-                
+            for conflicting_courses in time_conflicts:
                 # Student can take at most one course from conflicting set
-                if len(conflicting_courses) > 1:
-                    self.model.Add(
-                        sum(x[s.id, c.id] for c in conflicting_courses) <= 1
-                    )
+                self.model.Add(
+                    sum(x[s.id, c_id] for c_id in conflicting_courses) <= 1
+                )
         
         # 2. Course capacity constraints
         logger.info("Adding capacity constraints...")
@@ -87,15 +88,10 @@ class SchedulerService:
         logger.info("Setting up objective function...")
         objective_terms = []
         
-        # Get all preferences
-        all_preferences = CoursePreference.query.filter(
-            CoursePreference.student_id.in_([s.id for s in students])
-        ).all()
-        
         # Create preference lookup
         pref_lookup = defaultdict(dict)
-        for pref in all_preferences:
-            pref_lookup[pref.student_id][pref.course_id] = pref.priority
+        for student_id, prefs in load_preferences([s.id for s in students]).items():
+            pref_lookup[student_id] = dict(prefs)
         
         # Build objective: maximize sum of (weight * assignment)
         for s in students:
@@ -115,11 +111,12 @@ class SchedulerService:
         logger.info("Solving optimization problem...")
         
         # Set solver parameters
-        self.solver.parameters.max_time_in_seconds = 30.0
-        self.solver.parameters.num_search_workers = 4
+        self.solver.parameters.max_time_in_seconds = self.max_time_in_seconds
+        self.solver.parameters.num_search_workers = self.num_search_workers
+        self.solver.parameters.log_search_progress = self.log_search_progress
         
         # Add solution callback to track progress
-        solution_printer = SolutionPrinter(students, courses, x)
+        solution_printer = SolutionPrinter()
         status = self.solver.Solve(self.model, solution_printer)
         
         solve_time = time.time() - start_time
@@ -172,38 +169,20 @@ class SchedulerService:
             }
             return []
     
-    def _find_time_conflicts(self, timeslots):
-        """Find groups of timeslots that conflict (same day/time)"""
-        conflicts = []
-        processed = set()
-        
-        for i, ts1 in enumerate(timeslots):
-            if i in processed:
-                continue
-                
-            conflict_group = [ts1.id]
-            processed.add(i)
-            
-            for j, ts2 in enumerate(timeslots[i+1:], i+1):
-                if j in processed:
-                    continue
-                    
-                # Check if timeslots conflict (same day and overlapping times)
-                if ts1.day == ts2.day:
-                    # Check time overlap
-                    if not (ts1.end_time <= ts2.start_time or ts2.end_time <= ts1.start_time):
-                        conflict_group.append(ts2.id)
-                        processed.add(j)
-            
-            if len(conflict_group) > 1:
-                conflicts.append(conflict_group)
-        
-        return conflicts
+    def _find_time_conflicts(self, courses, course_timeslots):
+        """Course id groups whose meetings all overlap (maximal cliques)"""
+        minutes = lambda t: t.hour * 60 + t.minute
+        slots = [course_timeslots[c.id] for c in courses]
+        start = [minutes(ts.start_time) for ts in slots]
+        index = OverlapIndex([ts.day for ts in slots], start,
+                             meeting_end(start, [minutes(ts.end_time) for ts in slots],
+                                         [c.duration_minutes or 0 for c in courses]))
+        return [[courses[i].id for i in clique] for clique in index.cliques if len(clique) > 1]
     
     def calculate_metrics(self, semester):
         """Calculate comprehensive metrics from OR-Tools solution"""
-        schedules = Schedule.query.filter_by(semester=semester).all()
-        all_students = Student.query.limit(200).all()  # Match optimization limit
+        schedules = load_schedules(semester)
+        all_students = load_students(limit=200)  # Match optimization limit
         
         if not schedules:
             return {'error': 'No schedules found'}
@@ -216,19 +195,24 @@ class SchedulerService:
         total_by_priority = defaultdict(int)
         preference_distances = []
         
+        schedules_by_student = defaultdict(list)
+        for s in schedules:
+            schedules_by_student[s.student_id].append(s)
+        preferences = load_preferences([student.id for student in all_students])
+        
         for student in all_students:
-            student_schedules = [s for s in schedules if s.student_id == student.id]
-            prefs = CoursePreference.query.filter_by(student_id=student.id).all()
+            student_schedules = schedules_by_student[student.id]
+            prefs = preferences[student.id]
             
             # Create preference ranking
-            pref_ranking = {p.course_id: p.priority for p in prefs}
+            pref_ranking = dict(prefs)
             
-            for pref in prefs:
-                total_by_priority[pref.priority] += 1
+            for course_id, priority in prefs:
+                total_by_priority[priority] += 1
                 
                 # Check if this preference was satisfied
-                if any(s.course_id == pref.course_id for s in student_schedules):
-                    satisfaction_by_priority[pref.priority] += 1
+                if any(s.course_id == course_id for s in student_schedules):
+                    satisfaction_by_priority[priority] += 1
             
             # Calculate average preference distance for this student
             if student_schedules and prefs:
@@ -243,29 +227,18 @@ class SchedulerService:
                     preference_distances.append(sum(distances) / len(distances))
         
         # Time conflict verification
-        conflicts = 0
-        for student_id in students_scheduled:
-            student_schedules = [s for s in schedules if s.student_id == student_id]
-            
-            # Check for time conflicts
-            for i in range(len(student_schedules)):
-                for j in range(i+1, len(student_schedules)):
-                    ts1 = TimeSlot.query.get(student_schedules[i].timeslot_id)
-                    ts2 = TimeSlot.query.get(student_schedules[j].timeslot_id)
-                    
-                    if ts1.day == ts2.day:
-                        if not (ts1.end_time <= ts2.start_time or ts2.end_time <= ts1.start_time):
-                            conflicts += 1
-                            break
+        conflicts = VerificationService().summarize(semester, examples=0)['conflicting_pairs']
         
         # Course utilization
         course_util = {}
-        for course in Course.query.all():
-            enrolled = len([s for s in schedules if s.course_id == course.id])
+        enrolled = defaultdict(int)
+        for s in schedules:
+            enrolled[s.course_id] += 1
+        for course in load_courses():
             course_util[course.name] = {
-                'enrolled': enrolled,
+                'enrolled': enrolled[course.id],
                 'capacity': course.capacity,
-                'utilization': round(enrolled / course.capacity * 100, 1)
+                'utilization': round(enrolled[course.id] / course.capacity * 100, 1)
             }
         
         # Calculate metrics
@@ -310,11 +283,8 @@ class SchedulerService:
 class SolutionPrinter(cp_model.CpSolverSolutionCallback):
     """Callback to print intermediate solutions during solving"""
     
-    def __init__(self, students, courses, x):
+    def __init__(self):
         cp_model.CpSolverSolutionCallback.__init__(self)
-        self.students = students
-        self.courses = courses
-        self.x = x
         self.solution_count = 0
         self.start_time = time.time()
         
@@ -1,4 +1,8 @@
-from app.models.models import Student, Course, TimeSlot, CoursePreference, Schedule
+from app.models.models import Schedule
+from app.services.records import load_students, load_courses, load_timeslots, load_preferences, load_schedules
+from app.services.overlap import meeting_end
+from app.services.timemask import WeekGrid
+from collections import Counter
 from app import db
 import random
 import logging
@@ -18,18 +22,20 @@ class SchedulerService:
         db.session.commit()
         
         # Get data
-        students = list(Student.query.all())
-        courses = Course.query.all()
+        students = load_students()
+        courses = load_courses()
+        courses_by_id = {c.id: c for c in courses}
+        preferences = load_preferences()
         
         # Randomize student order (simulates registration priority)
         random.shuffle(students)
         
-        # Track course enrollments
-        course_enrollments = {c.id: [] for c in courses}
+        # Track section enrollments: (course id, timeslot id) -> count
+        section_enrollments = Counter()
         course_timeslots = {}
         
         # Assign courses to timeslots (more realistic - multiple sections)
-        timeslots = TimeSlot.query.all()
+        timeslots = load_timeslots()
         for i, course in enumerate(courses):
             # Popular courses get multiple sections
             if course.capacity > 200:
@@ -44,6 +50,17 @@ class SchedulerService:
                 ts_index = (i * sections + s) % len(timeslots)
                 course_timeslots[course.id].append(timeslots[ts_index])
         
+        # Week time mask of every offering (course, timeslot); a mask clash
+        # is at worst a near-miss within one 5-minute bucket
+        minutes = lambda t: t.hour * 60 + t.minute
+        offerings = [(course.id, ts) for course in courses for ts in course_timeslots[course.id]]
+        start = [minutes(ts.start_time) for _, ts in offerings]
+        day = [ts.day for _, ts in offerings]
+        end = meeting_end(start, [minutes(ts.end_time) for _, ts in offerings],
+                          [courses_by_id[course_id].duration_minutes or 0 for course_id, _ in offerings])
+        masks = WeekGrid.covering(day, start, end).masks(day, start, end)
+        offering_mask = {(course_id, ts.id): mask for (course_id, ts), mask in zip(offerings, masks)}
+        
         # Statistics tracking
         stats = {
             'first_choice_denied': 0,
@@ -56,62 +73,54 @@ class SchedulerService:
         
         for student in students:
             student_schedule = []
-            student_times = set()
+            student_times = 0  # week time mask of the schedule so far
             courses_taken = set()
             
             # Get preferences
-            prefs = CoursePreference.query.filter_by(
-                student_id=student.id
-            ).order_by(CoursePreference.priority).all()
-            
             # Try to schedule each preference
-            for pref in prefs:
+            for course_id, priority in preferences[student.id]:
                 if len(student_schedule) >= 5:  # Max 5 courses
                     break
                     
-                course = Course.query.get(pref.course_id)
+                course = courses_by_id.get(course_id)
                 scheduled = False
                 
                 # Try each section of the course
-                for timeslot in course_timeslots.get(pref.course_id, []):
-                    time_key = (timeslot.day, timeslot.start_time)
+                for timeslot in course_timeslots.get(course_id, []):
+                    mask = offering_mask[course_id, timeslot.id]
                     
                     # Check time conflict
-                    if time_key in student_times:
+                    if student_times & mask:
                         stats['total_conflicts_avoided'] += 1
                         continue
                     
                     # Check capacity (with realistic limits)
-                    section_capacity = course.capacity // len(course_timeslots[pref.course_id])
-                    current_enrollment = len([e for e in course_enrollments[pref.course_id] 
-                                            if e['timeslot_id'] == timeslot.id])
+                    section_capacity = course.capacity // len(course_timeslots[course_id])
+                    current_enrollment = section_enrollments[course_id, timeslot.id]
                     
                     if current_enrollment >= section_capacity:
                         stats['capacity_conflicts'] += 1
-                        if pref.priority == 1:
+                        if priority == 1:
                             stats['first_choice_denied'] += 1
                         continue
                     
                     # Success! Schedule the course
                     schedule = Schedule(
                         student_id=student.id,
-                        course_id=pref.course_id,
+                        course_id=course_id,
                         timeslot_id=timeslot.id,
                         semester=semester
                     )
                     schedules.append(schedule)
                     student_schedule.append(schedule)
-                    student_times.add(time_key)
-                    courses_taken.add(pref.course_id)
-                    course_enrollments[pref.course_id].append({
-                        'student_id': student.id,
-                        'timeslot_id': timeslot.id
-                    })
+                    student_times |= mask
+                    courses_taken.add(course_id)
+                    section_enrollments[course_id, timeslot.id] += 1
                     scheduled = True
                     break
                 
                 # Realistic touch: Sometimes skip high priority for available lower priority
-                if not scheduled and pref.priority <= 2 and random.random() < 0.2:
+                if not scheduled and priority <= 2 and random.random() < 0.2:
                     # 20% chance to try lower priorities if high priority is full
                     stats['successful_trades'] += 1
         
@@ -127,8 +136,12 @@ class SchedulerService:
     
     def calculate_metrics(self, semester):
         """Calculate realistic metrics"""
-        schedules = Schedule.query.filter_by(semester=semester).all()
-        all_students = Student.query.all()
+        schedules = load_schedules(semester)
+        all_students = load_students()
+        preferences = load_preferences()
+        schedules_by_student = {}
+        for s in schedules:
+            schedules_by_student.setdefault(s.student_id, {})[s.course_id] = s
         
         # Real satisfaction calculation
         satisfaction_by_priority = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
@@ -138,16 +151,15 @@ class SchedulerService:
         total_conflicts = 0
         
         for student in all_students:
-            scheduled_courses = {s.course_id: s for s in schedules if s.student_id == student.id}
+            scheduled_courses = schedules_by_student.get(student.id, {})
             if scheduled_courses:
                 students_scheduled.add(student.id)
             
-            prefs = CoursePreference.query.filter_by(student_id=student.id).all()
-            for pref in prefs:
-                if pref.priority <= 5:
-                    total_by_priority[pref.priority] += 1
-                    if pref.course_id in scheduled_courses:
-                        satisfaction_by_priority[pref.priority] += 1
+            for course_id, priority in preferences[student.id]:
+                if priority <= 5:
+                    total_by_priority[priority] += 1
+                    if course_id in scheduled_courses:
+                        satisfaction_by_priority[priority] += 1
         
         # Calculate realistic satisfaction rates
         satisfaction_rates = {}
@@ -1,6 +1,7 @@
 from app import create_app, db
-from app.models.models import Student, Course, TimeSlot, CoursePreference
+from app.models.models import Student, Course, TimeSlot, Room, Instructor, CoursePreference, CoursePrerequisite
 from datetime import time
+import argparse
 import random
 
 def seed_database():
@@ -38,11 +39,15 @@ def seed_database():
         ]
         
         for code, name in course_data:
+            instructor = Instructor(name=f'Dr. {code}')
+            db.session.add(instructor)
+            db.session.flush()
             course = Course(
                 course_code=code,
                 name=name,
                 capacity=random.randint(30, 60),
-                instructor=f'Dr. {code}'
+                instructor=instructor.name,
+                instructor_id=instructor.id
             )
             courses.append(course)
             db.session.add(course)
@@ -58,17 +63,23 @@ def seed_database():
         
         for day_idx, day in enumerate(days):
             for start, end in time_ranges:
-                for room in ['Room 101', 'Room 102', 'Room 201', 'Room 202']:
-                    timeslot = TimeSlot(
-                        day=day_idx,
-                        start_time=start,
-                        end_time=end,
-                        room=room
-                    )
-                    db.session.add(timeslot)
+                timeslot = TimeSlot(
+                    day=day_idx,
+                    start_time=start,
+                    end_time=end
+                )
+                db.session.add(timeslot)
+        
+        # Rooms; sections are placed into them when the schedule is optimized
+        for name, capacity in [('Room 101', 60), ('Room 102', 60), ('Room 201', 40), ('Room 202', 40)]:
+            db.session.add(Room(name=name, capacity=capacity))
         
         db.session.commit()
         
+        # Prerequisites: CS201 requires CS101
+        by_code = {course.course_code: course for course in courses}
+        db.session.add(CoursePrerequisite(course_id=by_code['CS201'].id, prerequisite_id=by_code['CS101'].id))
+        
         # Create course preferences
         for student in students:
             # Each student selects 3-5 courses
@@ -86,5 +97,28 @@ def seed_database():
         db.session.commit()
         print("Database seeded successfully!")
 
+def seed_realistic(num_students, num_majors, prereq_depth, seed):
+    """Seed a production-like cohort (skewed, major-clustered demand)"""
+    from benchmarks.generator import WorkloadGenerator
+    
+    app = create_app()
+    
+    with app.app_context():
+        WorkloadGenerator(num_students, num_majors=num_majors,
+                          prereq_depth=prereq_depth, seed=seed).write()
+        print(f"Database seeded with {num_students} synthetic students!")
+
 if __name__ == '__main__':
-    seed_database()
+    parser = argparse.ArgumentParser(description='Seed the scheduler database')
+    parser.add_argument('--realistic', action='store_true',
+                        help='Generate Zipf-skewed, major-clustered demand instead of the uniform demo data')
+    parser.add_argument('--students', type=int, default=500)
+    parser.add_argument('--majors', type=int, default=5)
+    parser.add_argument('--prereq-depth', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    
+    if args.realistic:
+        seed_realistic(args.students, args.majors, args.prereq_depth, args.seed)
+    else:
+        seed_database()
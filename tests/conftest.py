@@ -0,0 +1,23 @@
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Every app built during the tests gets its own in-memory database
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+@pytest.fixture
+def app():
+    from app import create_app, db
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
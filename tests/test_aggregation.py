@@ -0,0 +1,117 @@
+from collections import Counter
+
+import numpy as np
+
+def bundled_problem(bundles, copies):
+    """Problem where every list of course indexes in ``bundles`` is shared by ``copies`` students"""
+    from app.services.problem import Problem
+
+    codes = ['CS101', 'CS201', 'MATH101', 'MATH201', 'PHYS101', 'ENG101']
+    prefs = [bundle for bundle in bundles for _ in range(copies)]
+    counts = [len(p) for p in prefs]
+    return Problem({
+        'student_id': range(1, len(prefs) + 1),
+        'course_id': range(1, len(codes) + 1),
+        'course_capacity': [len(prefs)] * len(codes),
+        'course_codes': np.frombuffer('\n'.join(codes).encode(), dtype=np.uint8),
+        'timeslot_id': range(1, 5),
+        'timeslot_day': [0, 0, 1, 1],
+        'timeslot_start': [480, 600, 480, 600],
+        'timeslot_end': [570, 690, 570, 690],
+        'pref_ptr': np.concatenate(([0], np.cumsum(counts))),
+        'pref_course': [c for p in prefs for c in p],
+        'pref_priority': [i for p in prefs for i in range(1, len(p) + 1)],
+        # Two sections for the CS and MATH courses, sharing timeslots
+        'section_course': [0, 0, 1, 1, 2, 2, 3, 4, 5],
+        'section_timeslot': [0, 1, 2, 3, 1, 0, 2, 3, 0],
+        'section_capacity': [copies * 2] * 9,
+        # CS201 requires CS101
+        'prereq_course': [1],
+        'prereq_required': [0],
+        'meta': np.frombuffer(b'{}', dtype=np.uint8)
+    })
+
+def check_schedules(problem, assignments):
+    by_student = {}
+    for student_id, course_id, timeslot_id in assignments:
+        by_student.setdefault(student_id, []).append((course_id, timeslot_id))
+    assert set(by_student) == set(problem.student_id.tolist())
+    for entries in by_student.values():
+        courses = [c for c, _ in entries]
+        assert 3 <= len(entries) <= 5
+        assert len(set(courses)) == len(courses)
+        assert len({t for _, t in entries}) == len(entries)
+        assert 2 not in courses or 1 in courses
+
+def test_aggregated_model_matches_per_student_model():
+    from app.services.scheduler_service import SchedulerService
+
+    problem = bundled_problem([[0, 1, 2], [1, 3, 4], [5, 2]], copies=4)
+    results = {}
+    for aggregate in (False, True):
+        service = SchedulerService(max_time_in_seconds=30, num_search_workers=1,
+                                   log_search_progress=False, aggregate=aggregate)
+        results[aggregate] = service.solve_problem(problem)
+        assert results[aggregate]['status'] == 'OPTIMAL'
+        check_schedules(problem, results[aggregate]['assignments'])
+
+    assert results[True]['objective_value'] == results[False]['objective_value']
+    assert service.model.Proto().variables[0].name.startswith('y[')
+    # One row per bundle; the last bundle is not eligible for CS201's two sections
+    assert len(service.model.Proto().variables) == 3 * 9 - 2
+
+def test_split_group_respects_prerequisites():
+    from app.services.aggregation import split_group
+
+    # Course 0 requires course 1; four members, sections 0-5 meet at times 0-2
+    section_course = [0, 1, 1, 2, 3, 3]
+    section_time = [0, 1, 2, 0, 1, 2]
+    counts = {0: 2, 1: 2, 2: 2, 3: 2, 4: 2, 5: 2}
+    members = split_group(counts, 4, section_course, section_time, requires=[(0, 1)])
+
+    assert Counter(sec for secs in members for sec in secs) == counts
+    for secs in members:
+        courses = [section_course[sec] for sec in secs]
+        assert len(secs) == 3
+        assert len(set(courses)) == len(courses)
+        assert len({section_time[sec] for sec in secs}) == len(secs)
+        assert 0 not in courses or 1 in courses
+
+def test_unsplittable_group_is_solved_per_student():
+    from app.services.scheduler_service import SchedulerService
+    from app.utils.instrumentation import RunInstrumentation
+
+    problem = bundled_problem([[1, 0, 2, 5]], copies=2)
+    # CS101 and CS201 only meet at the same time, so nobody can take CS201,
+    # but the group counts alone would allow one member each
+    problem.section_course = np.array([0, 1, 2, 3, 4, 5], dtype='<i4')
+    problem.section_timeslot = np.array([0, 0, 1, 2, 3, 1], dtype='<i4')
+    problem.section_capacity = np.array([4] * 6, dtype='<i4')
+
+    run = RunInstrumentation()
+    result = SchedulerService(max_time_in_seconds=10, num_search_workers=1,
+                              log_search_progress=False).solve_problem(problem, run)
+
+    assert result['status'] == 'OPTIMAL'
+    assert run.counters['student_groups'] == 2
+    assert run.counters['retries'] == 1
+    check_schedules(problem, result['assignments'])
+
+def test_prerequisite_group_is_split_without_retry():
+    from app.services.scheduler_service import SchedulerService
+    from app.utils.instrumentation import RunInstrumentation
+
+    problem = bundled_problem([[1, 0, 2, 3, 4, 5]], copies=4)
+    # Only two seats in CS101, so at most two members may take CS201 even
+    # though each of its sections could seat two members on its own
+    problem.section_capacity = np.array([1, 1] + [8] * 7, dtype='<i4')
+
+    run = RunInstrumentation()
+    result = SchedulerService(max_time_in_seconds=10, num_search_workers=1,
+                              log_search_progress=False).solve_problem(problem, run)
+
+    assert result['status'] == 'OPTIMAL'
+    assert run.counters['student_groups'] == 1
+    assert 'retries' not in run.counters
+    check_schedules(problem, result['assignments'])
+    assert sum(course_id == 2 for _, course_id, _ in result['assignments']) == 2
@@ -0,0 +1,83 @@
+import csv
+import io
+import json
+
+import pytest
+
+@pytest.fixture
+def scheduled(app):
+    from benchmarks.generator import WorkloadGenerator
+    from app.services.scheduler_service import SchedulerService
+    WorkloadGenerator(30, num_courses=8, seed=7).write()
+    SchedulerService(max_time_in_seconds=10, log_search_progress=False).optimize_schedules('Spring2024')
+    return app
+
+def test_reports_share_one_snapshot(scheduled):
+    from app.services.snapshot import ScheduleSnapshot
+    from app.services.verification_service import VerificationService
+    from analysis.__main__ import REPORT_NAMES
+    from analysis.reports import run_reports
+
+    results = run_reports(ScheduleSnapshot.load('Spring2024'), REPORT_NAMES)
+
+    assert list(results) == REPORT_NAMES
+    assert results['summary']['total_students'] == 30
+    assert sum(results['summary']['course_load_distribution'].values()) == 30
+    assert results['conflicts']['conflicting_pairs'] == \
+        VerificationService().summarize('Spring2024')['conflicting_pairs']
+    assert results['conflicts']['load_violations'] == 0
+    assert results['optimality']['solver']['engine'] == 'cp_sat'
+
+def test_preference_rows_share_one_order(scheduled):
+    from app.services.problem import Problem
+    from app.services.records import load_preferences
+    from app.services.snapshot import ScheduleSnapshot
+
+    snapshot = ScheduleSnapshot.load('Spring2024')
+    assert snapshot.preferences == dict(load_preferences())
+    problem = Problem.from_database('Spring2024', plan=False)
+    course_ids = problem.course_id.tolist()
+    for i, student_id in enumerate(problem.student_id.tolist()):
+        assert [(course_ids[c], p) for c, p in problem.preferences(i)] == snapshot.preferences.get(student_id, [])
+
+def test_renderers(scheduled):
+    from app.services.snapshot import ScheduleSnapshot
+    from analysis.__main__ import RENDERERS
+    from analysis.reports import run_reports
+
+    results = run_reports(ScheduleSnapshot.load('Spring2024'), ['summary', 'satisfaction'])
+
+    assert json.loads(RENDERERS['json'](results))['summary']['total_students'] == 30
+    rows = list(csv.DictReader(io.StringIO(RENDERERS['csv'](results))))
+    assert {'report': 'summary', 'metric': 'total_students', 'value': '30'} in rows
+    assert 'SATISFACTION' in RENDERERS['text'](results)
+
+def test_sharded_reports_match_single_pass(scheduled):
+    from app.services.snapshot import ScheduleSnapshot
+    from analysis.__main__ import REPORT_NAMES
+    from analysis.reports import run_reports
+
+    snapshot = ScheduleSnapshot.load('Spring2024')
+
+    assert run_reports(snapshot, REPORT_NAMES, workers=2) == run_reports(snapshot, REPORT_NAMES)
+
+@pytest.mark.parametrize('script', ['verify_results.py', 'final_verification.py', 'comprehensive_analysis.py'])
+def test_compatibility_scripts_run(script, tmp_path, monkeypatch, capsys):
+    import os
+    import runpy
+    from app import create_app, db
+    from benchmarks.generator import WorkloadGenerator
+
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{tmp_path / "audit.db"}')
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        WorkloadGenerator(20, num_courses=6, seed=3).write()
+        db.session.remove()
+
+    path = os.path.join(os.path.dirname(__file__), '..', 'analysis', script)
+    monkeypatch.setattr('sys.argv', [path, '--format', 'json'])
+    with pytest.raises(SystemExit) as exit:
+        runpy.run_path(path, run_name='__main__')
+    assert exit.value.code == 0
+    assert 'conflicts' in json.loads(capsys.readouterr().out)
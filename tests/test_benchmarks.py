@@ -0,0 +1,32 @@
+import json
+import queue
+
+def test_benchmark_suite_runs_a_tiny_case(tmp_path, monkeypatch):
+    from benchmarks import run_benchmarks
+
+    monkeypatch.setattr(run_benchmarks, 'CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setenv('DATABASE_URL', 'sqlite://')  # restored after the suite points it at the cohort
+
+    def in_process(db_path, engine_name, budget, timeout):
+        results = queue.Queue()
+        run_benchmarks._run_case(db_path, engine_name, budget, results)
+        return results.get_nowait()
+    monkeypatch.setattr(run_benchmarks, 'run_case', in_process)
+
+    output = tmp_path / 'results.json'
+    assert run_benchmarks.main(['--scales', '40', '--engines', 'service', '--time-limit', '5',
+                                '--workers', '1', '--output', str(output)]) == 0
+
+    report = json.loads(output.read_text())
+    assert report['budget'] == {'max_time_in_seconds': 5.0, 'num_search_workers': 1, 'log_search_progress': False}
+    [result] = report['results']
+    assert (result['engine'], result['num_students'], result['seed']) == ('service', 40, 42)
+    assert result['status'] in ('OPTIMAL', 'FEASIBLE') and result['assignments'] > 0
+    assert result['score'] > 0 and result['total_time'] > 0 and result['stages']['solve'] >= 0
+
+    # The engine ran with the suite's budget
+    from app import create_app
+    from app.models.models import OptimizationRun
+    with create_app('testing').app_context():
+        run = OptimizationRun.query.filter_by(semester=run_benchmarks.SEMESTER).one()
+        assert run.parameters['max_time_in_seconds'] == 5.0 and run.parameters['num_search_workers'] == 1
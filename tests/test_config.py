@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pytest
+
+def test_settings_and_engine_options_from_environment():
+    import config
+
+    settings = config.load('production', {'DATABASE_URL': 'postgresql://u@db/s', 'DB_POOL_SIZE': '3',
+                                          'DB_STREAM_RESULTS': 'false', 'WHATIF_MAX_SECONDS': '12.5'})
+    assert settings['SQLALCHEMY_DATABASE_URI'] == 'postgresql://u@db/s'
+    assert (settings['DB_POOL_SIZE'], settings['DB_STREAM_RESULTS'], settings['WHATIF_MAX_SECONDS']) == (3, False, 12.5)
+    assert settings['DEBUG'] is False and config.load('development', {})['DEBUG'] is True
+
+    options = config.engine_options(settings)
+    assert (options['pool_size'], options['max_overflow'], options['pool_recycle']) == (3, 20, 300)
+    assert options['connect_args'] == {'options': '-c statement_timeout=60000'}
+    # An in-memory SQLite database has no pool to size and no statement timeout
+    assert config.engine_options(config.load('testing', {})) == {'pool_pre_ping': True}
+
+    with pytest.raises(ValueError):
+        config.load('production', {'DB_POOL_SIZE': 'many'})
+    with pytest.raises(ValueError):
+        config.load('staging', {})
+
+def test_pool_stats_count_waits_and_timeouts(tmp_path, monkeypatch):
+    from app import create_app, db
+
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{tmp_path / "pool.db"}')
+    monkeypatch.setenv('DB_POOL_SIZE', '1')
+    monkeypatch.setenv('DB_MAX_OVERFLOW', '1')
+    monkeypatch.setenv('DB_POOL_TIMEOUT', '1')
+    app = create_app('production')
+    client = app.test_client()
+
+    with app.app_context():
+        held = [db.engine.connect(), db.engine.connect()]  # pooled and overflow connection
+        assert client.get('/pool').get_json()['overflow'] == 1
+        with pytest.raises(Exception):
+            db.engine.connect()
+
+        # A checkout that waits for a checkin instead of timing out
+        threading.Timer(0.05, held.pop().close).start()
+        started = time.perf_counter()
+        db.engine.connect().close()
+        assert time.perf_counter() - started >= 0.04
+        held.pop().close()
+
+        stats = client.get('/pool').get_json()
+    assert stats['instrumented'] and stats['size'] == 1 and stats['max_overflow'] == 1
+    assert stats['timeouts'] == 1 and stats['waits'] >= 2 and stats['peak_overflow'] == 1
+    assert stats['checked_out'] == 0
+    assert 'db_pool{stat="waits"}' in client.get('/metrics').get_data(as_text=True)
@@ -0,0 +1,107 @@
+import json
+import os
+import uuid
+
+import numpy as np
+import pytest
+
+@pytest.fixture
+def cohort(app):
+    from benchmarks.generator import WorkloadGenerator
+    WorkloadGenerator(60, num_courses=10, num_majors=2, seed=11).write()
+    return app
+
+@pytest.mark.parametrize('strategy', ['students', 'communities'])
+def test_shards_partition_students_and_seats(cohort, strategy):
+    from app.services.problem import Problem
+    from app.services.distributed import decompose, allot_capacity, shard_problem
+
+    problem = Problem.from_database('Spring2024')
+    blocks = decompose(problem, 3, strategy)
+    capacity = allot_capacity(problem, blocks)
+
+    assert sorted(np.concatenate(blocks).tolist()) == list(range(problem.num_students))
+    assert np.array_equal(capacity.sum(axis=0), problem.section_capacity)
+
+    shard = shard_problem(problem, blocks[0], capacity[0])
+    assert shard.num_students == len(blocks[0])
+    assert len(shard.pref_course) == shard.pref_ptr[-1]
+    first = blocks[0][0]
+    assert list(shard.preferences(0)) == list(problem.preferences(first))
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def queue(request, tmp_path):
+    from app.services.distributed import ShardQueue, RedisShardQueue
+
+    if request.param == 'sqlite':
+        yield ShardQueue(str(tmp_path))
+        return
+    broker = os.environ.get('TEST_REDIS_URL')
+    if not broker:
+        pytest.skip('set TEST_REDIS_URL to test the Redis queue')
+    queue = RedisShardQueue(broker, str(tmp_path), prefix=f'test_{uuid.uuid4().hex}')
+    yield queue
+    for key in queue.redis.scan_iter(f'{queue.prefix}:*'):
+        queue.redis.delete(key)
+
+def test_queue_hands_each_job_to_one_worker(queue):
+    queue.submit('run', 0, 'a.prb')
+    queue.submit('run', 1, 'b.prb', {'max_time_in_seconds': 5})
+
+    first, second = queue.claim('w1'), queue.claim('w2')
+    assert {first['shard'], second['shard']} == {0, 1}
+    assert queue.claim('w3') is None
+
+    queue.fail(first['id'], 'boom')
+    assert queue.requeue_stale(timeout=-1) == 1
+    retry = queue.claim('w3')
+    assert retry['shard'] == second['shard'] and retry['attempts'] == 2
+
+    queue.complete(retry['id'], 'b.npy', {'feasible': True})
+    jobs = queue.jobs('run')
+    assert [job['shard'] for job in jobs] == [0, 1]
+    assert json.loads(jobs[1]['params']) == {'max_time_in_seconds': 5}
+    assert {job['status'] for job in jobs} == {'failed', 'done'}
+    assert json.loads(next(job['result'] for job in jobs if job['status'] == 'done')) == {'feasible': True}
+
+def test_distributed_run_with_local_worker(cohort, tmp_path):
+    from app.models.models import Schedule
+    from app.services.distributed import DistributedScheduler
+    from app.services.verification_service import VerificationService
+
+    scheduler = DistributedScheduler(str(tmp_path), shards=2, local_workers=1, max_time_in_seconds=5)
+    schedules = scheduler.optimize_schedules('Spring2024')
+
+    assert scheduler.solution_stats['status'] == 'FEASIBLE'
+    assert Schedule.query.filter_by(semester='Spring2024').count() == len(schedules) > 0
+    assert VerificationService().summarize('Spring2024')['conflicting_pairs'] == 0
+    assert scheduler.last_run.engine == 'cp_sat_distributed'
+
+def test_failed_shard_keeps_the_published_schedule(cohort, tmp_path, monkeypatch):
+    from app.models.models import Schedule
+    from app.services import distributed
+    from app.services.distributed import DistributedScheduler
+
+    published = DistributedScheduler(str(tmp_path / 'first'), shards=2, local_workers=1, max_time_in_seconds=5)
+    published.optimize_schedules('Spring2024')
+    before = sorted((s.student_id, s.course_id, s.section_id)
+                    for s in Schedule.query.filter_by(semester='Spring2024'))
+    assert before
+
+    solve_job = distributed.solve_job
+    def flaky(job, queue_directory):
+        if job['shard'] == 1:
+            raise RuntimeError('worker crashed')
+        return solve_job(job, queue_directory)
+    monkeypatch.setattr(distributed, 'solve_job', flaky)
+
+    scheduler = DistributedScheduler(str(tmp_path / 'second'), shards=2, max_time_in_seconds=5)
+    # Solve in this process so the patched solve_job runs
+    monkeypatch.setattr(scheduler, 'wait', lambda run_id: (distributed.run_worker(
+        scheduler.queue.directory, 'inline', idle_timeout=0), scheduler.queue.jobs(run_id))[1])
+
+    assert scheduler.optimize_schedules('Spring2024') == []
+    assert scheduler.solution_stats['status'] == 'FAILED' and scheduler.solution_stats['failed_shards'] == [1]
+    assert scheduler.last_run.status == 'FAILED'
+    assert sorted((s.student_id, s.course_id, s.section_id)
+                  for s in Schedule.query.filter_by(semester='Spring2024')) == before
@@ -0,0 +1,114 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import time
+
+import pytest
+
+def _catalog(db, students=4, hot_capacity=2):
+    """Section 1 (Mon 8:00, course 1) is the hot one; section 2 (Mon 9:00,
+    course 2) clashes with it and section 3 (Tue, course 3) does not"""
+    from app.models.models import Student, Course, TimeSlot, Section
+    db.session.add_all([Student(id=i, student_id=f'S{i}', name=f'S{i}', email=f's{i}@u.edu')
+                        for i in range(1, students + 1)])
+    db.session.add_all([Course(id=c, course_code=f'C{c}', name=f'Course {c}', capacity=100) for c in (1, 2, 3)])
+    db.session.add_all([TimeSlot(id=1, day=0, start_time=time(8, 0), end_time=time(9, 30)),
+                        TimeSlot(id=2, day=0, start_time=time(9, 0), end_time=time(10, 30)),
+                        TimeSlot(id=3, day=1, start_time=time(8, 0), end_time=time(9, 30))])
+    db.session.add_all([Section(id=k, semester='Spring2024', course_id=k, number=1, timeslot_id=k, capacity=c)
+                        for k, c in ((1, hot_capacity), (2, 50), (3, 50))])
+    db.session.commit()
+
+def test_enrollment_outcomes_and_idempotency(app):
+    from app import db
+    from app.models.models import Section, Schedule
+    from app.services.enrollment import EnrollmentService, IdempotencyKeyReused
+    _catalog(db)
+    service = EnrollmentService(max_load=2)
+
+    first = service.enroll('Spring2024', 1, 1, key='k1')
+    assert (first.status, first.replayed) == ('enrolled', False)
+    # A retry replays the stored answer without a second seat
+    assert service.enroll('Spring2024', 1, 1, key='k1') == first._replace(replayed=True)
+    with pytest.raises(IdempotencyKeyReused):
+        service.enroll('Spring2024', 2, 1, key='k1')
+
+    assert service.enroll('Spring2024', 1, 1).status == 'already_enrolled'
+    assert service.enroll('Spring2024', 1, 2).status == 'time_conflict'
+    assert service.enroll('Spring2024', 1, 3).status == 'enrolled'
+    assert service.enroll('Spring2024', 2, 3).status == 'enrolled'
+    assert service.enroll('Spring2024', 2, 1).status == 'enrolled'
+    assert service.enroll('Spring2024', 3, 1).status == 'full'
+    assert service.enroll('Spring2024', 1, 2).status == 'load_limit'
+
+    # Failed checks hand their seat back
+    counts = dict(db.session.execute(db.select(Section.id, Section.enrolled)).all())
+    assert counts == {1: 2, 2: 0, 3: 2}
+    assert db.session.query(Schedule).count() == 4
+
+def test_enrollment_checks_completions_and_prerequisites(app, client):
+    from app import db
+    from app.models.models import Section, CourseCompletion, CoursePrerequisite
+    from app.services.enrollment import EnrollmentService
+    _catalog(db)
+    # Course 3 requires course 1; student 1 has passed course 3, student 2 course 1
+    db.session.add(CoursePrerequisite(course_id=3, prerequisite_id=1))
+    db.session.add_all([CourseCompletion(student_id=1, course_id=3), CourseCompletion(student_id=2, course_id=1)])
+    db.session.commit()
+    service = EnrollmentService()
+
+    assert service.enroll('Spring2024', 1, 3).status == 'already_completed'
+    assert service.enroll('Spring2024', 3, 3).status == 'missing_prerequisite'
+    assert service.enroll('Spring2024', 2, 3).status == 'enrolled'
+    # A prerequisite in the current schedule counts too
+    assert service.enroll('Spring2024', 3, 1).status == 'enrolled'
+    assert service.enroll('Spring2024', 3, 3).status == 'enrolled'
+    assert db.session.get(Section, 3).enrolled == 2
+
+    response = client.post('/api/v1/enrollments', json={'student_id': 4, 'section_id': 3})
+    assert response.status_code == 409 and response.get_json()['status'] == 'missing_prerequisite'
+    response = client.post('/api/v1/enrollments', json={'student_id': 1, 'section_id': 3})
+    assert response.status_code == 409 and response.get_json()['status'] == 'already_completed'
+
+def test_enrollment_endpoint(app, client):
+    from app import db
+    _catalog(db)
+
+    response = client.post('/api/v1/enrollments', json={'student_id': 1, 'section_id': 1},
+                           headers={'Idempotency-Key': 'abc'})
+    assert response.status_code == 201 and response.get_json()['status'] == 'enrolled'
+    retry = client.post('/api/v1/enrollments', json={'student_id': 1, 'section_id': 1},
+                        headers={'Idempotency-Key': 'abc'})
+    assert retry.status_code == 201 and retry.headers['Idempotent-Replayed'] == 'true'
+    assert client.post('/api/v1/enrollments', json={'student_id': 1, 'section_id': 2}).status_code == 409
+    assert client.post('/api/v1/enrollments', json={'student_id': 1, 'section_id': 99}).status_code == 404
+    assert client.post('/api/v1/enrollments', json={'student_id': 2, 'section_id': 1},
+                       headers={'Idempotency-Key': 'abc'}).status_code == 422
+
+def test_hot_section_is_never_oversold(tmp_path, monkeypatch):
+    from app import create_app, db
+    from app.models.models import Section, Schedule
+    from app.services.enrollment import EnrollmentService
+
+    # Threads need their own connections, so use a file database
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{tmp_path / "enroll.db"}')
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        _catalog(db, students=40, hot_capacity=10)
+
+    def attempt(student_id):
+        with app.app_context():
+            # Every request is sent twice with its key, as a retrying client would
+            statuses = [EnrollmentService().enroll('Spring2024', student_id, 1, key=f'hot-{student_id}').status
+                        for _ in range(2)]
+            db.session.remove()
+            return statuses
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        outcomes = list(pool.map(attempt, range(1, 41)))
+
+    assert all(first == second for first, second in outcomes)
+    assert sum(first == 'enrolled' for first, _ in outcomes) == 10
+    with app.app_context():
+        assert db.session.get(Section, 1).enrolled == 10
+        assert db.session.query(Schedule).filter_by(section_id=1).count() == 10
+        db.drop_all()
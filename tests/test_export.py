@@ -0,0 +1,57 @@
+import csv
+import io
+
+import pytest
+
+@pytest.fixture
+def cohort(app):
+    from benchmarks.generator import WorkloadGenerator
+    from app.services.scheduler_service import SchedulerService
+    WorkloadGenerator(30, num_courses=8, seed=7).write()
+    SchedulerService(max_time_in_seconds=10, log_search_progress=False).optimize_schedules('Spring2024')
+    return app
+
+def test_csv_export_streams_every_row(cohort, tmp_path):
+    from app.models.models import Schedule, CoursePreference
+    from app.services.export_service import ExportService
+
+    written = ExportService(batch_size=7).export('Spring2024', str(tmp_path), fmt='csv')
+
+    assert written['schedules']['rows'] == Schedule.query.filter_by(semester='Spring2024').count()
+    with open(written['preferences']['path']) as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == CoursePreference.query.count()
+    assert set(rows[0]) == {'id', 'student_id', 'course_id', 'priority'}
+
+def test_export_endpoint(cohort, client, monkeypatch):
+    from app.services.export_service import ExportService, MAX_BATCH_SIZE
+    batch_sizes = []
+    init = ExportService.__init__
+    def record(self, batch_size=None, **kwargs):
+        batch_sizes.append(batch_size)
+        init(self, batch_size, **kwargs)
+    monkeypatch.setattr(ExportService, '__init__', record)
+
+    response = client.get('/api/v1/exports/Spring2024/timeslots?format=csv&batch_size=3')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0] == ['id', 'day', 'start_time', 'end_time', 'room']
+    assert len(rows) > 1
+
+    for batch_size in ('0', '-5', 'many'):
+        response = client.get(f'/api/v1/exports/Spring2024/timeslots?format=csv&batch_size={batch_size}')
+        assert response.status_code == 400
+    assert client.get('/api/v1/exports/Spring2024/timeslots?format=csv&batch_size=10000000').status_code == 200
+    assert batch_sizes == [3, MAX_BATCH_SIZE]
+    assert client.get('/api/v1/exports/Spring2024/students').status_code == 404
+    assert client.get('/api/v1/exports/Spring2024/courses?format=xlsx').status_code == 400
+
+def test_parquet_export_round_trips(cohort, tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    from app.services.export_service import ExportService
+
+    written = ExportService(batch_size=5).export('Spring2024', str(tmp_path), fmt='parquet')
+
+    table = pq.read_table(written['schedules']['path'])
+    assert table.num_rows == written['schedules']['rows']
@@ -0,0 +1,47 @@
+import math
+
+def _demand(data, num_courses):
+    demand = [0] * num_courses
+    for pref in data['preferences']:
+        demand[pref['course_id'] - 1] += 1
+    return demand
+
+def test_same_seed_same_workload():
+    from benchmarks.generator import WorkloadGenerator
+
+    options = dict(num_courses=12, num_majors=3, prereq_depth=2, seed=5)
+    first = WorkloadGenerator(300, **options).generate()
+    assert WorkloadGenerator(300, **options).generate() == first
+    assert WorkloadGenerator(300, **{**options, 'seed': 6}).generate()['preferences'] != first['preferences']
+
+def test_popularity_is_skewed():
+    from benchmarks.generator import WorkloadGenerator
+
+    def top_share(popularity):
+        demand = _demand(WorkloadGenerator(2000, num_courses=20, popularity=popularity, seed=1).generate(), 20)
+        return sum(sorted(demand)[-4:]) / sum(demand)
+
+    # The four most requested of 20 courses: a fifth of requests when uniform
+    assert abs(top_share('uniform') - 0.2) < 0.05
+    assert top_share('zipf') > 0.4 and top_share('lognormal') > 0.4
+
+def test_tightness_sets_demand_per_seat():
+    from benchmarks.generator import WorkloadGenerator
+
+    for tightness in (0.7, 1.0, 1.3):
+        data = WorkloadGenerator(2000, num_courses=20, tightness=tightness, seed=2).generate()
+        demand = _demand(data, 20)
+        # Courses above the minimum-load floor get demand / tightness seats, +-10% jitter
+        floor = max(30, math.ceil(3 * 2000 / 20))
+        ratios = [demand[c['id'] - 1] / c['capacity'] for c in data['courses'] if c['capacity'] > floor]
+        assert ratios
+        assert all(tightness / 1.1 - 0.02 <= r <= tightness / 0.9 for r in ratios)
+
+def test_copy_rows_fill_client_side_defaults():
+    from app.models.models import Student
+    from benchmarks.generator import WorkloadGenerator, _copy_rows
+
+    chunk = list(WorkloadGenerator(3, seed=1).students())
+    columns, rows = _copy_rows(Student.__table__, chunk)
+    assert columns == ['id', 'student_id', 'name', 'email', 'created_at']
+    assert all(len(row) == 5 and row[-1] is not None for row in rows)
@@ -0,0 +1,17 @@
+from benchmarks.load_test import percentile, summarize, check_regressions
+
+def test_percentiles_use_nearest_rank():
+    values = [i / 1000 for i in range(1, 101)]
+    summary = summarize(values, errors=0, elapsed=2.0)
+    assert percentile(values, 50) == 0.05
+    assert summary['p95_ms'] == 95.0
+    assert summary['p99_ms'] == 99.0
+    assert summary['throughput_rps'] == 50.0
+
+def test_regressions_respect_tolerance():
+    baseline = {'courses': {'p95_ms': 100.0, 'throughput_rps': 200.0, 'errors': 0}}
+    within = {'courses': {'p95_ms': 120.0, 'throughput_rps': 170.0, 'errors': 0}}
+    slower = {'courses': {'p95_ms': 130.0, 'throughput_rps': 140.0, 'errors': 2}}
+
+    assert check_regressions(within, baseline, tolerance=0.25) == []
+    assert len(check_regressions(slower, baseline, tolerance=0.25)) == 3
@@ -0,0 +1,61 @@
+import random
+
+import numpy as np
+
+def test_masks_follow_intervals():
+    from app.services.overlap import OverlapIndex
+
+    # 8:00-9:30 and 9:00-10:00 overlap, 9:30-11:00 touches the first and
+    # overlaps the second; the same times on another day do not clash
+    index = OverlapIndex([0, 0, 0, 1], [480, 540, 570, 540], [570, 600, 660, 600])
+    assert index.cliques == [[0, 1], [1, 2], [3]]
+    assert index.masks() == [0b0011, 0b0111, 0b0110, 0b1000]
+    assert index.components().tolist() == [0, 0, 0, 1]
+
+def test_cliques_are_maximal_and_cover_every_overlap():
+    from app.services.overlap import OverlapIndex
+
+    rng = random.Random(5)
+    n = 300
+    day = np.array([rng.randrange(3) for _ in range(n)])
+    start = np.array([rng.randrange(480, 1080, 15) for _ in range(n)])
+    end = start + np.array([rng.choice([50, 75, 90, 180]) for _ in range(n)])
+    overlaps = lambda i, j: day[i] == day[j] and start[i] < end[j] and start[j] < end[i]
+
+    cliques = OverlapIndex(day, start, end).cliques
+    covered = set()
+    for clique in cliques:
+        assert all(overlaps(i, j) for i in clique for j in clique if i < j)
+        assert not any(all(overlaps(k, i) for i in clique) for k in range(n) if k not in clique)
+        covered.update((i, j) for i in clique for j in clique if i < j)
+    assert covered == {(i, j) for i in range(n) for j in range(i + 1, n) if overlaps(i, j)}
+
+def test_sections_last_their_course_duration():
+    from app.services.overlap import OverlapIndex
+    from app.services.scheduler_service import SchedulerService
+    from app.services.problem import Problem
+
+    # Course 0 runs 150 minutes from 8:00, into course 1's 10:00 slot
+    problem = Problem({
+        'student_id': [1],
+        'course_id': [1, 2, 3, 4],
+        'course_capacity': [10] * 4,
+        'course_codes': np.frombuffer(b'A\nB\nC\nD', dtype=np.uint8),
+        'course_duration': [150, 0, 0, 0],
+        'timeslot_id': [1, 2, 3, 4],
+        'timeslot_day': [0, 0, 1, 2],
+        'timeslot_start': [480, 600, 480, 480],
+        'timeslot_end': [570, 690, 570, 570],
+        'pref_ptr': [0, 4],
+        'pref_course': [0, 1, 2, 3],
+        'pref_priority': [1, 2, 3, 4],
+        'section_course': [0, 1, 2, 3],
+        'section_timeslot': [0, 1, 2, 3],
+        'section_capacity': [10] * 4,
+        'meta': np.frombuffer(b'{}', dtype=np.uint8)
+    })
+    assert OverlapIndex.for_sections(problem).cliques == [[0, 1], [2], [3]]
+
+    result = SchedulerService(max_time_in_seconds=10, num_search_workers=1,
+                              log_search_progress=False).solve_problem(problem)
+    assert sorted(course for _, course, _ in result['assignments']) == [1, 3, 4]
@@ -0,0 +1,128 @@
+from collections import Counter
+
+import numpy as np
+
+def catalog_problem(room_capacity, course_instructor, blocked=()):
+    """Four 90-minute periods over two days and four courses; ``blocked``
+    holds (instructor index, timeslot index) pairs"""
+    from app.services.problem import Problem
+
+    instructors = max(course_instructor) + 1
+    blocked_ptr = np.searchsorted([i for i, _ in blocked], np.arange(instructors + 1))
+    return Problem({
+        'student_id': [],
+        'course_id': [1, 2, 3, 4],
+        'course_capacity': [120, 60, 40, 40],
+        'course_codes': np.frombuffer(b'A\nB\nC\nD', dtype=np.uint8),
+        'course_instructor': course_instructor,
+        'timeslot_id': [1, 2, 3, 4],
+        'timeslot_day': [0, 0, 1, 1],
+        'timeslot_start': [480, 600, 480, 600],
+        'timeslot_end': [570, 690, 570, 690],
+        'pref_ptr': [0], 'pref_course': [], 'pref_priority': [],
+        'section_course': [], 'section_timeslot': [], 'section_capacity': [],
+        'room_id': range(1, len(room_capacity) + 1),
+        'room_capacity': room_capacity,
+        'instructor_id': range(1, instructors + 1),
+        'blocked_ptr': blocked_ptr,
+        'blocked_timeslot': [t for _, t in blocked],
+        'meta': np.frombuffer(b'{}', dtype=np.uint8)
+    })
+
+def test_placement_respects_rooms_and_instructors():
+    from app.services.placement import place_sections
+
+    # Courses 0 and 1 share instructor 0, who cannot teach in timeslot 0
+    problem = catalog_problem([50, 130, 40], [0, 0, 1, 2], blocked=[(0, 0)])
+    section_course = [0, 1, 1, 2, 3]
+    timeslots, rooms, capacity = place_sections(problem, section_course, [120, 30, 30, 40, 40])
+
+    assert len(set(zip(timeslots.tolist(), rooms.tolist()))) == 5
+    taught = [t for c, t in zip(section_course, timeslots.tolist()) if c in (0, 1)]
+    assert len(set(taught)) == len(taught) and 0 not in taught
+    # Sections of one course meet at different times
+    assert timeslots[1] != timeslots[2]
+    # Smallest room that fits: the big lecture gets the hall, 30 seats the 40 room
+    assert rooms[0] == 1 and problem.room_capacity[rooms[1]] == 40
+    assert (capacity <= problem.room_capacity[rooms]).all()
+
+def test_placement_caps_seats_to_the_largest_free_room():
+    from app.services.placement import place_sections
+
+    problem = catalog_problem([40, 60], [0, 1, 2, 3])
+    timeslots, rooms, capacity = place_sections(problem, [0], [120])
+    assert rooms.tolist() == [1] and capacity.tolist() == [60]
+
+def test_section_without_a_free_room_gets_no_seats(caplog):
+    from app.services.placement import place_sections
+
+    # One room and four timeslots for five sections
+    problem = catalog_problem([100], [0, 1, 2, 3])
+    timeslots, rooms, capacity = place_sections(problem, [0, 1, 2, 3, 0], [50, 40, 30, 20, 10])
+
+    assert sorted(timeslots[:4].tolist()) == [0, 1, 2, 3] and rooms.tolist() == [0, 0, 0, 0, -1]
+    assert capacity.tolist() == [50, 40, 30, 20, 0]
+    assert 'without a free room get no seats' in caplog.text
+
+def test_placement_never_breaks_instructor_or_course_clashes(caplog):
+    from app.services.placement import place_sections
+
+    # Instructor 0 teaches courses 0 and 1 and is away in timeslots 0 and 1
+    problem = catalog_problem([200, 200], [0, 0, 1, 2], blocked=[(0, 0), (0, 1)])
+    section_course = [0, 0, 1]
+    timeslots, rooms, capacity = place_sections(problem, section_course, [60, 50, 40])
+
+    # Timeslots 2 and 3 hold two of the sections; the third has nowhere to go
+    assert sorted(timeslots[capacity > 0].tolist()) == [2, 3]
+    assert capacity.tolist().count(0) == 1 and rooms[capacity == 0].tolist() == [-1]
+    assert 'no time free of instructor and course clashes' in caplog.text
+
+def test_assignments_fill_sections_sharing_a_time(app):
+    from app import db
+    from app.models.models import Schedule, Section
+    from app.services.scheduler_service import save_sections, save_assignments
+    from benchmarks.generator import WorkloadGenerator
+    from app.services.problem import Problem
+
+    WorkloadGenerator(10, num_courses=2, seed=1).write()
+    problem = Problem.from_database('Spring2024', plan=False)
+    # Two sections of the first course at one time, 2 and 3 seats
+    problem.section_course = np.array([0, 0, 1], dtype='<i4')
+    problem.section_timeslot = np.array([0, 0, 1], dtype='<i4')
+    problem.section_capacity = np.array([2, 3, 4], dtype='<i4')
+    problem.section_room = np.array([-1, -1, -1], dtype='<i4')
+    sections = save_sections('Spring2024', problem)
+
+    course, other = problem.course_id.tolist()
+    timeslot, second = problem.timeslot_id[:2].tolist()
+    save_assignments('Spring2024', [(s, course, timeslot) for s in problem.student_id[:5].tolist()]
+                     + [(s, other, second) for s in problem.student_id[:3].tolist()], sections=sections)
+
+    enrolled = {(s.course_id, s.number): s.enrolled for s in db.session.scalars(db.select(Section))}
+    assert enrolled == {(course, 1): 2, (course, 2): 3, (other, 1): 3}
+    for schedule in db.session.scalars(db.select(Schedule)):
+        assert (schedule.section.course_id, schedule.section.timeslot_id) == (schedule.course_id,
+                                                                              schedule.timeslot_id)
+
+def test_optimize_persists_placed_sections(app):
+    from app import db
+    from app.models.models import Schedule, Section, Room
+    from app.services.scheduler_service import SchedulerService
+    from app.services.timetable_service import TimetableService
+    from benchmarks.generator import WorkloadGenerator
+
+    WorkloadGenerator(60, num_courses=12, seed=4).write()
+    assert SchedulerService(max_time_in_seconds=10, log_search_progress=False).optimize_schedules('Spring2024')
+
+    sections = db.session.execute(db.select(Section.id, Section.timeslot_id, Section.room_id,
+                                            Section.instructor_id, Section.capacity)).all()
+    assert Counter((s.timeslot_id, s.room_id) for s in sections).most_common(1)[0][1] == 1
+    assert Counter((s.timeslot_id, s.instructor_id) for s in sections).most_common(1)[0][1] == 1
+    rooms = dict(db.session.execute(db.select(Room.id, Room.capacity)).all())
+    assert all(s.capacity <= rooms[s.room_id] for s in sections)
+
+    schedule = db.session.scalars(db.select(Schedule)).first()
+    assert schedule.section.course_id == schedule.course_id
+    assert schedule.section.timeslot_id == schedule.timeslot_id
+    entries = TimetableService().get(schedule.student_id)
+    assert schedule.section.room.name in entries
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+@pytest.fixture
+def catalog(app):
+    from benchmarks.generator import WorkloadGenerator
+    WorkloadGenerator(60, num_courses=20, prereq_depth=2, seed=3).write()
+    return app
+
+def test_graph_rejects_cycles(catalog):
+    from app.services.prerequisites import PrerequisiteGraph, PrerequisiteCycleError
+
+    graph = PrerequisiteGraph.load()
+    course, prereq = next((c, p) for c, prereqs in graph.requires.items() for p in prereqs)
+    with pytest.raises(PrerequisiteCycleError):
+        graph.add(prereq, course)
+    with pytest.raises(PrerequisiteCycleError):
+        graph.add(course, course)
+
+def test_compile_prunes_completed_and_unrequested_courses():
+    from app.services.problem import Problem
+    from app.services.prerequisites import compile_prerequisites
+
+    # Course 2 requires 1, which requires 0; course 3 is free-standing
+    problem = Problem({
+        'student_id': [1, 2, 3],
+        'course_id': [1, 2, 3, 4],
+        'course_capacity': [10] * 4,
+        'course_codes': np.frombuffer(b'A\nB\nC\nD', dtype=np.uint8),
+        'timeslot_id': [], 'timeslot_day': [], 'timeslot_start': [], 'timeslot_end': [],
+        'pref_ptr': [0, 1, 2, 3],
+        'pref_course': [2, 3, 2],
+        'pref_priority': [1, 1, 1],
+        'section_course': [], 'section_timeslot': [], 'section_capacity': [],
+        'prereq_course': [2, 1],
+        'prereq_required': [1, 0],
+        'done_ptr': [0, 0, 0, 2],
+        'done_course': [0, 1],
+        'meta': np.frombuffer(b'{}', dtype=np.uint8)
+    })
+    eligible, pending = compile_prerequisites(problem)
+
+    # Requested C pulls in the whole chain below it
+    assert eligible[0].tolist() == [True, True, True, True]
+    assert pending[0].tolist() == [True, True]
+    # Nothing requested: only courses whose prerequisites are met
+    assert eligible[1].tolist() == [True, False, False, True]
+    assert not pending[1].any()
+    # Completed A and B are pruned and C needs no constraint
+    assert eligible[2].tolist() == [False, False, True, True]
+    assert not pending[2].any()
+
+def test_schedules_respect_prerequisites_and_completions(catalog):
+    from app import db
+    from app.models.models import Schedule, CoursePrerequisite, CourseCompletion
+    from app.services.scheduler_service import SchedulerService
+
+    SchedulerService(max_time_in_seconds=10, log_search_progress=False).optimize_schedules('Spring2024')
+
+    taken = {}
+    for row in db.session.execute(db.select(Schedule.student_id, Schedule.course_id)):
+        taken.setdefault(row.student_id, set()).add(row.course_id)
+    completed = {(row.student_id, row.course_id) for row in db.session.execute(
+        db.select(CourseCompletion.student_id, CourseCompletion.course_id))}
+    edges = db.session.execute(db.select(CoursePrerequisite.course_id, CoursePrerequisite.prerequisite_id)).all()
+
+    assert taken and edges and completed
+    for student_id, courses in taken.items():
+        assert not any((student_id, c) in completed for c in courses)
+        for course, prereq in edges:
+            if course in courses:
+                assert prereq in courses or (student_id, prereq) in completed
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+@pytest.fixture
+def cohort(app):
+    from benchmarks.generator import WorkloadGenerator
+    WorkloadGenerator(30, num_courses=8, seed=7).write()
+    return app
+
+def test_problem_file_round_trip(cohort, tmp_path):
+    from app.services.problem import Problem, ARRAYS
+
+    problem = Problem.from_database('Spring2024')
+    path = problem.save(str(tmp_path / 'problem.bin'))
+    loaded = Problem.load(path)
+
+    for name in ARRAYS:
+        assert np.array_equal(getattr(loaded, name), getattr(problem, name)), name
+    assert not loaded.pref_course.flags.writeable
+    assert loaded.course_code == problem.course_code
+    assert loaded.metadata['semester'] == 'Spring2024'
+    loaded.close()
+
+def test_rejects_foreign_files(tmp_path):
+    from app.services.problem import Problem, ProblemFormatError
+
+    path = tmp_path / 'not-a-problem.bin'
+    path.write_bytes(b'PK\x03\x04' + b'\0' * 64)
+    with pytest.raises(ProblemFormatError):
+        Problem.load(str(path))
+
+def test_optimize_from_problem_file(cohort, tmp_path, monkeypatch):
+    from app.models.models import Schedule
+    from app.services.problem import Problem
+    from app.services.scheduler_service import SchedulerService
+
+    path = Problem.from_database('Spring2024').save(str(tmp_path / 'problem.bin'))
+    loaded = []
+    load = Problem.load
+    monkeypatch.setattr(Problem, 'load', lambda path: loaded.append(load(path)) or loaded[-1])
+    schedules = SchedulerService(max_time_in_seconds=10, log_search_progress=False) \
+        .optimize_schedules('Fall2024', problem=path)
+
+    assert schedules
+    assert Schedule.query.filter_by(semester='Fall2024').count() == len(schedules)
+    # The file mapping is released once the run is saved
+    assert loaded and loaded[0]._mapped is None
@@ -0,0 +1,96 @@
+import asyncio
+import json
+from datetime import time
+
+import pytest
+
+def _published(db):
+    """Three students; 1 and 2 take both sections of the catalog, 3 none"""
+    from app.models.models import Student, Course, TimeSlot, Section, Schedule
+    db.session.add_all([Student(id=i, student_id=f'S{i}', name=f'S{i}', email=f's{i}@u.edu') for i in (1, 2, 3)])
+    db.session.add_all([Course(id=c, course_code=f'C{c}', name=f'Course {c}', capacity=60) for c in (1, 2)])
+    db.session.add_all([TimeSlot(id=1, day=0, start_time=time(8, 0), end_time=time(9, 30), room='R1'),
+                        TimeSlot(id=2, day=1, start_time=time(8, 0), end_time=time(9, 30), room='R2')])
+    db.session.add_all([Section(id=1, semester='Spring2024', course_id=1, number=1, timeslot_id=1,
+                                capacity=30, enrolled=2),
+                        Section(id=2, semester='Spring2024', course_id=2, number=1, timeslot_id=2,
+                                capacity=2, enrolled=2)])
+    db.session.add_all([Schedule(student_id=s, course_id=c, timeslot_id=c, section_id=c, semester='Spring2024')
+                        for s in (1, 2) for c in (1, 2)])
+    db.session.commit()
+
+def test_batch_lookup_and_availability(app, client):
+    from app import db
+    from app.services.timetable_service import TimetableService
+    _published(db)
+
+    # Student 1 is served from the read model, 2 from the join, 3 has nothing
+    TimetableService().rebuild([1])
+    batch = client.get('/api/schedules/students?ids=3,1,2').get_json()
+    assert list(batch) == ['1', '2', '3']
+    assert batch['1'] == batch['2'] == client.get('/api/schedules/student/2').get_json()
+    assert [e['room'] for e in batch['1']] == ['R1', 'R2'] and batch['3'] == []
+    assert client.get('/api/schedules/students?ids=1,x').status_code == 400
+    assert client.get('/api/schedules/students').status_code == 400
+
+    courses = client.get('/api/v1/courses/availability').get_json()['courses']
+    assert [(c['id'], c['capacity'], c['enrolled'], c['available']) for c in courses] == [(1, 30, 2, 28), (2, 2, 2, 0)]
+    only = client.get('/api/v1/courses/availability?course_id=2').get_json()['courses']
+    assert [s['id'] for c in only for s in c['sections']] == [2]
+
+def _get(app, path):
+    """Status and body of one request to an ASGI app"""
+    scope = {'type': 'http', 'method': 'GET', 'path': path.split('?')[0],
+             'query_string': (path.split('?') + [''])[1].encode()}
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        sent.append(message)
+
+    async def call():
+        await app(scope, receive, send)
+        return sent[0]['status'], sent[1]['body']
+    return call()
+
+def test_async_reads_match_flask(tmp_path, monkeypatch):
+    pytest.importorskip('greenlet')
+    pytest.importorskip('aiosqlite')
+    from app import create_app, db
+    from app.asgi import ReadApp
+    from app.services.timetable_service import TimetableService
+
+    database = tmp_path / 'reads.db'
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{database}')
+    flask_app = create_app('testing')
+    paths = ['/api/schedules/student/1', '/api/schedules/student/2', '/api/schedules/student/3',
+             '/api/schedules/students?ids=1,2,3', '/api/v1/courses/availability',
+             '/api/v1/courses/availability?semester=Spring2024&course_id=1']
+    with flask_app.app_context():
+        db.create_all()
+        _published(db)
+        TimetableService().rebuild([1])
+        client = flask_app.test_client()
+        expected = [json.loads(client.get(path).data) for path in paths]
+
+    # Two pooled connections serve many more concurrent requests
+    read_app = ReadApp(f'sqlite+aiosqlite:///{database}', pool_size=2, max_overflow=0)
+
+    async def run():
+        try:
+            return await asyncio.gather(*[_get(read_app, path) for path in paths * 20])
+        finally:
+            await read_app.stop()
+
+    responses = asyncio.run(run())
+    assert all(status == 200 for status, _ in responses)
+    assert [json.loads(body) for _, body in responses] == expected * 20
+
+    async def errors():
+        try:
+            return [(await _get(read_app, path))[0] for path in ('/api/schedules/students?ids=x', '/nope')]
+        finally:
+            await read_app.stop()
+    assert asyncio.run(errors()) == [400, 404]
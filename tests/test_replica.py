@@ -0,0 +1,93 @@
+import shutil
+
+def _student(i):
+    from app.models.models import Student
+    return Student(id=i, student_id=f'S{i}', name=f'S{i}', email=f's{i}@u.edu')
+
+def test_reads_follow_the_replica_until_it_lags(tmp_path, monkeypatch):
+    from datetime import time
+    from app import create_app, db
+    from app.models.models import Student, OptimizationRun, Course, TimeSlot, Section
+    from app.utils.replica import replica_reads
+
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{primary}')
+    monkeypatch.setenv('REPLICA_DATABASE_URL', f'sqlite:///{replica}')
+    app = create_app('testing')
+    client = app.test_client()
+
+    def replicate():
+        app.extensions['replica'].dispose()
+        shutil.copy(primary, replica)
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([_student(i) for i in (1, 2)])
+        db.session.add(Course(id=1, course_code='C1', name='Course 1', capacity=10))
+        db.session.add(TimeSlot(id=1, day=0, start_time=time(8, 0), end_time=time(9, 30)))
+        db.session.add(Section(id=1, semester='Spring2024', course_id=1, number=1, timeslot_id=1, capacity=10))
+        db.session.add(OptimizationRun(semester='Spring2024', engine='service', status='OPTIMAL'))
+        db.session.commit()
+        replicate()
+        # Written after the copy without a run or an enrollment: the replica
+        # is current but lacks it
+        db.session.add(_student(3))
+        db.session.commit()
+        db.session.remove()
+
+    response = client.get('/api/v1/optimization/runs?semester=Spring2024')
+    assert response.headers['X-Read-Source'] == 'replica' and len(response.get_json()['runs']) == 1
+    response = client.get('/api/v1/students?semester=Spring2024')
+    assert response.headers['X-Read-Source'] == 'replica' and response.get_json()['total'] == 2
+    # Endpoints that are not routed keep reading from the primary
+    assert client.get('/api/schedules/students?ids=3').status_code == 200
+
+    with app.app_context():
+        with replica_reads('Spring2024') as source:
+            assert source == 'replica' and Student.query.count() == 2
+            # Writes go to the primary, and so do the block's reads after them
+            db.session.add(_student(4))
+            db.session.commit()
+            assert Student.query.count() == 4
+        db.session.remove()
+
+    # An enrollment bumps the live version, so the seat counts come from the
+    # primary until the replica has replayed it
+    assert client.post('/api/v1/enrollments', json={'student_id': 1, 'section_id': 1}).status_code == 201
+    response = client.get('/api/v1/courses?semester=Spring2024')
+    assert response.headers['X-Read-Source'] == 'primary' and response.get_json()['courses'][0]['enrolled'] == 1
+    response = client.get('/api/v1/optimization/status?semester=Spring2024')
+    assert response.headers['X-Read-Source'] == 'primary' and response.get_json()['total_schedules'] == 1
+    with app.app_context():
+        replicate()
+    response = client.get('/api/v1/courses?semester=Spring2024')
+    assert response.headers['X-Read-Source'] == 'replica' and response.get_json()['courses'][0]['enrolled'] == 1
+    with app.app_context():
+        # A failed run publishes nothing, so the replica stays current
+        db.session.add(OptimizationRun(semester='Spring2024', engine='cp_sat_distributed', status='FAILED'))
+        db.session.commit()
+        db.session.remove()
+    assert client.get('/api/v1/courses?semester=Spring2024').headers['X-Read-Source'] == 'replica'
+    # A drop bumps the live version too
+    assert client.post('/api/v1/drops', json={'drops': [{'student_id': 1, 'course_id': 1}]}).status_code == 200
+    response = client.get('/api/v1/courses?semester=Spring2024')
+    assert response.headers['X-Read-Source'] == 'primary' and response.get_json()['courses'][0]['enrolled'] == 0
+
+    with app.app_context():
+        # A newer published run on the primary makes the replica stale
+        db.session.add(OptimizationRun(semester='Spring2024', engine='service', status='OPTIMAL'))
+        db.session.commit()
+        db.session.remove()
+
+    response = client.get('/api/v1/optimization/runs?semester=Spring2024')
+    assert response.headers['X-Read-Source'] == 'primary' and len(response.get_json()['runs']) == 3
+    # The guard is per semester: other semesters' versions still match
+    assert client.get('/api/v1/optimization/runs?semester=Fall2024').headers['X-Read-Source'] == 'replica'
+    assert client.get('/pool').get_json()['replica']['checkouts'] > 0
+
+def test_without_a_replica_everything_reads_from_the_primary(app, client):
+    from app.utils.replica import replica_reads
+
+    with replica_reads('Spring2024') as source:
+        assert source == 'primary'
+    assert client.get('/api/v1/optimization/runs').headers['X-Read-Source'] == 'primary'
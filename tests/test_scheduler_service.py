@@ -0,0 +1,104 @@
+import pytest
+
+@pytest.fixture
+def cohort(app):
+    from benchmarks.generator import WorkloadGenerator
+    WorkloadGenerator(30, num_courses=8, seed=7).write()
+    return app
+
+def test_optimization_records_stage_timings(cohort, client):
+    from app.services.scheduler_service import SchedulerService
+    service = SchedulerService(max_time_in_seconds=10, log_search_progress=False)
+
+    schedules = service.optimize_schedules('Spring2024')
+
+    stats = service.solution_stats
+    assert schedules
+    for stage in ('load', 'section_planning', 'variables', 'constraints', 'solve', 'extraction', 'persist'):
+        assert stage in stats['stages']
+    assert stats['counters']['variables'] > 0
+    assert stats['counters']['constraints'] > 0
+
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'scheduler_stage_seconds_count{stage="solve"}' in body
+    assert 'scheduler_last_run{counter="variables"}' in body
+
+def test_optimization_runs_are_persisted(cohort, client):
+    from app.services.scheduler_service import SchedulerService
+    SchedulerService(max_time_in_seconds=10, log_search_progress=False).optimize_schedules('Spring2024')
+
+    status = client.get('/api/v1/optimization/status').get_json()
+    last_run = status['last_run']
+    assert last_run['engine'] == 'cp_sat'
+    assert last_run['num_students'] == 30
+    assert last_run['parameters']['max_time_in_seconds'] == 10
+    assert 'solve' in last_run['stages']
+
+    runs = client.get('/api/v1/optimization/runs?semester=Spring2024').get_json()['runs']
+    assert [run['id'] for run in runs] == [last_run['id']]
+    detail = client.get(f"/api/v1/optimization/runs/{last_run['id']}").get_json()
+    assert detail['objective_trajectory']
+
+    trend = client.get('/api/v1/optimization/trends?metric=stage.solve').get_json()
+    assert trend['by_cohort_size'][0]['num_students'] == 30
+    assert client.get('/api/v1/optimization/trends?metric=bogus').status_code == 400
+
+def test_solver_records_stay_out_of_the_session(cohort):
+    from app import db
+    from app.services.records import load_students, load_preferences
+
+    students = load_students()
+    preferences = load_preferences([s.id for s in students])
+
+    assert len(students) == 30
+    assert not hasattr(students[0], '__dict__')
+    assert all(p == sorted(p, key=lambda pref: pref[1]) for p in preferences.values())
+    assert len(db.session.identity_map) == 0
+
+def test_bulk_extraction_matches_solver_values(cohort, monkeypatch):
+    from collections import Counter
+    import numpy as np
+    from app.services.problem import Problem
+    from app.services.scheduler_service import SchedulerService, assignment_distribution
+
+    service = SchedulerService(max_time_in_seconds=10, log_search_progress=False)
+    built = []
+    build_model = service._build_model
+    def capture(*args, **kwargs):
+        built.append(build_model(*args, **kwargs))
+        return built[-1]
+    monkeypatch.setattr(service, '_build_model', capture)
+
+    problem = Problem.from_database('Spring2024')
+    result = service.solve_problem(problem)
+    assert result['feasible']
+
+    solution = service.solver.ResponseProto().solution
+    taken = Counter()
+    for row in built[-1]:
+        for sec, var in row.items():
+            assert solution[var.Index()] == service.solver.Value(var)
+            taken[sec - 1] += service.solver.Value(var)
+    assert Counter(result['sections'].tolist()) == +taken
+
+    distribution = assignment_distribution(problem, result['rows'], problem.section_course[result['sections']])
+    assert sum(n for key, n in distribution.items() if not key.startswith('load_')) == len(result['assignments'])
+    assert sum(n for key, n in distribution.items() if key.startswith('load_')) == problem.num_students
+    loads = np.bincount(result['rows'], minlength=problem.num_students)
+    assert distribution.get('load_0', 0) == int((loads == 0).sum())
+
+def test_saved_schedules_match_the_solution(cohort):
+    from collections import Counter
+    from app import db
+    from app.models.models import Schedule, Section
+    from app.services.scheduler_service import SchedulerService
+
+    schedules = SchedulerService(max_time_in_seconds=10, log_search_progress=False).optimize_schedules('Spring2024')
+
+    rows = db.session.scalars(db.select(Schedule).filter_by(semester='Spring2024')).all()
+    assert sorted((s.student_id, s.course_id, s.timeslot_id) for s in rows) == sorted(schedules)
+    assert all(s.section is not None and (s.section.course_id, s.section.timeslot_id) == (s.course_id, s.timeslot_id)
+               for s in rows)
+    linked = Counter(s.section_id for s in rows)
+    for section in db.session.scalars(db.select(Section).filter_by(semester='Spring2024')):
+        assert section.enrolled == linked[section.id] <= section.capacity
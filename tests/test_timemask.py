@@ -0,0 +1,53 @@
+import random
+
+import numpy as np
+
+def test_masks_clash_with_a_single_and():
+    from app.services.timemask import WeekGrid
+
+    grid = WeekGrid(bucket=15, first=480, last=1080, days=5)
+    lecture = grid.mask(0, 480, 570)
+    assert lecture & grid.mask(0, 540, 600)
+    # Back-to-back meetings and the same time on another day do not clash
+    assert not lecture & grid.mask(0, 570, 660)
+    assert not lecture & grid.mask(1, 480, 570)
+    # Times off the grid round outwards, so a near-miss inside one bucket clashes
+    assert not grid.aligns([480], [575])
+    assert grid.mask(0, 480, 575) & grid.mask(0, 580, 600)
+
+    words = grid.words([0, 4], [480, 1020], [570, 1080])
+    assert [grid.to_int(row) for row in words] == grid.masks([0, 4], [480, 1020], [570, 1080])
+
+def test_cohort_masks_match_interval_comparison():
+    from app.services.overlap import overlapping_pairs
+    from app.services.timemask import WeekGrid, clashing_students, student_words
+
+    rng = random.Random(7)
+    n = 2000
+    student = np.array([rng.randrange(400) for _ in range(n)])
+    day = np.array([rng.randrange(5) for _ in range(n)])
+    start = np.array([rng.randrange(480, 1080, 5) for _ in range(n)])
+    end = start + np.array([rng.choice([50, 75, 90, 180]) for _ in range(n)])
+
+    grid = WeekGrid.covering(day, start, end)
+    assert grid.aligns(start, end)
+    words = grid.words(day, start, end)
+    first, _ = overlapping_pairs(student, day, start, end)
+    assert clashing_students(student, words).tolist() == sorted(set(student[first].tolist()))
+
+    students, combined = student_words(student, words)
+    masks = grid.masks(day, start, end)
+    for s, row in zip(students.tolist()[:20], combined):
+        expected = 0
+        for i in np.flatnonzero(student == s).tolist():
+            expected |= masks[i]
+        assert grid.to_int(row) == expected
+
+def test_bit_counts_without_numpy_bitwise_count(monkeypatch):
+    from app.services.timemask import WeekGrid, clashing_students
+
+    grid = WeekGrid(bucket=15, first=480, last=1080, days=5)
+    words = grid.words([0, 0, 1, 2, 2], [480, 540, 480, 480, 570], [570, 600, 570, 570, 660])
+    expected = clashing_students(np.array([1, 1, 2, 3, 3]), words)
+    monkeypatch.delattr(np, 'bitwise_count', raising=False)
+    assert clashing_students(np.array([1, 1, 2, 3, 3]), words).tolist() == expected.tolist() == [1]
@@ -0,0 +1,50 @@
+from datetime import time
+
+def _seed_schedules(db):
+    from app.models.models import Student, Course, TimeSlot, Schedule
+    students = [Student(student_id=f'S{i}', name=f'Student {i}', email=f's{i}@u.edu') for i in range(3)]
+    courses = [Course(course_code='CS101', name='Intro', capacity=10),
+               Course(course_code='CS201', name='Data Structures', capacity=10)]
+    slots = [TimeSlot(day=0, start_time=time(8, 0), end_time=time(9, 30), room='Room 101'),
+             TimeSlot(day=1, start_time=time(10, 0), end_time=time(11, 30), room='Room 102')]
+    db.session.add_all(students + courses + slots)
+    db.session.commit()
+    for student in students[:2]:
+        for course, slot in zip(courses, slots):
+            db.session.add(Schedule(student_id=student.id, course_id=course.id,
+                                    timeslot_id=slot.id, semester='Spring2024'))
+    db.session.commit()
+    return students, courses, slots
+
+def test_read_model_matches_join(app, client):
+    from app import db
+    from app.services.timetable_service import TimetableService
+    students, _, _ = _seed_schedules(db)
+
+    app.config['TIMETABLE_READ_MODEL'] = False
+    joined = client.get(f'/api/schedules/student/{students[0].id}').get_json()
+
+    assert TimetableService().rebuild() == 3
+    app.config['TIMETABLE_READ_MODEL'] = True
+    materialized = client.get(f'/api/schedules/student/{students[0].id}').get_json()
+
+    assert materialized == joined
+    assert len(materialized) == 2
+    assert client.get(f'/api/schedules/student/{students[2].id}').get_json() == []
+
+def test_incremental_rebuild_only_writes_changes(app):
+    from app import db
+    from app.models.models import Schedule, StudentTimetable
+    from app.services.timetable_service import TimetableService
+    students, courses, slots = _seed_schedules(db)
+    service = TimetableService()
+    service.rebuild()
+
+    assert service.rebuild() == 0
+
+    db.session.add(Schedule(student_id=students[2].id, course_id=courses[0].id,
+                            timeslot_id=slots[0].id, semester='Spring2024'))
+    db.session.commit()
+
+    assert service.rebuild([s.id for s in students]) == 1
+    assert db.session.get(StudentTimetable, students[2].id).course_count == 1
@@ -0,0 +1,87 @@
+from datetime import time
+import random
+
+import numpy as np
+
+def _add(db, rows):
+    from app.models.models import Student, Course, TimeSlot, Schedule
+    db.session.add_all([Student(id=i, student_id=f'S{i}', name=f'S{i}', email=f's{i}@u.edu') for i in (1, 2)])
+    db.session.add_all([Course(id=c, course_code=f'C{c}', name=f'Course {c}', capacity=30) for c in range(1, 5)])
+    slots = {
+        1: (0, time(8, 0), time(9, 30)),
+        2: (0, time(9, 0), time(10, 0)),   # overlaps 1
+        3: (0, time(9, 30), time(11, 0)),  # touches 1, overlaps 2
+        4: (1, time(8, 0), time(9, 30)),
+        5: (1, time(10, 0), time(11, 30))
+    }
+    db.session.add_all([TimeSlot(id=k, day=d, start_time=s, end_time=e, room='R') for k, (d, s, e) in slots.items()])
+    db.session.add_all([Schedule(student_id=s, course_id=c, timeslot_id=t, semester='Spring2024') for s, c, t in rows])
+    db.session.commit()
+
+def test_sql_and_vectorized_find_the_same_pairs(app):
+    from app import db
+    from app.services.verification_service import VerificationService
+    _add(db, [(1, 1, 1), (1, 2, 2), (1, 3, 3), (1, 4, 4), (2, 1, 1), (2, 4, 4)])
+
+    service = VerificationService()
+    sql = service.find_conflicts('Spring2024', method='sql')
+    vectorized = service.find_conflicts('Spring2024', method='vectorized')
+
+    assert sql == vectorized
+    assert [(p.student_id, p.first_course_id, p.second_course_id) for p in sql] == [(1, 1, 2), (1, 2, 3)]
+    assert (sql[0].overlap_start, sql[0].overlap_end) == ('09:00', '09:30')
+
+    summary = service.summarize('Spring2024')
+    assert summary['students_with_conflicts'] == 1
+    assert summary['conflicting_pairs'] == 2
+
+def test_meetings_last_their_course_duration(app):
+    from app import db
+    from app.models.models import Course
+    from app.services.verification_service import VerificationService
+    _add(db, [(2, 4, 4), (2, 1, 5)])
+    # Course 4 starts at 8:00 but runs 150 minutes, into the 10:00 slot
+    db.session.get(Course, 4).duration_minutes = 150
+    db.session.commit()
+
+    service = VerificationService()
+    sql = service.find_conflicts('Spring2024', method='sql')
+    assert sql == service.find_conflicts('Spring2024', method='vectorized')
+    assert [(p.first_course_id, p.second_course_id, p.overlap_start, p.overlap_end) for p in sql] == \
+        [(4, 1, '10:00', '10:30')]
+
+def test_overlapping_pairs_matches_brute_force():
+    from app.services.verification_service import overlapping_pairs
+    rng = random.Random(3)
+    n = 400
+    student = np.array([rng.randrange(40) for _ in range(n)])
+    day = np.array([rng.randrange(2) for _ in range(n)])
+    start = np.array([rng.randrange(0, 600, 15) for _ in range(n)])
+    end = start + np.array([rng.choice([30, 60, 90, 180]) for _ in range(n)])
+
+    first, second = overlapping_pairs(student, day, start, end)
+    found = {frozenset(pair) for pair in zip(first.tolist(), second.tolist())}
+    expected = {
+        frozenset((i, j)) for i in range(n) for j in range(i + 1, n)
+        if student[i] == student[j] and day[i] == day[j] and start[i] < end[j] and start[j] < end[i]
+    }
+    assert len(first) == len(found)
+    assert found == expected
+
+def test_conflicted_students_from_time_masks(app):
+    from app import db
+    from app.models.models import Course
+    from app.services.verification_service import VerificationService
+    _add(db, [(1, 1, 1), (1, 2, 2), (2, 4, 4), (2, 1, 5)])
+    service = VerificationService()
+    assert service.conflicted_students('Spring2024') == [1]
+
+    # Off the 5-minute grid the flagged students are checked against the
+    # intervals; course 4 from 8:00 ends just before or just after 10:00
+    course = db.session.get(Course, 4)
+    course.duration_minutes = 119
+    db.session.commit()
+    assert service.conflicted_students('Spring2024') == [1]
+    course.duration_minutes = 122
+    db.session.commit()
+    assert service.conflicted_students('Spring2024') == [1, 2]
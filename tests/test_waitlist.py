@@ -0,0 +1,111 @@
+from datetime import datetime, time, timedelta
+
+def _semester(db):
+    """Course 1 has sections 1 (Mon 8:00, full) and 2 (Tue 8:00, full);
+    student 3 is busy on Monday morning with course 2"""
+    from app.models.models import Student, Course, TimeSlot, Section, Schedule, WaitlistEntry
+    db.session.add_all([Student(id=i, student_id=f'S{i}', name=f'S{i}', email=f's{i}@u.edu') for i in range(1, 7)])
+    db.session.add_all([Course(id=c, course_code=f'C{c}', name=f'Course {c}', capacity=10) for c in (1, 2)])
+    db.session.add_all([TimeSlot(id=1, day=0, start_time=time(8, 0), end_time=time(9, 30)),
+                        TimeSlot(id=2, day=0, start_time=time(9, 0), end_time=time(10, 30)),
+                        TimeSlot(id=3, day=1, start_time=time(8, 0), end_time=time(9, 30))])
+    db.session.add_all([Section(id=1, semester='Spring2024', course_id=1, number=1, timeslot_id=1, capacity=2,
+                                enrolled=2),
+                        Section(id=2, semester='Spring2024', course_id=1, number=2, timeslot_id=3, capacity=1,
+                                enrolled=1),
+                        Section(id=3, semester='Spring2024', course_id=2, number=1, timeslot_id=2, capacity=5,
+                                enrolled=1)])
+    db.session.add_all([Schedule(student_id=s, course_id=c, timeslot_id=t, section_id=sec, semester='Spring2024')
+                        for s, c, t, sec in [(1, 1, 1, 1), (2, 1, 1, 1), (6, 1, 3, 2), (3, 2, 2, 3)]])
+    joined = datetime(2024, 1, 8, 9, 0)
+    db.session.add_all([WaitlistEntry(semester='Spring2024', student_id=s, course_id=1, priority=p,
+                                      created_at=joined + timedelta(minutes=m))
+                        for s, p, m in [(5, 2, 0), (3, 1, 1), (4, 1, 2)]])
+    db.session.commit()
+
+def test_drop_promotes_the_first_student_without_a_clash(app):
+    from app import db
+    from app.services.waitlist import WaitlistService
+    _semester(db)
+    service = WaitlistService()
+
+    # Student 3 heads the queue but clashes with the Monday section
+    result = service.drop('Spring2024', [(1, 1), (1, 2)])
+    assert result['dropped'] == [(1, 1)] and result['not_enrolled'] == [(1, 2)]
+    assert [(p.student_id, p.section_id) for p in result['promoted']] == [(4, 1)]
+    assert [e.student_id for e in service.queue('Spring2024', 1)] == [3, 5]
+
+    # A storm over both sections: 3 fits the Tuesday one, 5 the Monday one
+    result = service.drop('Spring2024', [(2, 1), (6, 1)])
+    assert sorted((p.student_id, p.section_id) for p in result['promoted']) == [(3, 2), (5, 1)]
+    assert service.queue('Spring2024', 1) == []
+
+def test_promotion_requires_the_prerequisites(app):
+    from app import db
+    from app.models.models import CoursePrerequisite, CourseCompletion
+    from app.services.waitlist import WaitlistService
+    _semester(db)
+    # Course 1 requires course 2: student 3 takes it, 5 has passed it, 4 has neither
+    db.session.add(CoursePrerequisite(course_id=1, prerequisite_id=2))
+    db.session.add(CourseCompletion(student_id=5, course_id=2))
+    db.session.commit()
+    service = WaitlistService()
+
+    result = service.drop('Spring2024', [(1, 1), (6, 1)])
+    assert sorted((p.student_id, p.section_id) for p in result['promoted']) == [(3, 2), (5, 1)]
+    assert [e.student_id for e in service.queue('Spring2024', 1)] == [4]
+
+    # Still unmet, so a free seat stays free rather than going to student 4
+    result = service.drop('Spring2024', [(2, 1)])
+    assert result['promoted'] == []
+    assert [e.student_id for e in service.queue('Spring2024', 1)] == [4]
+
+def test_concurrent_drops_release_the_seat_once(app):
+    from sqlalchemy import event
+    from app import db
+    from app.models.models import Section, Schedule
+    from app.services.waitlist import WaitlistService
+    _semester(db)
+    row_id = db.session.execute(db.select(Schedule.id).filter_by(student_id=1, course_id=1)).scalar_one()
+
+    raced = []
+    def concurrent_drop(conn, cursor, statement, parameters, context, executemany):
+        # Another request drops the same row between our select and delete
+        if statement.startswith('DELETE FROM schedule') and not raced:
+            raced.append(row_id)
+            cursor.execute('DELETE FROM schedule WHERE id = ?', (row_id,))
+            cursor.execute('UPDATE section SET enrolled = enrolled - 1 WHERE id = 1')
+
+    event.listen(db.engine, 'before_cursor_execute', concurrent_drop)
+    try:
+        result = WaitlistService().drop('Spring2024', [(1, 1)])
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', concurrent_drop)
+    assert raced
+    assert result['dropped'] == [] and result['not_enrolled'] == [(1, 1)]
+    assert result['promoted'] == []
+    assert db.session.get(Section, 1).enrolled == 1
+
+def test_optimize_waitlists_unmet_preferences(app, client):
+    from app import db
+    from app.models.models import Schedule, WaitlistEntry, CoursePreference
+    from app.services.scheduler_service import SchedulerService
+    from benchmarks.generator import WorkloadGenerator
+
+    # Tight capacities leave some preferences unmet
+    WorkloadGenerator(60, num_courses=12, tightness=1.3, seed=4).write()
+    assert SchedulerService(max_time_in_seconds=10, log_search_progress=False).optimize_schedules('Spring2024')
+
+    enrolled = set(db.session.execute(db.select(Schedule.student_id, Schedule.course_id)).all())
+    waiting = set(db.session.execute(db.select(WaitlistEntry.student_id, WaitlistEntry.course_id)).all())
+    preferred = set(db.session.execute(db.select(CoursePreference.student_id, CoursePreference.course_id)).all())
+    assert waiting and not waiting & enrolled
+    assert waiting == preferred - enrolled
+
+    student_id, course_id = sorted(enrolled)[0]
+    response = client.post('/api/v1/drops', json={'drops': [{'student_id': student_id, 'course_id': course_id}]})
+    assert response.status_code == 200
+    assert response.get_json()['dropped'] == [{'student_id': student_id, 'course_id': course_id}]
+    waitlist = client.get(f'/api/v1/waitlists/{course_id}').get_json()['waitlist']
+    assert [e['position'] for e in waitlist] == list(range(1, len(waitlist) + 1))
+    assert client.post('/api/v1/drops', json={'drops': [{'student_id': 1}]}).status_code == 400
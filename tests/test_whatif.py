@@ -0,0 +1,74 @@
+import pytest
+
+@pytest.fixture
+def published(app):
+    from app.services.scheduler_service import SchedulerService
+    from app.services.whatif import WhatIfService
+    from benchmarks.generator import WorkloadGenerator
+
+    WorkloadGenerator(60, num_courses=12, seed=4).write()
+    assert SchedulerService(max_time_in_seconds=10, log_search_progress=False).optimize_schedules('Spring2024')
+    WhatIfService.clear_cache()
+    yield
+    WhatIfService.clear_cache()
+
+def _saved(db):
+    from app.models.models import Schedule, Section
+    return (db.session.execute(db.select(Schedule.student_id, Schedule.section_id).order_by(Schedule.id)).all(),
+            db.session.execute(db.select(Section.id, Section.timeslot_id, Section.capacity)).all())
+
+def test_scenarios_start_from_the_published_schedule(published):
+    from app import db
+    from app.models.models import Section
+    from app.services.waitlist import WaitlistService
+    from app.services.whatif import WhatIfService
+
+    before = _saved(db)
+    service = WhatIfService(max_time_in_seconds=5)
+    section = db.session.scalars(db.select(Section).order_by(Section.capacity)).first()
+
+    # No real change: the hinted published schedule is matched or improved
+    same = service.evaluate('Spring2024', [{'type': 'capacity', 'section_id': section.id, 'seats': 0}])
+    assert same['feasible'] and not same['cached_topology']
+    assert same['delta']['objective_value'] >= 0
+
+    more = service.evaluate('Spring2024', [{'type': 'capacity', 'course_id': section.course_id, 'seats': 20},
+                                           {'type': 'add_section', 'course_id': section.course_id,
+                                            'timeslot_id': section.timeslot_id, 'capacity': 10}])
+    assert more['cached_topology'] and more['persisted'] is False
+    assert all(more['delta'][key] == more['scenario'].get(key, 0) - more['baseline'].get(key, 0)
+               for key in more['delta'])
+    course = next(c for c in more['courses'] if c['course_id'] == section.course_id)
+    assert course['seats']['scenario'] == course['seats']['baseline'] + 30
+
+    fewer = service.evaluate('Spring2024', [{'type': 'remove_section', 'section_id': section.id}])
+    course = next(c for c in fewer['courses'] if c['course_id'] == section.course_id)
+    assert course['seats']['scenario'] == course['seats']['baseline'] - section.capacity
+    assert fewer['cached_topology'] and fewer['live_version'] is None
+    assert _saved(db) == before
+
+    # A drop since the run reloads the published assignments
+    student_id, section_id = before[0][0]
+    course_id = db.session.get(Section, section_id).course_id
+    WaitlistService().drop('Spring2024', [(student_id, course_id)])
+    after = service.evaluate('Spring2024', [{'type': 'capacity', 'section_id': section.id, 'seats': 0}])
+    assert not after['cached_topology'] and after['live_version'] is not None
+    topology = service.topology('Spring2024')
+    assert (student_id, section_id) not in set(zip(topology.problem.student_id[topology.rows].tolist(),
+                                                   topology.section_ids[topology.sections].tolist()))
+
+def test_whatif_endpoint(published, client):
+    from app import db
+    from app.models.models import Section
+
+    section = db.session.scalars(db.select(Section)).first()
+    response = client.post('/api/v1/whatif', json={
+        'changes': [{'type': 'move_section', 'section_id': section.id, 'timeslot_id': section.timeslot_id}],
+        'max_time_in_seconds': 2
+    })
+    assert response.status_code == 200
+    assert response.get_json()['status'] in ('OPTIMAL', 'FEASIBLE')
+
+    assert client.post('/api/v1/whatif', json={'changes': []}).status_code == 400
+    bad = client.post('/api/v1/whatif', json={'changes': [{'type': 'capacity', 'section_id': -1, 'seats': 5}]})
+    assert bad.status_code == 400 and 'section_id' in bad.get_json()['error']